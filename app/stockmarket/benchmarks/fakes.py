@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from src.records import (
+    OPEN_ORDER_STATUSES,
+    FillRecord,
+    MakerQuoteRecord,
+    OrderRecord,
+    PortfolioRecord,
+    TickRecord,
+)
+from src.schemas import MarketRegime, OrderRequest
+
+
+class InMemoryStorage:
+    """Drop-in stand-in for ``StockmarketStorage`` that keeps writes in process memory."""
+
+    def __init__(self, *, latency: float = 0.0, history: int = 100_000) -> None:
+        self._latency = latency
+        self.orders: Dict[str, OrderRecord] = {}
+        self.trades: Deque[FillRecord] = deque(maxlen=history)
+        self.portfolios: Dict[str, PortfolioRecord] = {}
+        self.quotes: Dict[Tuple[str, str], MakerQuoteRecord] = {}
+        self.ticks: Deque[Tuple[TickRecord, str]] = deque(maxlen=history)
+        self.cached_tickers: Dict[str, TickRecord] = {}
+
+    async def connect(self) -> None:
+        return
+
+    async def close(self) -> None:
+        return
+
+    @property
+    def has_postgres(self) -> bool:
+        return True
+
+    @property
+    def has_redis(self) -> bool:
+        return True
+
+    async def record_portfolio_snapshot(self, snapshot: PortfolioRecord) -> None:
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        self.portfolios[snapshot.user_id] = snapshot
+
+    async def record_execution(
+        self,
+        orders: Sequence[OrderRecord],
+        fills: Sequence[FillRecord],
+        quotes: Sequence[MakerQuoteRecord],
+        portfolios: Sequence[PortfolioRecord],
+    ) -> None:
+        # One round trip, like the single-statement Postgres write it stands in for.
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        for order in orders:
+            self.orders[order.order_id] = order
+        self.trades.extend(fills)
+        for quote in quotes:
+            self.quotes[(quote.user_id, quote.symbol)] = quote
+        for snapshot in portfolios:
+            self.portfolios[snapshot.user_id] = snapshot
+
+    async def record_ticks(self, ticks: Sequence[TickRecord], regime_name: str) -> None:
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        self.ticks.extend((tick, regime_name) for tick in ticks)
+
+    # The tick deque is already capped at ``history``, so there is nothing to roll up or expire.
+    async def rollup_minute_bars(self, until: datetime, span: timedelta) -> Tuple[Optional[datetime], int]:
+        return None, 0
+
+    async def rollup_hour_bars(self, until: datetime, span: timedelta) -> Tuple[Optional[datetime], int]:
+        return None, 0
+
+    async def rollup_watermark(self, resolution: str) -> Optional[datetime]:
+        return None
+
+    async def purge_ticks(self, before: datetime, limit: int) -> int:
+        return 0
+
+    async def purge_minute_bars(self, before: datetime, limit: int) -> int:
+        return 0
+
+    async def load_order(self, order_id: str) -> Optional[OrderRecord]:
+        return self.orders.get(order_id)
+
+    async def load_open_orders(self) -> List[OrderRecord]:
+        return [order for order in self.orders.values() if order.status in OPEN_ORDER_STATUSES]
+
+    async def load_user_orders(
+        self, user_id: str, limit: int, before: Optional[str] = None
+    ) -> List[OrderRecord]:
+        def recency(order: OrderRecord) -> Tuple[datetime, str]:
+            return order.created_at, order.order_id
+
+        orders = [order for order in self.orders.values() if order.user_id == user_id]
+        orders.sort(key=recency, reverse=True)
+        if before is not None:
+            cursor = self.orders.get(before)
+            if cursor is None:
+                return []
+            orders = [order for order in orders if recency(order) < recency(cursor)]
+        return orders[:limit]
+
+    async def load_quotes(self) -> List[MakerQuoteRecord]:
+        return [quote for quote in self.quotes.values() if quote.bid_size or quote.ask_size]
+
+    async def load_portfolio(self, user_id: str) -> Optional[PortfolioRecord]:
+        return self.portfolios.get(user_id)
+
+    async def load_recent_trades(self, limit: int) -> List[FillRecord]:
+        return list(self.trades)[-limit:][::-1]
+
+    async def load_all_portfolios(self) -> List[PortfolioRecord]:
+        return list(self.portfolios.values())
+
+    async def cache_tickers(self, snapshots: Sequence[TickRecord]) -> None:
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        for snapshot in snapshots:
+            self.cached_tickers[snapshot.symbol] = snapshot
+
+
+class InMemoryRiskEngine:
+    """Stand-in for ``RiskEngine`` that approves every order and buffers emitted events."""
+
+    def __init__(self, *, latency: float = 0.0, history: int = 10_000) -> None:
+        self._latency = latency
+        self.events: Deque[Tuple[str, dict]] = deque(maxlen=history)
+
+    async def ensure_credit_limit(self, order: OrderRequest, notional: float) -> None:
+        if self._latency:
+            await asyncio.sleep(self._latency)
+
+    async def ensure_quote_credit(self, user_id: str, notional: float) -> None:
+        if self._latency:
+            await asyncio.sleep(self._latency)
+
+    async def publish_order(self, status: OrderRecord, notional: float) -> None:
+        await self.publish_event(
+            "risk.order.accepted", {"order": status.as_json(), "notional": round(notional, 2)}
+        )
+
+    async def publish_fills(self, status: OrderRecord, fills: Sequence[FillRecord]) -> None:
+        await self.publish_event(
+            "risk.order.filled",
+            {"order": status.as_json(), "fills": [fill.as_json() for fill in fills]},
+        )
+
+    async def publish_portfolio(self, snapshot: PortfolioRecord) -> None:
+        await self.publish_event("risk.portfolio.snapshot", snapshot.as_json())
+
+    async def publish_event(self, event_type: str, payload: dict) -> None:
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        self.events.append((event_type, payload))
+
+
+class InMemoryAnalytics:
+    """Stand-in for ``ClickHouseAnalyticsPipeline`` that counts the rows it would insert."""
+
+    def __init__(self, *, latency: float = 0.0) -> None:
+        self._latency = latency
+        self.tick_rows = 0
+        self.portfolio_rows = 0
+
+    async def connect(self) -> None:
+        return
+
+    async def close(self) -> None:
+        return
+
+    async def publish_ticks(self, ticks: Sequence[TickRecord], regime: MarketRegime) -> None:
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        self.tick_rows += len(ticks)
+
+    async def publish_portfolio_snapshot(self, snapshot: PortfolioRecord) -> None:
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        self.portfolio_rows += 1
+
+
+__all__ = ["InMemoryAnalytics", "InMemoryRiskEngine", "InMemoryStorage"]
@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+import msgpack
+import orjson
+import websockets
+
+DEFAULT_DATASET = Path(__file__).resolve().parents[3] / "docs" / "dataset" / "fake_companies.json"
+
+
+@dataclass
+class ServerOptions:
+    dataset: str
+    port: int
+    tick_interval: float
+    storage_latency: float
+    analytics_latency: float
+    risk_latency: float
+    deflate: bool
+
+
+@dataclass
+class SubscriberStats:
+    messages: int = 0
+    ticks: int = 0
+    tick_bytes: int = 0
+    lags_ms: List[float] = field(default_factory=list)
+    last_message: float = 0.0
+    disconnected: bool = False
+
+
+@dataclass
+class LoadReport:
+    traders: int
+    subscribers: int
+    duration: float
+    orders_sent: int
+    orders_ok: int
+    orders_failed: int
+    orders_per_sec: float
+    order_latency_ms: Dict[str, float]
+    tick_lag_ms: Dict[str, float]
+    client_mean_lag_ms: Dict[str, float]
+    encoding: str
+    tick_frame_bytes: float
+    stalled_subscribers: int
+    disconnected_subscribers: int
+    server_dropped_subscribers: Optional[int]
+
+
+def _serve(options: ServerOptions, dropped: Any) -> None:
+    # Environment must be in place before importing the app: main reads it at import time.
+    os.environ["STOCKMARKET_DATASET_PATH"] = options.dataset
+    os.environ["STOCKMARKET_TICK_INTERVAL"] = str(options.tick_interval)
+    os.environ["STOCKMARKET_MIDDLEWARE_BASE_URL"] = "http://middleware.loadtest"
+
+    import uvicorn
+
+    from src import main
+
+    from .fakes import InMemoryAnalytics, InMemoryStorage
+
+    async def fake_middleware(request: httpx.Request) -> httpx.Response:
+        if options.risk_latency:
+            await asyncio.sleep(options.risk_latency)
+        if request.method == "GET":
+            return httpx.Response(200, json={"available": 1e12})
+        return httpx.Response(202, json={"status": "accepted"})
+
+    main.create_storage = lambda: InMemoryStorage(latency=options.storage_latency)
+    main.create_analytics = lambda: InMemoryAnalytics(latency=options.analytics_latency)
+    main.create_http_client = lambda: httpx.AsyncClient(transport=httpx.MockTransport(fake_middleware))
+
+    async def report_engine_stats() -> None:
+        if main._engine is not None:
+            # Shared memory rather than a queue: uvicorn re-raises SIGTERM once shutdown completes,
+            # which would kill a queue feeder thread before it flushes.
+            dropped.value = main._engine.dropped_subscribers
+
+    main.app.router.on_shutdown.insert(0, report_engine_stats)
+    uvicorn.run(
+        main.app,
+        host="127.0.0.1",
+        port=options.port,
+        log_level="warning",
+        ws_max_queue=1024,
+        ws_per_message_deflate=options.deflate,
+    )
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p99": 0.0, "p999": 0.0, "max": 0.0}
+    ordered = sorted(values)
+
+    def pick(quantile: float) -> float:
+        return round(ordered[min(len(ordered) - 1, max(0, math.ceil(quantile * len(ordered)) - 1))], 3)
+
+    return {"p50": pick(0.5), "p99": pick(0.99), "p999": pick(0.999), "max": round(ordered[-1], 3)}
+
+
+async def _wait_until_ready(base_url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                response = await client.get(f"{base_url}/health/ready")
+                if response.status_code == 200 and response.json().get("status") == "ok":
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Stockmarket app did not become ready in time")
+
+
+async def _subscriber(url: str, encoding: str, stats: SubscriberStats, stop: asyncio.Event) -> None:
+    subprotocols = [f"stockmarket.{encoding}"]
+    try:
+        async with websockets.connect(url, max_queue=None, open_timeout=30, subprotocols=subprotocols) as socket:
+            while not stop.is_set():
+                try:
+                    raw = await asyncio.wait_for(socket.recv(), timeout=0.5)
+                except asyncio.TimeoutError:
+                    continue
+                received = time.time()
+                stats.messages += 1
+                stats.last_message = received
+                payload = msgpack.unpackb(raw) if encoding == "msgpack" else orjson.loads(raw)
+                if payload.get("type") == "tick":
+                    stats.ticks += 1
+                    # Frame size before permessage-deflate, which the transport applies per connection.
+                    stats.tick_bytes += len(raw) if isinstance(raw, bytes) else len(raw.encode())
+                    if encoding == "msgpack":
+                        sent = payload["timestamp"] / 1_000
+                    else:
+                        sent = datetime.fromisoformat(payload["timestamp"]).timestamp()
+                    stats.lags_ms.append((received - sent) * 1_000)
+    except (websockets.ConnectionClosed, OSError, asyncio.TimeoutError):
+        stats.disconnected = True
+
+
+async def _trader(
+    client: httpx.AsyncClient,
+    symbols: List[Dict[str, float]],
+    rng: random.Random,
+    think_time: float,
+    latencies: List[float],
+    failures: List[int],
+    stop: asyncio.Event,
+    trader_id: int,
+) -> None:
+    while not stop.is_set():
+        await asyncio.sleep(rng.expovariate(1 / think_time) if think_time else 0)
+        ticker = rng.choice(symbols)
+        side = rng.choice(("BUY", "SELL"))
+        body: Dict[str, object] = {
+            "user_id": f"load-trader-{trader_id}",
+            "symbol": ticker["symbol"],
+            "side": side,
+            "quantity": rng.randint(1, 20),
+        }
+        if rng.random() < 0.2:
+            body["order_type"] = "market"
+        else:
+            body["order_type"] = "limit"
+            body["price"] = round(ticker["price"] * (1 + rng.uniform(-0.01, 0.01)), 2)
+        started = time.perf_counter()
+        try:
+            response = await client.post("/api/v1/orders", json=body)
+            if response.status_code == 200:
+                latencies.append((time.perf_counter() - started) * 1_000)
+            else:
+                failures.append(response.status_code)
+        except httpx.HTTPError:
+            failures.append(0)
+
+
+@dataclass
+class WorkerResult:
+    elapsed: float
+    latencies: List[float]
+    failures: int
+    lags: List[List[float]]
+    ticks: int
+    tick_bytes: int
+    stalled: int
+    disconnected: int
+
+
+async def _run_worker(
+    *,
+    base_url: str,
+    trader_ids: List[int],
+    subscribers: int,
+    duration: float,
+    think_time: float,
+    connections: int,
+    stall_after: float,
+    seed: int,
+    encoding: str,
+) -> WorkerResult:
+    await _wait_until_ready(base_url, timeout=60)
+    stop = asyncio.Event()
+    subscriber_stats = [SubscriberStats() for _ in range(subscribers)]
+    ws_url = base_url.replace("http", "ws", 1) + "/ws/ticks"
+    subscriber_tasks = [
+        asyncio.create_task(_subscriber(ws_url, encoding, stats, stop)) for stats in subscriber_stats
+    ]
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        symbols = (await client.get("/api/v1/markets/tickers")).json()
+        latencies: List[float] = []
+        failures: List[int] = []
+        started = time.perf_counter()
+        trader_tasks = [
+            asyncio.create_task(
+                _trader(client, symbols, random.Random(seed + index), think_time, latencies, failures, stop, index)
+            )
+            for index in trader_ids
+        ]
+        await asyncio.sleep(duration)
+        stop.set()
+        stopped_at = time.time()
+        elapsed = time.perf_counter() - started
+        await asyncio.gather(*trader_tasks, return_exceptions=True)
+    await asyncio.gather(*subscriber_tasks, return_exceptions=True)
+
+    return WorkerResult(
+        elapsed=elapsed,
+        latencies=latencies,
+        failures=len(failures),
+        lags=[stats.lags_ms for stats in subscriber_stats],
+        ticks=sum(stats.ticks for stats in subscriber_stats),
+        tick_bytes=sum(stats.tick_bytes for stats in subscriber_stats),
+        # A subscriber that saw nothing for several tick intervals has most likely been dropped.
+        stalled=sum(
+            1 for stats in subscriber_stats if not stats.disconnected and stopped_at - stats.last_message > stall_after
+        ),
+        disconnected=sum(1 for stats in subscriber_stats if stats.disconnected),
+    )
+
+
+def _worker_entry(kwargs: Dict[str, Any]) -> WorkerResult:
+    return asyncio.run(_run_worker(**kwargs))
+
+
+def _aggregate(results: List[WorkerResult], traders: int, subscribers: int, encoding: str) -> LoadReport:
+    latencies = [latency for result in results for latency in result.latencies]
+    failures = sum(result.failures for result in results)
+    per_client = [lags for result in results for lags in result.lags]
+    elapsed = max((result.elapsed for result in results), default=0.0)
+    ticks = sum(result.ticks for result in results)
+    return LoadReport(
+        traders=traders,
+        subscribers=subscribers,
+        duration=round(elapsed, 3),
+        orders_sent=len(latencies) + failures,
+        orders_ok=len(latencies),
+        orders_failed=failures,
+        orders_per_sec=round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        order_latency_ms=_percentiles(latencies),
+        tick_lag_ms=_percentiles([lag for lags in per_client for lag in lags]),
+        client_mean_lag_ms=_percentiles([statistics.fmean(lags) for lags in per_client if lags]),
+        encoding=encoding,
+        tick_frame_bytes=round(sum(result.tick_bytes for result in results) / ticks, 1) if ticks else 0.0,
+        stalled_subscribers=sum(result.stalled for result in results),
+        disconnected_subscribers=sum(result.disconnected for result in results),
+        server_dropped_subscribers=None,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="End-to-end load test against the stockmarket app with local fakes.")
+    parser.add_argument("--dataset", type=Path, default=DEFAULT_DATASET)
+    parser.add_argument("--port", type=int, default=8199)
+    parser.add_argument("--traders", type=int, default=1_000)
+    parser.add_argument("--subscribers", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--think-time", type=float, default=1.0, help="Mean seconds between orders per trader")
+    parser.add_argument("--connections", type=int, default=200, help="HTTP connection pool size for traders")
+    parser.add_argument("--tick-interval", type=float, default=1.0)
+    parser.add_argument("--storage-latency", type=float, default=0.0, help="Seconds added to each storage call")
+    parser.add_argument("--analytics-latency", type=float, default=0.0, help="Seconds added to each analytics call")
+    parser.add_argument("--risk-latency", type=float, default=0.0, help="Seconds added to each middleware call")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Client processes generating load")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--encoding", choices=("json", "msgpack"), default="json", help="Tick stream frame encoding")
+    parser.add_argument("--no-deflate", action="store_true", help="Disable permessage-deflate on the server")
+    parser.add_argument("--json", type=Path, help="Write the report as JSON")
+    args = parser.parse_args(argv)
+
+    options = ServerOptions(
+        dataset=str(args.dataset.resolve()),
+        port=args.port,
+        tick_interval=args.tick_interval,
+        storage_latency=args.storage_latency,
+        analytics_latency=args.analytics_latency,
+        risk_latency=args.risk_latency,
+        deflate=not args.no_deflate,
+    )
+    context = multiprocessing.get_context("spawn")
+    dropped = context.Value("q", -1)
+    server = context.Process(target=_serve, args=(options, dropped), daemon=True)
+    server.start()
+    workers = max(1, args.workers)
+    jobs = [
+        {
+            "base_url": f"http://127.0.0.1:{args.port}",
+            "trader_ids": list(range(worker, args.traders, workers)),
+            "subscribers": args.subscribers // workers + (1 if worker < args.subscribers % workers else 0),
+            "duration": args.duration,
+            "think_time": args.think_time,
+            "connections": max(1, args.connections // workers),
+            "stall_after": max(5.0, args.tick_interval * 5),
+            "seed": args.seed,
+            "encoding": args.encoding,
+        }
+        for worker in range(workers)
+    ]
+    try:
+        # One client process cannot drive thousands of sockets without becoming the bottleneck.
+        with context.Pool(workers) as pool:
+            report = _aggregate(pool.map(_worker_entry, jobs), args.traders, args.subscribers, args.encoding)
+    finally:
+        server.terminate()
+        server.join(timeout=30)
+    report.server_dropped_subscribers = dropped.value if dropped.value >= 0 else None
+
+    payload = asdict(report)
+    print(json.dumps(payload, indent=2))
+    if args.json:
+        args.json.write_text(json.dumps(payload, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
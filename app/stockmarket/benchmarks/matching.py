@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import math
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.auctions import AuctionSchedule
+from src.clock import VirtualClock
+from src.matching import MatchingService
+from src.pricing import PricingService, TickerState
+from src.schemas import MarketRegime, OrderRequest
+
+from .fakes import InMemoryAnalytics, InMemoryRiskEngine, InMemoryStorage
+
+# (request, timed) pairs; untimed requests keep the book in shape between measured ones.
+Operation = Tuple[OrderRequest, bool]
+
+
+@dataclass
+class BenchmarkResult:
+    scenario: str
+    operations: int
+    seconds: float
+    ops_per_sec: float
+    p50_us: float
+    p99_us: float
+    p999_us: float
+    # Net allocator blocks still alive after the run, not the number of allocations made.
+    retained_blocks_per_op: float
+    traced_bytes_per_op: Optional[float] = None
+
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    symbols: int
+    run: Callable[["Harness", random.Random, int], Awaitable[List[int]]]
+
+
+class Harness:
+    """Wires pricing and matching to in-memory stand-ins for a single scenario run."""
+
+    def __init__(self, symbols: int, seed: int) -> None:
+        now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        tickers = {
+            f"S{index:05d}": TickerState(
+                symbol=f"S{index:05d}",
+                name=f"Synthetic {index}",
+                sector=f"Sector {index % 11}",
+                base_price=100.0,
+                volatility=0.08,
+                price=100.0,
+                open_price=100.0,
+                high_price=100.0,
+                low_price=100.0,
+                volume=0,
+                last_update=now,
+            )
+            for index in range(symbols)
+        }
+        regimes = [
+            MarketRegime(
+                name="Calm",
+                description="Benchmark regime",
+                drift=0.0,
+                volatility_multiplier=1.0,
+                started_at=now,
+            )
+        ]
+        self.pricing = PricingService(tickers, regimes, seed=seed)
+        self.storage = InMemoryStorage()
+        self.risk = InMemoryRiskEngine()
+        self.analytics = InMemoryAnalytics()
+        self.matching = MatchingService(
+            self.pricing, self.storage, self.risk, self.analytics, seed=seed
+        )
+        self.symbols = list(tickers)
+
+    async def submit(self, operations: List[Operation]) -> List[int]:
+        latencies: List[int] = []
+        place_order = self.matching.place_order
+        clock = time.perf_counter_ns
+        for request, timed in operations:
+            if timed:
+                started = clock()
+                await place_order(request)
+                latencies.append(clock() - started)
+            else:
+                await place_order(request)
+        return latencies
+
+
+def _order(user: str, symbol: str, side: str, quantity: int, price: Optional[float] = None) -> OrderRequest:
+    return OrderRequest(
+        user_id=user,
+        symbol=symbol,
+        side=side,
+        order_type="market" if price is None else "limit",
+        quantity=quantity,
+        price=price,
+    )
+
+
+def _user(rng: random.Random) -> str:
+    return f"trader-{rng.randrange(1000)}"
+
+
+async def _seed_depth(harness: Harness, rng: random.Random, symbol: str, levels: int) -> None:
+    operations: List[Operation] = []
+    for level in range(levels):
+        operations.append((_order(_user(rng), symbol, "BUY", rng.randint(1, 50), round(99.99 - level * 0.01, 2)), False))
+        operations.append((_order(_user(rng), symbol, "SELL", rng.randint(1, 50), round(100.01 + level * 0.01, 2)), False))
+    await harness.submit(operations)
+
+
+async def _deep_book(harness: Harness, rng: random.Random, count: int) -> List[int]:
+    symbol = harness.symbols[0]
+    await _seed_depth(harness, rng, symbol, 5_000)
+    operations: List[Operation] = []
+    for _ in range(count):
+        side = rng.choice(("BUY", "SELL"))
+        if rng.random() < 0.5:
+            # Passive order that joins the book somewhere inside the existing depth.
+            offset = rng.randint(1, 5_000) * 0.01
+            price = 99.99 - offset if side == "BUY" else 100.01 + offset
+        else:
+            # Aggressive order that takes out the top level.
+            price = 150.0 if side == "BUY" else 50.0
+        operations.append((_order(_user(rng), symbol, side, rng.randint(1, 10), round(price, 2)), True))
+    return await harness.submit(operations)
+
+
+async def _sweeping_market(harness: Harness, rng: random.Random, count: int) -> List[int]:
+    symbol = harness.symbols[0]
+    operations: List[Operation] = []
+    for _ in range(count):
+        for level in range(20):
+            operations.append((_order(_user(rng), symbol, "SELL", 5, round(100.0 + level * 0.05, 2)), False))
+        operations.append((_order(_user(rng), symbol, "BUY", 100), True))
+    return await harness.submit(operations)
+
+
+async def _small_crossing_limits(harness: Harness, rng: random.Random, count: int) -> List[int]:
+    operations: List[Operation] = []
+    for index in range(count):
+        symbol = harness.symbols[index % len(harness.symbols)]
+        if index % 2 == 0:
+            operations.append((_order(_user(rng), symbol, "SELL", 1, 100.0), True))
+        else:
+            operations.append((_order(_user(rng), symbol, "BUY", 1, 100.0), True))
+    return await harness.submit(operations)
+
+
+async def _cancel_heavy(harness: Harness, rng: random.Random, count: int) -> List[int]:
+    symbol = harness.symbols[0]
+    await _seed_depth(harness, rng, symbol, 1_000)
+    latencies: List[int] = []
+    clock = time.perf_counter_ns
+    for _ in range(count):
+        side = rng.choice(("BUY", "SELL"))
+        offset = rng.randint(1, 1_000) * 0.01
+        price = 99.99 - offset if side == "BUY" else 100.01 + offset
+        request = _order(_user(rng), symbol, side, rng.randint(1, 10), round(price, 2))
+        started = clock()
+        response = await harness.matching.place_order(request)
+        await harness.matching.cancel_order(response.order.order_id)
+        latencies.append(clock() - started)
+    return latencies
+
+
+def _opening_burst(rng: random.Random, symbol: str, count: int) -> List[Operation]:
+    # Overlapping buy and sell limits, as they pile up before the open.
+    operations: List[Operation] = []
+    for index in range(count):
+        side = "SELL" if index % 2 == 0 else "BUY"
+        price = 100.0 + rng.uniform(-2.0, 2.0) + (0.5 if side == "BUY" else -0.5)
+        operations.append((_order(_user(rng), symbol, side, rng.randint(1, 20), round(price, 2)), True))
+    return operations
+
+
+async def _opening_burst_continuous(harness: Harness, rng: random.Random, count: int) -> List[int]:
+    return await harness.submit(_opening_burst(rng, harness.symbols[0], count))
+
+
+async def _opening_auction(harness: Harness, rng: random.Random, count: int) -> List[int]:
+    clock = VirtualClock(datetime(2024, 1, 1, tzinfo=timezone.utc))
+    harness.matching = MatchingService(
+        harness.pricing,
+        harness.storage,
+        harness.risk,
+        harness.analytics,
+        clock=clock,
+        seed=1,
+        auctions=AuctionSchedule(opening=60),
+    )
+    harness.matching.open_auction()
+    latencies = await harness.submit(_opening_burst(rng, harness.symbols[0], count))
+    await clock.advance(60)
+    started = time.perf_counter_ns()
+    await harness.matching.uncross_auction()
+    # The uncross is spread over the orders it cleared so results compare with continuous matching.
+    share = (time.perf_counter_ns() - started) // max(1, len(latencies))
+    return [latency + share for latency in latencies]
+
+
+async def _large_universe_orders(harness: Harness, rng: random.Random, count: int) -> List[int]:
+    operations: List[Operation] = []
+    for _ in range(count):
+        symbol = rng.choice(harness.symbols)
+        side = rng.choice(("BUY", "SELL"))
+        price = round(100.0 + rng.uniform(-0.5, 0.5), 2)
+        operations.append((_order(_user(rng), symbol, side, rng.randint(1, 20), price), True))
+    return await harness.submit(operations)
+
+
+async def _large_universe_ticks(harness: Harness, rng: random.Random, count: int) -> List[int]:
+    latencies: List[int] = []
+    tick = harness.pricing.tick
+    clock = time.perf_counter_ns
+    for _ in range(max(10, count // 1_000)):
+        started = clock()
+        tick()
+        latencies.append(clock() - started)
+    return latencies
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    scenario.name: scenario
+    for scenario in (
+        Scenario("deep_book", "Passive and top-of-book orders against 10k resting orders", 1, _deep_book),
+        Scenario("sweeping_market", "Market orders sweeping 20 resting levels each", 1, _sweeping_market),
+        Scenario("small_crossing_limits", "Unit-size limits that cross immediately across 10 symbols", 10, _small_crossing_limits),
+        Scenario("opening_burst_continuous", "Overlapping pre-open limits matched continuously", 1, _opening_burst_continuous),
+        Scenario("opening_auction", "The same pre-open limits queued in a call and cleared in one uncross", 1, _opening_auction),
+        Scenario("cancel_heavy", "Place-then-cancel flow against a 2k order book", 1, _cancel_heavy),
+        Scenario("large_universe_orders", "Near-touch limits spread across 10k symbols", 10_000, _large_universe_orders),
+        Scenario("large_universe_ticks", "PricingService.tick over 10k symbols (one op per tick)", 10_000, _large_universe_ticks),
+    )
+}
+
+
+def _percentile(sorted_values: List[int], quantile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(quantile * len(sorted_values)) - 1))
+    return sorted_values[index] / 1_000
+
+
+async def run_scenario(scenario: Scenario, *, count: int, seed: int, trace_alloc: bool) -> BenchmarkResult:
+    harness = Harness(scenario.symbols, seed)
+    rng = random.Random(seed)
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    started = time.perf_counter()
+    latencies = await scenario.run(harness, rng, count)
+    elapsed = time.perf_counter() - started
+    blocks_after = sys.getallocatedblocks()
+    latencies.sort()
+    operations = len(latencies)
+    timed_seconds = sum(latencies) / 1_000_000_000
+    traced = None
+    if trace_alloc:
+        # Allocation tracing distorts timings, so it runs as a separate pass.
+        harness = Harness(scenario.symbols, seed)
+        tracemalloc.start()
+        await scenario.run(harness, random.Random(seed), count)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        traced = peak / max(1, operations)
+    return BenchmarkResult(
+        scenario=scenario.name,
+        operations=operations,
+        seconds=round(elapsed, 4),
+        ops_per_sec=round(operations / timed_seconds, 1) if timed_seconds else 0.0,
+        p50_us=_percentile(latencies, 0.50),
+        p99_us=_percentile(latencies, 0.99),
+        p999_us=_percentile(latencies, 0.999),
+        retained_blocks_per_op=round((blocks_after - blocks_before) / max(1, operations), 2),
+        traced_bytes_per_op=round(traced, 1) if traced is not None else None,
+    )
+
+
+def compare_to_baseline(results: List[BenchmarkResult], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    regressions: List[str] = []
+    for result in results:
+        reference = baseline.get(result.scenario)
+        if not reference:
+            continue
+        if result.ops_per_sec < reference["ops_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{result.scenario}: {result.ops_per_sec:.0f} ops/s vs baseline {reference['ops_per_sec']:.0f}"
+            )
+        if result.p99_us > reference["p99_us"] * (1 + tolerance):
+            regressions.append(
+                f"{result.scenario}: p99 {result.p99_us:.1f}us vs baseline {reference['p99_us']:.1f}us"
+            )
+    return regressions
+
+
+def _print_table(results: List[BenchmarkResult]) -> None:
+    header = f"{'scenario':<24}{'ops':>8}{'ops/s':>12}{'p50 us':>10}{'p99 us':>10}{'p999 us':>10}{'retained/op':>13}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        print(
+            f"{result.scenario:<24}{result.operations:>8}{result.ops_per_sec:>12.0f}"
+            f"{result.p50_us:>10.1f}{result.p99_us:>10.1f}{result.p999_us:>10.1f}{result.retained_blocks_per_op:>13.2f}"
+            + (f"  peak traced {result.traced_bytes_per_op:.0f} B/op" if result.traced_bytes_per_op is not None else "")
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks for MatchingService and PricingService.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Run only these scenarios")
+    parser.add_argument("--orders", type=int, default=20_000, help="Measured operations per scenario")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--trace-alloc", action="store_true", help="Add a tracemalloc pass for bytes per op")
+    parser.add_argument("--json", type=Path, help="Write results as JSON (usable as a future baseline)")
+    parser.add_argument("--baseline", type=Path, help="Fail when results regress against this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression ratio (default 0.2)")
+    args = parser.parse_args(argv)
+
+    selected = [SCENARIOS[name] for name in (args.scenario or SCENARIOS)]
+    results = [
+        asyncio.run(run_scenario(scenario, count=args.orders, seed=args.seed, trace_alloc=args.trace_alloc))
+        for scenario in selected
+    ]
+    _print_table(results)
+    if args.json:
+        args.json.write_text(json.dumps({result.scenario: asdict(result) for result in results}, indent=2))
+    if args.baseline:
+        regressions = compare_to_baseline(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
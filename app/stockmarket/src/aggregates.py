@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from .pricing import TickerState
+from .records import CompositeRecord, SectorRecord
+
+
+class _Group:
+    """Running totals for one sector, region, or the whole market."""
+
+    __slots__ = ("name", "members", "market_cap", "open_cap", "volume", "advancers", "decliners")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.members = 0
+        # Millions at current and opening prices; their ratio is the cap-weighted return.
+        self.market_cap = 0.0
+        self.open_cap = 0.0
+        self.volume = 0
+        self.advancers = 0
+        self.decliners = 0
+
+    def change(self) -> float:
+        return self.market_cap / self.open_cap - 1.0 if self.open_cap else 0.0
+
+
+class _Member:
+    __slots__ = ("state", "shares", "groups", "price", "volume", "direction")
+
+    def __init__(self, state: TickerState, groups: Tuple[_Group, ...]) -> None:
+        self.state = state
+        # Market caps are quoted at the base price; the implied share count carries them forward.
+        self.shares = (state.market_cap or 1.0) / state.base_price
+        self.groups = groups
+        self.price = state.price
+        self.volume = state.volume
+        self.direction = _direction(state)
+
+
+class MarketAggregates:
+    """Sector and region totals plus a cap-weighted composite index.
+
+    Each symbol remembers the price and volume it last contributed, so an update
+    adds only the difference to its sector, region, and the composite instead of
+    re-summing every member; a symbol that did not move since the previous
+    update costs two comparisons. The composite starts at ``base_level`` against
+    opening prices.
+    """
+
+    def __init__(self, states: Iterable[TickerState], *, base_level: float = 1000.0) -> None:
+        self._base_level = base_level
+        self._composite = _Group("COMPOSITE")
+        self._sectors: Dict[str, _Group] = {}
+        self._regions: Dict[str, _Group] = {}
+        self._members: Dict[str, _Member] = {}
+        for state in states:
+            self._join(state)
+        self._sectors = dict(sorted(self._sectors.items()))
+        self._regions = dict(sorted(self._regions.items()))
+
+    def add(self, state: TickerState) -> None:
+        """Count a newly listed symbol, or re-file one whose sector, region, or cap changed."""
+
+        self.remove(state.symbol)
+        sectors, regions = len(self._sectors), len(self._regions)
+        self._join(state)
+        if len(self._sectors) != sectors:
+            self._sectors = dict(sorted(self._sectors.items()))
+        if len(self._regions) != regions:
+            self._regions = dict(sorted(self._regions.items()))
+
+    def remove(self, symbol: str) -> None:
+        member = self._members.pop(symbol, None)
+        if member is None:
+            return
+        state = member.state
+        for group in member.groups:
+            group.members -= 1
+            group.market_cap -= member.shares * member.price
+            group.open_cap -= member.shares * state.open_price
+            group.volume -= member.volume
+            if member.direction > 0:
+                group.advancers -= 1
+            elif member.direction < 0:
+                group.decliners -= 1
+        _, sector, region = member.groups
+        if not sector.members:
+            del self._sectors[sector.name]
+        if not region.members:
+            del self._regions[region.name]
+
+    def _join(self, state: TickerState) -> None:
+        sector = self._sectors.get(state.sector)
+        if sector is None:
+            sector = self._sectors[state.sector] = _Group(state.sector)
+        region = self._regions.get(state.region)
+        if region is None:
+            region = self._regions[state.region] = _Group(state.region)
+        member = _Member(state, (self._composite, sector, region))
+        for group in member.groups:
+            group.members += 1
+            group.market_cap += member.shares * state.price
+            group.open_cap += member.shares * state.open_price
+            group.volume += state.volume
+            if member.direction > 0:
+                group.advancers += 1
+            elif member.direction < 0:
+                group.decliners += 1
+        self._members[state.symbol] = member
+
+    def update(self) -> int:
+        """Fold every price and volume change since the last update into the totals."""
+
+        moved = 0
+        for member in self._members.values():
+            state = member.state
+            price = state.price
+            volume = state.volume
+            if price == member.price and volume == member.volume:
+                continue
+            moved += 1
+            cap_delta = member.shares * (price - member.price)
+            volume_delta = volume - member.volume
+            direction = _direction(state)
+            previous = member.direction
+            for group in member.groups:
+                group.market_cap += cap_delta
+                group.volume += volume_delta
+                if direction != previous:
+                    if previous > 0:
+                        group.advancers -= 1
+                    elif previous < 0:
+                        group.decliners -= 1
+                    if direction > 0:
+                        group.advancers += 1
+                    elif direction < 0:
+                        group.decliners += 1
+            member.price = price
+            member.volume = volume
+            member.direction = direction
+        return moved
+
+    def composite(self, updated_at: datetime) -> CompositeRecord:
+        group = self._composite
+        return CompositeRecord(
+            level=round(self._base_level * (1.0 + group.change()), 2),
+            change=round(group.change(), 4),
+            market_cap=round(group.market_cap, 2),
+            volume=group.volume,
+            advancers=group.advancers,
+            decliners=group.decliners,
+            members=group.members,
+            updated_at=updated_at,
+        )
+
+    def sectors(self) -> List[SectorRecord]:
+        return [_record(group) for group in self._sectors.values()]
+
+    def regions(self) -> List[SectorRecord]:
+        return [_record(group) for group in self._regions.values()]
+
+
+def _direction(state: TickerState) -> int:
+    return (state.price > state.open_price) - (state.price < state.open_price)
+
+
+def _record(group: _Group) -> SectorRecord:
+    return SectorRecord(
+        name=group.name,
+        change=round(group.change(), 4),
+        market_cap=round(group.market_cap, 2),
+        volume=group.volume,
+        advancers=group.advancers,
+        decliners=group.decliners,
+        members=group.members,
+    )
+
+
+__all__ = ["MarketAggregates"]
@@ -6,7 +6,9 @@ from typing import Optional, Sequence
 
 import clickhouse_connect
 
-from .schemas import MarketRegime, PortfolioResponse, TickerSnapshot
+from . import metrics
+from .records import PortfolioRecord, TickRecord
+from .schemas import MarketRegime
 
 
 class ClickHouseAnalyticsPipeline:
@@ -44,6 +46,7 @@ class ClickHouseAnalyticsPipeline:
             )
             await asyncio.to_thread(self._ensure_tables)
         except Exception:
+            metrics.ANALYTICS_ERRORS.inc()
             self._client = None
 
     async def close(self) -> None:
@@ -51,7 +54,7 @@ class ClickHouseAnalyticsPipeline:
             await asyncio.to_thread(self._client.close)
             self._client = None
 
-    async def publish_ticks(self, ticks: Sequence[TickerSnapshot], regime: MarketRegime) -> None:
+    async def publish_ticks(self, ticks: Sequence[TickRecord], regime: MarketRegime) -> None:
         if not self._client or not ticks:
             return
         rows = [
@@ -68,43 +71,47 @@ class ClickHouseAnalyticsPipeline:
             for tick in ticks
         ]
         try:
-            await asyncio.to_thread(
-                self._client.insert,
-                "market_ticks",
-                rows,
-                column_names=[
-                    "symbol",
-                    "price",
-                    "open_price",
-                    "high_price",
-                    "low_price",
-                    "volume",
-                    "regime",
-                    "recorded_at",
-                ],
-            )
+            with metrics.datastore_timer("clickhouse", "publish_ticks"):
+                await asyncio.to_thread(
+                    self._client.insert,
+                    "market_ticks",
+                    rows,
+                    column_names=[
+                        "symbol",
+                        "price",
+                        "open_price",
+                        "high_price",
+                        "low_price",
+                        "volume",
+                        "regime",
+                        "recorded_at",
+                    ],
+                )
         except Exception:
+            metrics.ANALYTICS_ERRORS.inc()
             return
 
-    async def publish_portfolio_snapshot(self, snapshot: PortfolioResponse) -> None:
+    async def publish_portfolio_snapshot(self, snapshot: PortfolioRecord) -> None:
         if not self._client:
             return
-        holdings_json = json.dumps(snapshot.model_dump(mode="json")["holdings"])
+        holdings_json = json.dumps(snapshot.as_json()["holdings"])
         try:
-            await asyncio.to_thread(
-                self._client.insert,
-                "portfolio_snapshots",
-                [
-                    (
-                        snapshot.user_id,
-                        snapshot.cash,
-                        holdings_json,
-                        snapshot.last_updated,
-                    )
-                ],
-                column_names=["user_id", "cash", "holdings", "last_updated"],
-            )
+            with metrics.datastore_timer("clickhouse", "publish_portfolio_snapshot"):
+                await asyncio.to_thread(
+                    self._client.insert,
+                    "portfolio_snapshots",
+                    [
+                        (
+                            snapshot.user_id,
+                            snapshot.cash,
+                            holdings_json,
+                            snapshot.last_updated,
+                        )
+                    ],
+                    column_names=["user_id", "cash", "holdings", "last_updated"],
+                )
         except Exception:
+            metrics.ANALYTICS_ERRORS.inc()
             return
 
     def _ensure_tables(self) -> None:
@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import asyncio
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .clock import Clock, SystemClock
+from .records import FillRecord, TickRecord
+
+# File header: magic and format version, padded so every column starts 8-byte aligned.
+_HEADER = struct.Struct("<8sI4x")
+# Block header: first and last timestamp (microseconds since the epoch) and row count.
+_BLOCK = struct.Struct("<qqI4x")
+_MAGIC = b"VBSERIES"
+_VERSION = 1
+# Column type codes: timestamps, prices, then volumes for ticks or quantities for trades.
+_COLUMNS = ("q", "d", "q")
+_WIDTH = 8
+
+KINDS = ("ticks", "trades")
+
+
+@dataclass(slots=True)
+class SeriesSlice:
+    """Rows of one block within the requested range, as views into the mapped file.
+
+    ``timestamps`` are microseconds since the epoch; ``values`` hold the
+    cumulative day volume for ticks and the traded quantity for trades. The
+    views keep the mapping alive until they are released.
+    """
+
+    symbol: str
+    timestamps: memoryview
+    prices: memoryview
+    values: memoryview
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def rows(self) -> Iterator[Tuple[datetime, float, int]]:
+        for micros, price, value in zip(self.timestamps, self.prices, self.values):
+            yield _datetime(micros), price, value
+
+
+class _Buffer:
+    __slots__ = ("columns",)
+
+    def __init__(self) -> None:
+        self.columns = tuple(array(code) for code in _COLUMNS)
+
+    def append(self, micros: int, price: float, value: int) -> None:
+        timestamps, prices, values = self.columns
+        timestamps.append(micros)
+        prices.append(price)
+        values.append(value)
+
+
+class TickArchive:
+    """Append-only columnar segment files of every symbol's ticks and trades.
+
+    Rows are buffered per series and written as blocks: a small header with the
+    block's time range, then the timestamp, price, and volume columns as packed
+    little-endian 8-byte arrays. Files live under ``root/<UTC date>/<kind>/<symbol>.seg``,
+    so a new day starts new segments and old days can be removed as directories.
+    Buffers are written out once ``flush_rows`` rows are waiting or
+    ``flush_interval`` seconds have passed, in a worker thread so disk latency
+    never reaches the event loop.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        clock: Optional[Clock] = None,
+        flush_rows: int = 65_536,
+        flush_interval: float = 10.0,
+    ) -> None:
+        self._root = root
+        self._clock = clock or SystemClock()
+        self._flush_rows = flush_rows
+        self._flush_interval = flush_interval
+        # (day, kind, symbol) -> rows not yet on disk.
+        self._buffers: Dict[Tuple[str, str, str], _Buffer] = {}
+        self._pending = 0
+        self._last_flush = self._clock.monotonic()
+        self._lock = asyncio.Lock()
+        # Segments already checked for a torn final block since this process started.
+        self._checked: Set[Path] = set()
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def append_ticks(self, ticks: Sequence[TickRecord]) -> None:
+        for tick in ticks:
+            self._buffer(tick.last_update, "ticks", tick.symbol).append(
+                _micros(tick.last_update), tick.price, tick.volume
+            )
+        self._pending += len(ticks)
+
+    def append_trades(self, fills: Sequence[FillRecord]) -> None:
+        for fill in fills:
+            self._buffer(fill.executed_at, "trades", fill.symbol).append(
+                _micros(fill.executed_at), fill.price, fill.quantity
+            )
+        self._pending += len(fills)
+
+    def flush_due(self) -> bool:
+        if not self._pending:
+            return False
+        return (
+            self._pending >= self._flush_rows
+            or self._clock.monotonic() - self._last_flush >= self._flush_interval
+        )
+
+    async def flush(self) -> int:
+        """Write every buffered row to its segment and return how many were written."""
+
+        async with self._lock:
+            buffers, self._buffers = self._buffers, {}
+            written, self._pending = self._pending, 0
+            self._last_flush = self._clock.monotonic()
+            if buffers:
+                await asyncio.to_thread(self._write, buffers)
+            return written
+
+    def _buffer(self, moment: datetime, kind: str, symbol: str) -> _Buffer:
+        key = (_day(moment), kind, symbol)
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._buffers[key] = _Buffer()
+        return buffer
+
+    def _write(self, buffers: Dict[Tuple[str, str, str], _Buffer]) -> None:
+        for (day, kind, symbol), buffer in buffers.items():
+            path = _segment_path(self._root, day, kind, symbol)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if path not in self._checked:
+                _drop_torn_block(path)
+                self._checked.add(path)
+            timestamps = buffer.columns[0]
+            with path.open("ab") as handle:
+                if handle.tell() == 0:
+                    handle.write(_HEADER.pack(_MAGIC, _VERSION))
+                handle.write(_BLOCK.pack(timestamps[0], timestamps[-1], len(timestamps)))
+                for column in buffer.columns:
+                    handle.write(column.tobytes())
+
+
+class ArchiveReader:
+    """Range scans over :class:`TickArchive` segments without copying the columns.
+
+    Each scanned file is memory-mapped read-only and every block in range is
+    returned as ``memoryview`` casts over the mapping, so a replay walks the
+    page cache directly. Block headers carry their time range, which lets a
+    scan skip blocks without touching their columns. Segments still being
+    appended to are read up to the last complete block.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self._root = root
+
+    def days(self) -> List[str]:
+        if not self._root.is_dir():
+            return []
+        return sorted(entry.name for entry in self._root.iterdir() if entry.is_dir())
+
+    def symbols(self, day: str, kind: str = "ticks") -> List[str]:
+        directory = self._root / day / kind
+        if not directory.is_dir():
+            return []
+        return sorted(entry.stem for entry in directory.glob("*.seg"))
+
+    def scan(self, kind: str, symbol: str, start: datetime, end: datetime) -> Iterator[SeriesSlice]:
+        """Yield the rows of ``symbol`` recorded in ``[start, end)``, one slice per block."""
+
+        if kind not in KINDS:
+            raise ValueError(f"Unknown series kind {kind!r}")
+        low, high = _micros(start), _micros(end)
+        first_day, last_day = _day(start), _day(end)
+        for day in self.days():
+            if not first_day <= day <= last_day:
+                continue
+            path = _segment_path(self._root, day, kind, symbol)
+            if path.exists():
+                yield from _scan_segment(path, symbol, low, high)
+
+
+def _scan_segment(path: Path, symbol: str, low: int, high: int) -> Iterator[SeriesSlice]:
+    with path.open("rb") as handle:
+        size = os.fstat(handle.fileno()).st_size
+        if size <= _HEADER.size:
+            return
+        # The mapping outlives the file handle and stays open while any slice refers to it.
+        mapped = mmap.mmap(handle.fileno(), size, access=mmap.ACCESS_READ)
+    magic, version = _HEADER.unpack_from(mapped, 0)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f"{path} is not a version {_VERSION} archive segment")
+    view = memoryview(mapped)
+    offset = _HEADER.size
+    while offset + _BLOCK.size <= size:
+        first, last, rows = _BLOCK.unpack_from(mapped, offset)
+        body = offset + _BLOCK.size
+        end = body + rows * _WIDTH * len(_COLUMNS)
+        if end > size:
+            # A block still being written; everything before it is complete.
+            break
+        offset = end
+        if last < low:
+            continue
+        if first >= high:
+            break
+        columns = [
+            view[body + index * rows * _WIDTH : body + (index + 1) * rows * _WIDTH].cast(code)
+            for index, code in enumerate(_COLUMNS)
+        ]
+        timestamps = columns[0]
+        begin = bisect_left(timestamps, low) if first < low else 0
+        stop = bisect_left(timestamps, high) if last >= high else rows
+        if begin < stop:
+            yield SeriesSlice(symbol, *(column[begin:stop] for column in columns))
+
+
+def _drop_torn_block(path: Path) -> None:
+    """Cut off a block left half-written by a crash, so new blocks follow the last whole one."""
+
+    if not path.exists():
+        return
+    with path.open("r+b") as handle:
+        size = os.fstat(handle.fileno()).st_size
+        offset = _HEADER.size if size >= _HEADER.size else 0
+        while offset + _BLOCK.size <= size:
+            handle.seek(offset)
+            rows = _BLOCK.unpack(handle.read(_BLOCK.size))[2]
+            end = offset + _BLOCK.size + rows * _WIDTH * len(_COLUMNS)
+            if end > size:
+                break
+            offset = end
+        if offset < size:
+            handle.truncate(offset)
+
+
+def _segment_path(root: Path, day: str, kind: str, symbol: str) -> Path:
+    return root / day / kind / f"{symbol}.seg"
+
+
+def _day(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).date().isoformat()
+
+
+def _micros(moment: datetime) -> int:
+    return round(moment.timestamp() * 1_000_000)
+
+
+def _datetime(micros: int) -> datetime:
+    return datetime.fromtimestamp(micros / 1_000_000, tz=timezone.utc)
+
+
+__all__ = ["KINDS", "ArchiveReader", "SeriesSlice", "TickArchive"]
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+
+from .records import AuctionRecord, OrderRecord
+
+DAY_SECONDS = 86_400
+
+
+@dataclass(slots=True)
+class Uncross:
+    price: float
+    volume: int
+    # Buy quantity minus sell quantity willing to trade at the price.
+    imbalance: int
+
+
+def clearing_price(
+    bids: Dict[float, int],
+    asks: Dict[float, int],
+    market_buys: int,
+    market_sells: int,
+    reference: float,
+) -> Optional[Uncross]:
+    """Find the price that executes the most volume, then leaves the smallest imbalance.
+
+    ``bids`` and ``asks`` map limit prices to resting quantity; market orders
+    count towards every price. Demand at a price is every buy limited at or
+    above it and supply every sell limited at or below it, so both are running
+    sums over the sorted candidate prices and the whole book is cleared in one
+    pass over the two arrays. Remaining ties go to the price nearest
+    ``reference``.
+    """
+
+    prices = sorted(bids.keys() | asks.keys())
+    if not prices:
+        volume = min(market_buys, market_sells)
+        return Uncross(reference, volume, market_buys - market_sells) if volume else None
+    supply = list(accumulate((asks.get(price, 0) for price in prices), initial=market_sells))[1:]
+    demand = list(accumulate((bids.get(price, 0) for price in reversed(prices)), initial=market_buys))[:0:-1]
+    best: Optional[Uncross] = None
+    best_key: Tuple[int, int, float] = (0, 0, 0.0)
+    for price, bought, sold in zip(prices, demand, supply):
+        volume = bought if bought < sold else sold
+        if not volume:
+            continue
+        key = (volume, -abs(bought - sold), -abs(price - reference))
+        if best is None or key > best_key:
+            best = Uncross(price, volume, bought - sold)
+            best_key = key
+    return best
+
+
+@dataclass(slots=True)
+class AuctionCall:
+    """Orders collected for one call period, cleared together at ``uncross_at``."""
+
+    session: str
+    uncross_at: datetime
+    # Market orders have no price to rest at, so they wait here rather than in the book.
+    market_orders: Dict[str, List[OrderRecord]] = field(default_factory=dict)
+    # Symbols that received orders and those whose indicative uncross is stale, in
+    # arrival order so seeded runs publish them identically.
+    symbols: Dict[str, None] = field(default_factory=dict)
+    changed: Dict[str, None] = field(default_factory=dict)
+    indicative: Dict[str, AuctionRecord] = field(default_factory=dict)
+
+    def add(self, order: OrderRecord) -> None:
+        if order.order_type in ("market", "stop"):
+            self.market_orders.setdefault(order.symbol, []).append(order)
+        self.symbols[order.symbol] = None
+        self.changed[order.symbol] = None
+
+    def discard(self, order: OrderRecord) -> bool:
+        """Forget a queued market order; returns False for orders resting in the book."""
+
+        self.changed[order.symbol] = None
+        queued = self.market_orders.get(order.symbol)
+        if queued is None or order not in queued:
+            return False
+        queued.remove(order)
+        return True
+
+
+class AuctionSchedule:
+    """Daily opening and closing call periods around the UTC trading-day boundary.
+
+    The opening call covers the first ``opening`` seconds of the day and the
+    closing call the last ``closing`` seconds; either may be zero to skip it.
+    """
+
+    def __init__(self, *, opening: float = 0.0, closing: float = 0.0) -> None:
+        if opening < 0 or closing < 0:
+            raise ValueError("Auction call periods cannot be negative")
+        if opening + closing >= DAY_SECONDS:
+            raise ValueError("Auction call periods must leave time for continuous trading")
+        self.opening = opening
+        self.closing = closing
+
+    def call_at(self, moment: datetime) -> Optional[Tuple[str, datetime]]:
+        """The session and uncross time of the call period covering ``moment``, if any."""
+
+        day_start = moment.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        elapsed = (moment - day_start).total_seconds()
+        if elapsed < self.opening:
+            return "OPENING", day_start + timedelta(seconds=self.opening)
+        if self.closing and elapsed >= DAY_SECONDS - self.closing:
+            return "CLOSING", day_start + timedelta(days=1)
+        return None
+
+
+__all__ = ["AuctionCall", "AuctionSchedule", "Uncross", "clearing_price"]
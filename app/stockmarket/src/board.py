@@ -0,0 +1,402 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import math
+import os
+import struct
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from multiprocessing import resource_tracker, shared_memory
+from typing import IO, Any, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+
+from .pricing import TickerState
+from .records import CandleRecord, QuoteRecord
+from .snapshots import EncodedSnapshot
+
+# Header: magic, generation, seqlock counter, session start, symbol count, directory length.
+_HEADER = struct.Struct("<8sQQdII")
+_SEQ = struct.Struct("<Q")
+_SEQ_OFFSET = 16
+# Per-symbol slot: ticker fields and the current one-minute bar, then top of book.
+_TICKER = struct.Struct("<4dqd4dq")
+_QUOTE = struct.Struct("<4d")
+_SLOT_SIZE = _TICKER.size + _QUOTE.size
+_MAGIC = b"VBBOARD1"
+# A write section is a handful of struct packs; a counter that stays odd for this
+# long belongs to a leader that died mid-write.
+_READ_DEADLINE = 0.05
+
+
+def _align(value: int) -> int:
+    return (value + 7) & ~7
+
+
+class BoardUnavailable(RuntimeError):
+    """The leader stopped in the middle of a write and no new leader has replaced the board yet."""
+
+
+class PriceBoardWriter:
+    """Leader-side view of the shared price board.
+
+    Every write happens inside one global seqlock section: the counter is odd
+    while slots are being rewritten, so readers retry instead of observing a
+    half-written tick. The segment is sized once for the universe it was
+    opened with.
+    """
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._index: Dict[str, int] = {}
+        self._slots_offset = 0
+        self._seq = 0
+
+    def open(self, states: Iterable[TickerState], session_start: datetime) -> None:
+        states = list(states)
+        directory = orjson.dumps([[state.symbol, state.name, state.sector] for state in states])
+        self._slots_offset = _align(_HEADER.size + len(directory))
+        size = self._slots_offset + _SLOT_SIZE * len(states)
+        try:
+            self._shm = shared_memory.SharedMemory(self._name, create=True, size=size)
+        except FileExistsError:
+            # A previous leader crashed without unlinking; the lock guarantees nobody else owns it.
+            stale = shared_memory.SharedMemory(self._name)
+            stale.close()
+            stale.unlink()
+            self._shm = shared_memory.SharedMemory(self._name, create=True, size=size)
+        buf = self._shm.buf
+        generation = uuid.uuid4().int & ((1 << 63) - 1)
+        _HEADER.pack_into(
+            buf, 0, _MAGIC, generation, 0, session_start.timestamp(), len(states), len(directory)
+        )
+        buf[_HEADER.size : _HEADER.size + len(directory)] = directory
+        self._index = {state.symbol: position for position, state in enumerate(states)}
+        for position in range(len(states)):
+            _QUOTE.pack_into(buf, self._slot(position) + _TICKER.size, math.nan, 0.0, math.nan, 0.0)
+        self.write_tickers(states)
+
+    def close(self) -> None:
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def _slot(self, position: int) -> int:
+        return self._slots_offset + position * _SLOT_SIZE
+
+    def _begin(self) -> memoryview:
+        assert self._shm is not None
+        self._seq += 1
+        _SEQ.pack_into(self._shm.buf, _SEQ_OFFSET, self._seq)
+        return self._shm.buf
+
+    def _commit(self, buf: memoryview) -> None:
+        self._seq += 1
+        _SEQ.pack_into(buf, _SEQ_OFFSET, self._seq)
+
+    def _pack_ticker(self, buf: memoryview, state: TickerState) -> None:
+        _TICKER.pack_into(
+            buf,
+            self._slot(self._index[state.symbol]),
+            state.price,
+            state.open_price,
+            state.high_price,
+            state.low_price,
+            state.volume,
+            state.last_update.timestamp(),
+            state.bar_start,
+            state.bar_open,
+            state.bar_high,
+            state.bar_low,
+            state.bar_base_volume,
+        )
+
+    def write_tickers(self, states: Iterable[TickerState]) -> None:
+        buf = self._begin()
+        try:
+            for state in states:
+                self._pack_ticker(buf, state)
+        finally:
+            self._commit(buf)
+
+    def write_symbol(
+        self, state: TickerState, top_of_book: Tuple[Optional[float], int, Optional[float], int]
+    ) -> None:
+        bid, bid_size, ask, ask_size = top_of_book
+        buf = self._begin()
+        try:
+            self._pack_ticker(buf, state)
+            _QUOTE.pack_into(
+                buf,
+                self._slot(self._index[state.symbol]) + _TICKER.size,
+                math.nan if bid is None else bid,
+                bid_size,
+                math.nan if ask is None else ask,
+                ask_size,
+            )
+        finally:
+            self._commit(buf)
+
+
+class PriceBoardReader:
+    """Follower-side view that copies consistent slots out of the shared segment."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, name: str) -> None:
+        self._shm = shm
+        self.name = name
+        magic, generation, _, session_start, count, directory_len = _HEADER.unpack_from(shm.buf, 0)
+        if magic != _MAGIC:
+            raise RuntimeError("Shared memory segment is not a price board")
+        self.generation = generation
+        self.session_start = datetime.fromtimestamp(session_start, timezone.utc)
+        directory = orjson.loads(bytes(shm.buf[_HEADER.size : _HEADER.size + directory_len]))
+        self._directory: List[Tuple[str, str, str]] = [tuple(entry) for entry in directory]
+        self._index = {entry[0]: position for position, entry in enumerate(self._directory)}
+        self._slots_offset = _align(_HEADER.size + directory_len)
+        self._count = count
+        self._stalled_seq: Optional[int] = None
+
+    @classmethod
+    async def attach(cls, name: str, *, timeout: float = 60.0) -> "PriceBoardReader":
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            try:
+                shm = _attach_untracked(name)
+                if bytes(shm.buf[:8]) == _MAGIC:
+                    return cls(shm, name)
+                shm.close()
+            except FileNotFoundError:
+                pass
+            if loop.time() >= deadline:
+                raise RuntimeError(f"Price board {name} did not appear within {timeout}s")
+            await asyncio.sleep(0.1)
+
+    def close(self) -> None:
+        self._shm.close()
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._index
+
+    def _read(self, start: int, end: int) -> Tuple[int, bytes]:
+        buf = self._shm.buf
+        deadline: Optional[float] = None
+        while True:
+            before = _SEQ.unpack_from(buf, _SEQ_OFFSET)[0]
+            if not before & 1:
+                data = bytes(buf[start:end])
+                if _SEQ.unpack_from(buf, _SEQ_OFFSET)[0] == before:
+                    return before, data
+            elif before == self._stalled_seq:
+                # Already waited out this write once; fail fast until the board moves on.
+                raise BoardUnavailable(f"Price board {self.name} is waiting for a new leader")
+            now = time.monotonic()
+            if deadline is None:
+                deadline = now + _READ_DEADLINE
+            elif now >= deadline:
+                self._stalled_seq = before
+                raise BoardUnavailable(f"Price board {self.name} is waiting for a new leader")
+            os.sched_yield()
+
+    def _read_slot(self, symbol: str) -> bytes:
+        start = self._slots_offset + self._index[symbol] * _SLOT_SIZE
+        return self._read(start, start + _SLOT_SIZE)[1]
+
+    def read_all(self) -> Tuple[int, List[Dict[str, Any]]]:
+        seq, data = self._read(self._slots_offset, self._slots_offset + self._count * _SLOT_SIZE)
+        tickers = []
+        for position, (symbol, name, sector) in enumerate(self._directory):
+            price, open_price, high, low, volume, last_update, *_ = _TICKER.unpack_from(
+                data, position * _SLOT_SIZE
+            )
+            tickers.append(
+                {
+                    "symbol": symbol,
+                    "name": name,
+                    "sector": sector,
+                    "price": round(price, 2),
+                    "open_price": round(open_price, 2),
+                    "high_price": round(high, 2),
+                    "low_price": round(low, 2),
+                    "volume": volume,
+                    "last_update": datetime.fromtimestamp(last_update, timezone.utc).isoformat(),
+                }
+            )
+        return seq, tickers
+
+    def sequence(self) -> int:
+        return _SEQ.unpack_from(self._shm.buf, _SEQ_OFFSET)[0]
+
+    def quote(self, symbol: str) -> QuoteRecord:
+        data = self._read_slot(symbol)
+        price, *_, last_update = _TICKER.unpack_from(data, 0)[:6]
+        bid, bid_size, ask, ask_size = _QUOTE.unpack_from(data, _TICKER.size)
+        return QuoteRecord(
+            symbol=symbol,
+            price=round(price, 2),
+            bid=None if math.isnan(bid) else round(bid, 2),
+            bid_size=int(bid_size),
+            ask=None if math.isnan(ask) else round(ask, 2),
+            ask_size=int(ask_size),
+            last_update=datetime.fromtimestamp(last_update, timezone.utc),
+        )
+
+    def candles(self, symbol: str) -> List[CandleRecord]:
+        (
+            price,
+            open_price,
+            high,
+            low,
+            volume,
+            _,
+            bar_start,
+            bar_open,
+            bar_high,
+            bar_low,
+            bar_base_volume,
+        ) = _TICKER.unpack_from(self._read_slot(symbol), 0)
+        candles = [
+            CandleRecord(
+                symbol=symbol,
+                interval="session",
+                start=self.session_start,
+                open=round(open_price, 2),
+                high=round(high, 2),
+                low=round(low, 2),
+                close=round(price, 2),
+                volume=volume,
+            )
+        ]
+        if bar_start:
+            candles.append(
+                CandleRecord(
+                    symbol=symbol,
+                    interval="1m",
+                    start=datetime.fromtimestamp(bar_start, timezone.utc),
+                    open=round(bar_open, 2),
+                    high=round(bar_high, 2),
+                    low=round(bar_low, 2),
+                    close=round(price, 2),
+                    volume=volume - bar_base_volume,
+                )
+            )
+        return candles
+
+
+def _attach_untracked(name: str) -> shared_memory.SharedMemory:
+    # Python 3.11 registers every attached segment with the resource tracker, which
+    # unlinks it when the follower exits and pulls the board out from under the
+    # leader. Registration is skipped for followers (3.13 adds ``track=False``).
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name)
+    finally:
+        resource_tracker.register = register
+
+
+class BoardFeed:
+    """Read-only market feed for follower workers, backed by the shared price board."""
+
+    def __init__(self, reader: PriceBoardReader, *, recheck_interval: float = 1.0) -> None:
+        self._reader = reader
+        self._tickers: Optional[EncodedSnapshot] = None
+        self._recheck_interval = recheck_interval
+        self._checked_at = time.monotonic()
+
+    @property
+    def is_ready(self) -> bool:
+        return True
+
+    @property
+    def _current(self) -> PriceBoardReader:
+        now = time.monotonic()
+        if now - self._checked_at >= self._recheck_interval:
+            self._checked_at = now
+            self._reattach_if_replaced()
+        return self._reader
+
+    def _reattach_if_replaced(self) -> None:
+        # A replacement leader recreates the segment under the same name; the old
+        # mapping stays readable but frozen, so followers switch to the new one.
+        try:
+            shm = _attach_untracked(self._reader.name)
+        except FileNotFoundError:
+            return
+        magic, generation = _HEADER.unpack_from(shm.buf, 0)[:2]
+        if magic != _MAGIC or generation == self._reader.generation:
+            shm.close()
+            return
+        previous = self._reader
+        self._reader = PriceBoardReader(shm, previous.name)
+        self._tickers = None
+        previous.close()
+
+    def snapshot(self, channel: str) -> EncodedSnapshot:
+        if channel != "tickers":
+            raise KeyError(f"Snapshot channel {channel} is not served from the price board")
+        reader = self._current
+        cached = self._tickers
+        # Re-encode only when the leader has written since the last request.
+        if cached is not None and cached.version == reader.sequence():
+            return cached
+        try:
+            seq, tickers = reader.read_all()
+        except BoardUnavailable:
+            # Keep serving the last consistent copy until a new leader recreates the board.
+            if cached is None:
+                raise
+            return cached
+        snapshot = EncodedSnapshot(
+            channel="tickers",
+            version=seq,
+            body=orjson.dumps(tickers),
+            etag=f'"board-{reader.generation:x}-{seq}"',
+        )
+        self._tickers = snapshot
+        return snapshot
+
+    def quote(self, symbol: str) -> QuoteRecord:
+        reader = self._current
+        if symbol not in reader:
+            raise KeyError(symbol)
+        return reader.quote(symbol)
+
+    def candles(self, symbol: str) -> List[CandleRecord]:
+        reader = self._current
+        if symbol not in reader:
+            raise KeyError(symbol)
+        return reader.candles(symbol)
+
+    def close(self) -> None:
+        self._reader.close()
+
+
+def acquire_leadership(name: str) -> Optional[IO[bytes]]:
+    """Try to become the board leader; returns the held lock file, or None for followers.
+
+    The lock is released by the kernel when the leader exits, so a restarted
+    worker can take over.
+    """
+
+    handle = open(os.path.join(tempfile.gettempdir(), f"{name}.lock"), "wb")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        handle.close()
+        return None
+    return handle
+
+
+__all__ = [
+    "BoardFeed",
+    "BoardUnavailable",
+    "PriceBoardReader",
+    "PriceBoardWriter",
+    "acquire_leadership",
+]
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from . import metrics
+from .fanout import Fanout
+from .frames import BroadcastFrame, FrameEncoder
+from .replay import ReplayLog
+from .snapshots import EncodedSnapshot, SnapshotPublisher
+
+logger = logging.getLogger(__name__)
+
+# Broadcast event type -> stream suffix. Trades get their own stream, fanned out from order events.
+EVENT_STREAMS = {
+    "tick": "ticks",
+    "order": "orders",
+    "trade": "trades",
+    "news": "news",
+    "regime": "regimes",
+    "halt": "halts",
+    "auction": "auctions",
+    "leaderboard": "leaderboard",
+    "instruments": "instruments",
+}
+# Snapshots that change with every tick are streamed as well, so gateways never poll their keys.
+SNAPSHOT_STREAMS = ("heatmap",)
+# Trades are already embedded in order events, so gateways do not forward them to sockets.
+GATEWAY_STREAMS = (
+    "ticks",
+    "orders",
+    "news",
+    "regimes",
+    "halts",
+    "auctions",
+    "leaderboard",
+    "instruments",
+    *SNAPSHOT_STREAMS,
+)
+SNAPSHOT_CHANNELS = ("tickers", "regimes", "news", "halts", "auctions", "leaderboard", "heatmap")
+
+
+class MarketDataBus:
+    """Publishes engine events to Redis Streams and snapshot bodies to Redis keys.
+
+    Writes are queued and flushed in pipelined batches by a background task so a
+    slow Redis never blocks the tick loop or order intake; when the queue is full
+    the newest item is dropped and counted.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        *,
+        prefix: str = "stockmarket",
+        maxlen: int = 10_000,
+        queue_size: int = 10_000,
+        batch_size: int = 256,
+    ) -> None:
+        self._redis_url = redis_url
+        self._prefix = prefix
+        self._maxlen = maxlen
+        self._batch_size = batch_size
+        self._queue: asyncio.Queue[Tuple[str, str, bytes]] = asyncio.Queue(maxsize=queue_size)
+        self._redis: Optional[Redis] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def connect(self) -> None:
+        self._redis = Redis.from_url(self._redis_url)
+        self._task = asyncio.create_task(self._flush_loop(), name="stockmarket-bus-publisher")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    def publish_event(self, frame: BroadcastFrame) -> None:
+        payload = frame.payload
+        event_type = payload.get("type")
+        stream = EVENT_STREAMS.get(event_type)
+        if stream is None:
+            return
+        # The same JSON body local WebSocket subscribers are sent.
+        self._enqueue("xadd", f"{self._prefix}:{stream}", frame.json())
+        if event_type == "order":
+            trades_stream = f"{self._prefix}:{EVENT_STREAMS['trade']}"
+            for fill in payload["data"]["fills"]:
+                self._enqueue("xadd", trades_stream, orjson.dumps({"type": "trade", "data": fill}))
+
+    def publish_snapshot(self, snapshot: EncodedSnapshot) -> None:
+        self._enqueue("set", f"{self._prefix}:snapshot:{snapshot.channel}", snapshot.body)
+        if snapshot.channel in SNAPSHOT_STREAMS:
+            self._enqueue("xadd", f"{self._prefix}:{snapshot.channel}", snapshot.body)
+
+    def _enqueue(self, command: str, key: str, body: bytes) -> None:
+        try:
+            self._queue.put_nowait((command, key, body))
+        except asyncio.QueueFull:
+            metrics.BUS_DROPPED.inc()
+
+    async def _flush_loop(self) -> None:
+        assert self._redis is not None
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self._batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            pipe = self._redis.pipeline(transaction=False)
+            for command, key, body in batch:
+                if command == "xadd":
+                    pipe.xadd(key, {"data": body}, maxlen=self._maxlen, approximate=True)
+                else:
+                    pipe.set(key, body)
+            try:
+                with metrics.datastore_timer("redis", "bus_flush"):
+                    await pipe.execute()
+            except (RedisError, OSError):
+                metrics.BUS_ERRORS.inc()
+                metrics.BUS_DROPPED.inc(len(batch))
+
+
+class MarketDataGateway:
+    """Serves market data to WebSocket subscribers from Redis Streams instead of a local engine.
+
+    Gateways never run the simulation: they seed their snapshots from the keys the
+    engine's bus maintains, then tail the event streams and fan each event out to
+    their own subscribers. Ordering is preserved within a stream; events from
+    different streams read in the same batch are delivered stream by stream.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        *,
+        prefix: str = "stockmarket",
+        block_ms: int = 1_000,
+        replay_capacity: int = 1024,
+    ) -> None:
+        self._redis_url = redis_url
+        self._prefix = prefix
+        self._block_ms = block_ms
+        self._redis: Optional[Redis] = None
+        self._fanout = Fanout()
+        self._heatmap_fanout = Fanout("heatmap")
+        self._replay = ReplayLog(replay_capacity)
+        self._frames = FrameEncoder()
+        self._snapshots = SnapshotPublisher()
+        self._streams = {f"{prefix}:{name}": name for name in GATEWAY_STREAMS}
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+
+    async def start(self) -> None:
+        self._redis = Redis.from_url(self._redis_url)
+        self._task = asyncio.create_task(self._consume(), name="stockmarket-gateway-consumer")
+        self._task.add_done_callback(self._consumer_done)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            # A consumer that already died was reported by _consumer_done.
+            if not self._task.done():
+                self._task.remove_done_callback(self._consumer_done)
+                self._task.cancel()
+                try:
+                    await self._task
+                except asyncio.CancelledError:
+                    pass
+            self._task = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+        self._ready.clear()
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return self._fanout.subscriber_count
+
+    @property
+    def dropped_subscribers(self) -> int:
+        return self._fanout.dropped
+
+    @property
+    def replay(self) -> ReplayLog:
+        return self._replay
+
+    @property
+    def frames(self) -> FrameEncoder:
+        return self._frames
+
+    def register(self, queue: asyncio.Queue) -> None:
+        self._fanout.register(queue)
+
+    def unregister(self, queue: asyncio.Queue) -> None:
+        self._fanout.unregister(queue)
+
+    def register_heatmap(self, queue: asyncio.Queue) -> None:
+        self._heatmap_fanout.register(queue)
+
+    def unregister_heatmap(self, queue: asyncio.Queue) -> None:
+        self._heatmap_fanout.unregister(queue)
+
+    def snapshot(self, channel: str) -> EncodedSnapshot:
+        snapshot = self._snapshots.get(channel)
+        if snapshot is None:
+            raise KeyError(f"Unknown snapshot channel {channel}")
+        return snapshot
+
+    async def _consume(self) -> None:
+        positions: Optional[Dict[str, bytes]] = None
+        while True:
+            try:
+                if positions is None:
+                    positions = await self._bootstrap()
+                    self._ready.set()
+                batches = await self._redis.xread(positions, count=500, block=self._block_ms)
+                for stream, entries in batches or []:
+                    stream = stream.decode() if isinstance(stream, bytes) else stream
+                    for entry_id, fields in entries:
+                        positions[stream] = entry_id
+                        try:
+                            await self._dispatch(self._streams[stream], orjson.loads(fields[b"data"]))
+                        except (KeyError, TypeError, ValueError):
+                            # One malformed entry must not stop the replica; skip it and read on.
+                            metrics.GATEWAY_ERRORS.inc()
+                            logger.exception("Skipping malformed entry %s on %s", entry_id, stream)
+            except (RedisError, OSError):
+                metrics.BUS_ERRORS.inc()
+                await asyncio.sleep(1.0)
+
+    def _consumer_done(self, task: asyncio.Task) -> None:
+        # Anything that escapes _consume leaves the replica serving stale data; say so and go unready.
+        self._ready.clear()
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Gateway consumer stopped", exc_info=task.exception())
+
+    async def _bootstrap(self) -> Dict[str, bytes]:
+        # Capture stream positions before reading snapshots: replaying a few events twice is
+        # harmless, missing the ones published in between is not.
+        positions: Dict[str, bytes] = {}
+        for stream in self._streams:
+            latest = await self._redis.xrevrange(stream, count=1)
+            positions[stream] = latest[0][0] if latest else b"0-0"
+        for channel in SNAPSHOT_CHANNELS:
+            await self._refresh_snapshot(channel)
+        return positions
+
+    async def _refresh_snapshot(self, channel: str) -> EncodedSnapshot:
+        body = await self._redis.get(f"{self._prefix}:snapshot:{channel}")
+        return self._snapshots.publish(channel, orjson.loads(body) if body is not None else [])
+
+    async def _dispatch(self, stream: str, payload: Dict[str, Any]) -> None:
+        if stream in SNAPSHOT_STREAMS:
+            snapshot = self._snapshots.publish(stream, payload)
+            self._heatmap_fanout.publish(snapshot.body.decode())
+            return
+        if stream == "ticks":
+            self._snapshots.publish("tickers", payload["data"])
+        elif stream in ("news", "regimes", "halts", "auctions", "leaderboard"):
+            await self._refresh_snapshot(stream)
+        elif stream == "instruments":
+            # Listings and delistings reshape every per-symbol snapshot at once; the heatmap
+            # follows on its own stream.
+            for channel in ("tickers", "halts", "auctions"):
+                await self._refresh_snapshot(channel)
+        # Gateways number events themselves: streams are read in batches, not in engine order.
+        frame = self._frames.frame(payload)
+        self._replay.append(frame)
+        self._fanout.publish(frame)
+
+
+__all__ = ["MarketDataBus", "MarketDataGateway"]
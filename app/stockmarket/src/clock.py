@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Protocol, Tuple
+
+
+class Clock(Protocol):
+    def now(self) -> datetime: ...
+
+    def timestamp(self) -> float: ...
+
+    def monotonic(self) -> float: ...
+
+    async def sleep(self, seconds: float) -> None: ...
+
+
+class SystemClock:
+    """Wall-clock time backed by the running event loop."""
+
+    def now(self) -> datetime:
+        return datetime.now(timezone.utc)
+
+    def timestamp(self) -> float:
+        return self.now().timestamp()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock:
+    """Discrete-event clock that lets simulations run as fast as the CPU allows.
+
+    Tasks sleeping on the clock are parked in a deadline heap and only resume
+    when :meth:`advance` moves virtual time past their deadline. Waiters are
+    released strictly in (deadline, registration) order and each woken task is
+    given the chance to reach its next sleep before the following one is
+    released, so runs against in-memory sinks are fully reproducible.
+    """
+
+    def __init__(self, start: Optional[datetime] = None, *, settle_iterations: int = 64) -> None:
+        self._start = start or datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self._elapsed = 0.0
+        self._sequence = itertools.count()
+        self._waiters: List[Tuple[float, int, asyncio.Future]] = []
+        self._settle_iterations = settle_iterations
+
+    def now(self) -> datetime:
+        return self._start + timedelta(seconds=self._elapsed)
+
+    def timestamp(self) -> float:
+        return self._start.timestamp() + self._elapsed
+
+    def monotonic(self) -> float:
+        return self._elapsed
+
+    @property
+    def elapsed(self) -> float:
+        return self._elapsed
+
+    async def sleep(self, seconds: float) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (self._elapsed + max(0.0, seconds), next(self._sequence), future))
+        await future
+
+    async def advance(self, seconds: float) -> None:
+        target = self._elapsed + max(0.0, seconds)
+        # Let freshly started tasks reach their first sleep before time moves.
+        for _ in range(self._settle_iterations):
+            await asyncio.sleep(0)
+        while self._waiters and self._waiters[0][0] <= target:
+            deadline, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self._elapsed = deadline
+            expected = len(self._waiters) + 1
+            future.set_result(None)
+            await self._settle(expected)
+        self._elapsed = target
+
+    async def _settle(self, expected: int) -> None:
+        # Yield until the woken task has parked on the clock again (or gave up).
+        for _ in range(self._settle_iterations):
+            await asyncio.sleep(0)
+            if len(self._waiters) >= expected:
+                return
+
+
+__all__ = ["Clock", "SystemClock", "VirtualClock"]
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+Level = Tuple[float, int]
+
+
+def level_price(price: float) -> float:
+    # Levels aggregate at cent precision; market orders rest at unrounded prices.
+    return round(price, 2)
+
+
+class BookSide:
+    """Aggregated resting quantity per price with prices kept sorted ascending."""
+
+    __slots__ = ("_sizes", "_prices", "_descending")
+
+    def __init__(self, *, descending: bool) -> None:
+        self._sizes: Dict[float, int] = {}
+        self._prices: List[float] = []
+        self._descending = descending
+
+    def change(self, price: float, quantity: int) -> int:
+        """Apply a signed quantity change and return the level's new size."""
+
+        size = self._sizes.get(price, 0) + quantity
+        if size > 0:
+            if price not in self._sizes:
+                insort(self._prices, price)
+            self._sizes[price] = size
+            return size
+        if price in self._sizes:
+            del self._sizes[price]
+            del self._prices[bisect_left(self._prices, price)]
+        return 0
+
+    def best(self) -> Optional[Level]:
+        if not self._prices:
+            return None
+        price = self._prices[-1] if self._descending else self._prices[0]
+        return price, self._sizes[price]
+
+    def top(self, levels: int) -> List[Level]:
+        prices = self._prices[::-1][:levels] if self._descending else self._prices[:levels]
+        return [(price, self._sizes[price]) for price in prices]
+
+
+@dataclass(slots=True)
+class DepthUpdate:
+    symbol: str
+    sequence: int
+    bids: List[Level]
+    asks: List[Level]
+
+    def as_json(self) -> Dict[str, Any]:
+        return {
+            "type": "depth",
+            "symbol": self.symbol,
+            "sequence": self.sequence,
+            "bids": self.bids,
+            "asks": self.asks,
+        }
+
+
+class DepthBook:
+    """Level-2 view of one symbol's order book, maintained as orders rest and fill.
+
+    Level changes are collected until :meth:`flush`, which emits at most one
+    ``(price, new size)`` pair per touched level and advances the sequence, so a
+    client that applies every update in order after a snapshot stays in sync.
+    A size of zero removes the level.
+    """
+
+    __slots__ = ("symbol", "sequence", "_sides", "_pending")
+
+    def __init__(self, symbol: str) -> None:
+        self.symbol = symbol
+        self.sequence = 0
+        self._sides = {"BUY": BookSide(descending=True), "SELL": BookSide(descending=False)}
+        self._pending: Dict[Tuple[str, float], int] = {}
+
+    def change(self, side: str, price: float, quantity: int) -> None:
+        price = level_price(price)
+        self._pending[(side, price)] = self._sides[side].change(price, quantity)
+
+    def best(self, side: str) -> Optional[Level]:
+        return self._sides[side].best()
+
+    def snapshot(self, levels: int) -> Tuple[int, List[Level], List[Level]]:
+        return self.sequence, self._sides["BUY"].top(levels), self._sides["SELL"].top(levels)
+
+    def flush(self) -> Optional[DepthUpdate]:
+        if not self._pending:
+            return None
+        self.sequence += 1
+        bids: List[Level] = []
+        asks: List[Level] = []
+        for (side, price), size in self._pending.items():
+            (bids if side == "BUY" else asks).append((price, size))
+        self._pending.clear()
+        return DepthUpdate(symbol=self.symbol, sequence=self.sequence, bids=bids, asks=asks)
+
+
+__all__ = ["BookSide", "DepthBook", "DepthUpdate", "level_price"]
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+
+@dataclass(slots=True)
+class TraceSpan:
+    """Timing breakdown for one tick or order; stage durations are in milliseconds."""
+
+    kind: str
+    started_at: datetime
+    duration_ms: float = 0.0
+    stages: Dict[str, float] = field(default_factory=dict)
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def record(self, stage: str, seconds: float) -> None:
+        # Stages entered more than once (e.g. persistence split around publishing) accumulate.
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds * 1_000
+
+    @contextmanager
+    def stage(self, name: str, observer: Any = None) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.record(name, elapsed)
+            if observer is not None:
+                observer.observe(elapsed)
+
+    def as_json(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms, 3),
+            "stages": {name: round(value, 3) for name, value in self.stages.items()},
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class TraceRecorder:
+    """Ring buffer of recently completed spans."""
+
+    def __init__(self, capacity: int = 2048) -> None:
+        self._spans: Deque[TraceSpan] = deque(maxlen=max(1, capacity))
+
+    @contextmanager
+    def span(self, kind: str, started_at: datetime) -> Iterator[TraceSpan]:
+        span = TraceSpan(kind=kind, started_at=started_at)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as exc:
+            span.error = type(exc).__name__
+            raise
+        finally:
+            span.duration_ms = (time.perf_counter() - started) * 1_000
+            self._spans.append(span)
+
+    def query(
+        self, *, kind: Optional[str] = None, limit: int = 100, min_duration_ms: float = 0.0
+    ) -> List[TraceSpan]:
+        """Return the newest matching spans first."""
+
+        matches: List[TraceSpan] = []
+        for span in reversed(self._spans):
+            if kind is not None and span.kind != kind:
+                continue
+            if span.duration_ms < min_duration_ms:
+                continue
+            matches.append(span)
+            if len(matches) >= limit:
+                break
+        return matches
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profiling session is requested while another one is running."""
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack and aggregates it into collapsed-stack format.
+
+    The output loads directly into flamegraph.pl, speedscope, or Brendan Gregg's
+    FlameGraph tooling. Sampling runs on a helper thread, so the profiled event loop
+    only pays for the GIL hand-offs.
+    """
+
+    def __init__(self) -> None:
+        self._running = threading.Lock()
+        self._thread_id: Optional[int] = None
+
+    def attach(self, thread_id: Optional[int] = None) -> None:
+        self._thread_id = thread_id if thread_id is not None else threading.get_ident()
+
+    @property
+    def busy(self) -> bool:
+        return self._running.locked()
+
+    async def profile(self, seconds: float, interval: float = 0.005) -> bytes:
+        if self._thread_id is None:
+            raise RuntimeError("Profiler is not attached to a thread")
+        if not self._running.acquire(blocking=False):
+            raise ProfilerBusy("A profiling session is already running")
+        try:
+            stacks = await asyncio.to_thread(self._sample, self._thread_id, seconds, interval)
+        finally:
+            self._running.release()
+        lines = [f"{stack} {count}" for stack, count in stacks.most_common()]
+        return ("\n".join(lines) + "\n").encode() if lines else b""
+
+    @staticmethod
+    def _sample(thread_id: int, seconds: float, interval: float) -> Counter:
+        stacks: Counter = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                break
+            names: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+                frame = frame.f_back
+            stacks[";".join(reversed(names))] += 1
+            time.sleep(interval)
+        return stacks
+
+
+async def allocation_snapshot(seconds: float, *, limit: int = 25, frames: int = 1) -> Dict[str, Any]:
+    """Report the top allocation sites, tracing for ``seconds`` unless tracing is already on."""
+
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start(frames)
+    try:
+        if started_here:
+            await asyncio.sleep(seconds)
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            )
+        )
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if started_here:
+            tracemalloc.stop()
+    statistics = snapshot.statistics("lineno")
+    return {
+        "taken_at": datetime.now(timezone.utc).isoformat(),
+        "traced_seconds": seconds if started_here else None,
+        "traced_current_bytes": current,
+        "traced_peak_bytes": peak,
+        "top": [
+            {
+                "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_bytes": stat.size,
+                "count": stat.count,
+            }
+            for stat in statistics[:limit]
+        ],
+    }
+
+
+__all__ = [
+    "ProfilerBusy",
+    "SamplingProfiler",
+    "TraceRecorder",
+    "TraceSpan",
+    "allocation_snapshot",
+]
@@ -1,25 +1,51 @@
 from __future__ import annotations
 
 import asyncio
-import json
-from datetime import datetime, timezone
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
 
+import orjson
+
+from .aggregates import MarketAggregates
 from .analytics import ClickHouseAnalyticsPipeline
+from .archive import TickArchive
+from .auctions import AuctionSchedule
+from .board import PriceBoardWriter
+from .bus import MarketDataBus
+from .clock import Clock, SystemClock
+from . import metrics
+from .depth import DepthUpdate
+from .diagnostics import SamplingProfiler, TraceRecorder, TraceSpan, allocation_snapshot
+from .fanout import Fanout
+from .frames import FrameEncoder
+from .halts import CircuitBreaker, TradingHalted
 from .matching import MatchingService
 from .pricing import PricingService, TickerState
+from .replay import ReplayLog
 from .risk import RiskEngine, RiskRejection
-from .schemas import (
-    MarketNewsItem,
-    MarketRegime,
-    OrderRequest,
-    OrderResponse,
-    OrderStatus,
-    PortfolioResponse,
-    TickerSnapshot,
-    TradeFill,
+from .scheduler import FixedRateScheduler
+from .universe import load_universe
+from .records import (
+    AuctionRecord,
+    CandleRecord,
+    FillRecord,
+    HaltRecord,
+    InstrumentChangeRecord,
+    LeaderboardRecord,
+    MakerQuoteRecord,
+    MassQuoteResult,
+    OrderRecord,
+    OrderResult,
+    PortfolioRecord,
+    QuoteRecord,
+    TickRecord,
 )
+from .schemas import MarketRegime, MassQuoteRequest, OrderRequest
+from .snapshots import EncodedSnapshot, SnapshotPublisher
 from .storage import StockmarketStorage
 
 
@@ -35,6 +61,18 @@ class StockMarketEngine:
         *,
         tick_interval: float = 1.0,
         news_interval: float = 45.0,
+        clock: Optional[Clock] = None,
+        seed: Optional[int] = None,
+        trace_capacity: int = 2048,
+        replay_capacity: int = 1024,
+        bus: Optional[MarketDataBus] = None,
+        board: Optional[PriceBoardWriter] = None,
+        auctions: Optional[AuctionSchedule] = None,
+        leaderboard_interval: float = 10.0,
+        leaderboard_size: int = 10,
+        archive: Optional[TickArchive] = None,
+        dataset_path: Optional[Path] = None,
+        universe_watch_interval: float = 0.0,
     ) -> None:
         self._pricing = pricing
         self._storage = storage
@@ -42,11 +80,48 @@ class StockMarketEngine:
         self._analytics = analytics
         self._tick_interval = tick_interval
         self._news_interval = news_interval
-        self._matching = MatchingService(pricing, storage, risk, analytics)
-        self._subscribers: Dict[asyncio.Queue, None] = {}
+        self._leaderboard_interval = leaderboard_interval
+        self._leaderboard_size = leaderboard_size
+        self._leaderboard_top: List[LeaderboardRecord] = []
+        self._clock: Clock = clock or SystemClock()
+        self._archive = archive
+        self._dataset_path = dataset_path
+        self._universe_watch_interval = universe_watch_interval
+        self._matching = MatchingService(
+            pricing,
+            storage,
+            risk,
+            analytics,
+            clock=self._clock,
+            seed=seed,
+            auctions=auctions,
+            archive=archive,
+        )
+        self._fanout = Fanout()
+        self._replay = ReplayLog(replay_capacity)
+        self._frames = FrameEncoder()
+        self._depth_fanout = Fanout("depth")
+        self._heatmap_fanout = Fanout("heatmap")
+        self._aggregates = MarketAggregates(pricing.states())
+        self._bus = bus
+        self._board = board
+        if board is not None:
+            board.open(pricing.states(), pricing.session_start)
         self._lock = asyncio.Lock()
         self._tasks: List[asyncio.Task] = []
+        self._scheduler = FixedRateScheduler(self._clock, tick_interval)
+        self._sink_task: Optional[asyncio.Task] = None
         self._ready = asyncio.Event()
+        self._traces = TraceRecorder(trace_capacity)
+        self._profiler = SamplingProfiler()
+        self._snapshots = SnapshotPublisher()
+        self._publish_snapshot("tickers", [item.as_json() for item in pricing.snapshot()])
+        self._publish_regimes()
+        self._publish_news()
+        self._publish_halts()
+        self._publish_auctions()
+        self._publish_snapshot("leaderboard", [])
+        self._publish_heatmap()
 
     @classmethod
     async def bootstrap(
@@ -58,30 +133,25 @@ class StockMarketEngine:
         analytics: ClickHouseAnalyticsPipeline,
         tick_interval: float = 1.0,
         news_interval: float = 45.0,
+        clock: Optional[Clock] = None,
+        seed: Optional[int] = None,
+        trace_capacity: int = 2048,
+        replay_capacity: int = 1024,
+        bus: Optional[MarketDataBus] = None,
+        board: Optional[PriceBoardWriter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        auctions: Optional[AuctionSchedule] = None,
+        leaderboard_interval: float = 10.0,
+        leaderboard_size: int = 10,
+        archive: Optional[TickArchive] = None,
+        universe_watch_interval: float = 0.0,
     ) -> "StockMarketEngine":
+        clock = clock or SystemClock()
         if not dataset_path.exists():
             raise FileNotFoundError(f"Dataset not found at {dataset_path}")
-        with dataset_path.open("r", encoding="utf-8") as handle:
-            companies = json.load(handle)
-        tickers: Dict[str, TickerState] = {}
-        for company in companies:
-            symbol = company["ticker"].upper()
-            base_price = float(company.get("base_price", 25.0))
-            volatility = float(company.get("volatility", 0.08))
-            tickers[symbol] = TickerState(
-                symbol=symbol,
-                name=company.get("name", symbol),
-                sector=company.get("sector", "General"),
-                base_price=base_price,
-                volatility=max(0.01, volatility),
-                price=base_price,
-                open_price=base_price,
-                high_price=base_price,
-                low_price=base_price,
-                volume=0,
-            )
-        regimes = cls._default_regimes()
-        pricing = PricingService(tickers, regimes)
+        tickers = load_universe(dataset_path, clock.now())
+        regimes = cls._default_regimes(clock.now())
+        pricing = PricingService(tickers, regimes, clock=clock, seed=seed, breaker=breaker)
         engine = cls(
             pricing,
             storage,
@@ -89,13 +159,25 @@ class StockMarketEngine:
             analytics,
             tick_interval=tick_interval,
             news_interval=news_interval,
+            clock=clock,
+            seed=seed,
+            trace_capacity=trace_capacity,
+            replay_capacity=replay_capacity,
+            bus=bus,
+            board=board,
+            auctions=auctions,
+            leaderboard_interval=leaderboard_interval,
+            leaderboard_size=leaderboard_size,
+            archive=archive,
+            dataset_path=dataset_path,
+            universe_watch_interval=universe_watch_interval,
         )
         await engine._matching.warm_state()
+        engine._publish_leaderboard()
         return engine
 
     @staticmethod
-    def _default_regimes() -> List[MarketRegime]:
-        now = datetime.now(timezone.utc)
+    def _default_regimes(now: datetime) -> List[MarketRegime]:
         return [
             MarketRegime(
                 name="Calm",
@@ -130,14 +212,27 @@ class StockMarketEngine:
     async def start(self) -> None:
         if self._tasks:
             return
+        # The profiler samples whichever thread runs the event loop.
+        self._profiler.attach(threading.get_ident())
         self._tasks = [
             asyncio.create_task(self._run_price_loop(), name="stockmarket-price-loop"),
             asyncio.create_task(self._run_news_loop(), name="stockmarket-news-loop"),
             asyncio.create_task(self._run_regime_rotation(), name="stockmarket-regime-loop"),
         ]
+        if self._leaderboard_interval > 0:
+            self._tasks.append(
+                asyncio.create_task(self._run_leaderboard_loop(), name="stockmarket-leaderboard-loop")
+            )
+        if self._universe_watch_interval > 0 and self._dataset_path is not None:
+            self._tasks.append(
+                asyncio.create_task(self._run_universe_watch(), name="stockmarket-universe-watch")
+            )
         self._ready.set()
 
     async def stop(self) -> None:
+        if self._sink_task is not None:
+            self._tasks.append(self._sink_task)
+            self._sink_task = None
         for task in self._tasks:
             task.cancel()
         for task in self._tasks:
@@ -146,39 +241,184 @@ class StockMarketEngine:
             except asyncio.CancelledError:
                 pass
         self._tasks.clear()
+        if self._archive is not None:
+            await self._archive.flush()
         self._ready.clear()
 
     @property
     def is_ready(self) -> bool:
         return self._ready.is_set()
 
+    @property
+    def subscriber_count(self) -> int:
+        return self._fanout.subscriber_count
+
+    @property
+    def dropped_subscribers(self) -> int:
+        return self._fanout.dropped
+
+    @property
+    def replay(self) -> ReplayLog:
+        return self._replay
+
+    @property
+    def frames(self) -> FrameEncoder:
+        return self._frames
+
+    @asynccontextmanager
+    async def _locked(self, operation: str, trace: Optional[TraceSpan] = None) -> AsyncIterator[None]:
+        requested = time.perf_counter()
+        async with self._lock:
+            acquired = time.perf_counter()
+            metrics.LOCK_WAIT_SECONDS.labels(operation).observe(acquired - requested)
+            if trace is not None:
+                trace.record("lock_wait", acquired - requested)
+            try:
+                yield
+            finally:
+                metrics.LOCK_HOLD_SECONDS.labels(operation).observe(time.perf_counter() - acquired)
+
     async def _run_price_loop(self) -> None:
         try:
-            while True:
-                await asyncio.sleep(self._tick_interval)
-                async with self._lock:
-                    updates = self._pricing.tick()
-                    regime = self._pricing.active_regime()
-                if updates:
-                    await self._storage.record_ticks(updates, regime.name)
-                    await self._storage.cache_tickers(updates)
-                    await self._analytics.publish_ticks(updates, regime)
-                    payload = {
-                        "type": "tick",
-                        "regime": regime.model_dump(mode="json"),
-                        "data": [item.model_dump(mode="json") for item in updates],
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                    }
-                    await self._broadcast(payload)
+            await self._scheduler.run(self._run_tick)
         except asyncio.CancelledError:
             return
 
+    async def _run_tick(self, behind: bool = False) -> None:
+        with self._traces.span("tick", self._clock.now()) as trace:
+            async with self._locked("tick", trace):
+                with trace.stage("price"):
+                    updates = self._pricing.tick()
+                with trace.stage("aggregates"):
+                    self._aggregates.update()
+                with trace.stage("leaderboard"):
+                    trace.attributes["revalued"] = self._matching.revalue_leaderboard()
+                halt_events = self._pricing.drain_halt_events()
+                regime = self._pricing.active_regime()
+                regime_payload = self._regime_payload
+            trace.attributes["symbols"] = len(updates)
+            trace.attributes["regime"] = regime.name
+            trace.attributes["behind"] = behind
+            if not updates:
+                return
+            with trace.stage("snapshot"):
+                data = [item.as_json() for item in updates]
+                self._publish_snapshot("tickers", data)
+                self._publish_heatmap()
+            if self._board is not None:
+                with trace.stage("board"):
+                    self._board.write_tickers(self._pricing.states())
+            payload = {
+                "type": "tick",
+                "regime": regime_payload,
+                "data": data,
+                "timestamp": self._clock.now().isoformat(),
+            }
+            with trace.stage("broadcast"):
+                await self._broadcast(payload)
+                await self._broadcast_halts(halt_events)
+            self._dispatch_sinks(updates, regime, behind)
+        await self._run_auction()
+        await self._run_order_triggers()
+
+    async def _run_auction(self) -> None:
+        matching = self._matching
+        if not matching.auction_due():
+            call = matching.auction
+            if call is not None and call.changed:
+                async with self._locked("auction"):
+                    indicative = matching.indicative_auctions()
+                    self._publish_auctions()
+                await self._broadcast_auctions(indicative)
+            return
+        with self._traces.span("auction", self._clock.now()) as trace:
+            async with self._locked("auction", trace):
+                # The closing call uncrosses before DAY orders expire, and at midnight the
+                # opening call starts as soon as the closing one has cleared.
+                cleared = matching.auction
+                results, uncrossed = await matching.uncross_auction(trace=trace)
+                opened = matching.open_auction()
+                for symbol in {result.order.symbol for result in results}:
+                    self._publish_book_change(symbol)
+                self._publish_auctions()
+                halt_events = self._pricing.drain_halt_events()
+            trace.attributes["uncrossed"] = cleared.session if cleared is not None else None
+            trace.attributes["opened"] = opened.session if opened is not None else None
+            trace.attributes["symbols"] = len(uncrossed)
+            trace.attributes["orders"] = len(results)
+            with trace.stage("broadcast", metrics.ORDER_BROADCAST):
+                for result in results:
+                    await self._broadcast(self._order_event(result))
+                await self._broadcast_auctions(uncrossed)
+                await self._broadcast_halts(halt_events)
+
+    async def _run_order_triggers(self) -> None:
+        # Both checks are cheap when nothing is due, so they run after every tick.
+        crossed = self._matching.crossed_stops()
+        expiring = self._matching.has_expired_day_orders()
+        if not crossed and not expiring:
+            return
+        with self._traces.span("stops", self._clock.now()) as trace:
+            results: List[OrderResult] = []
+            async with self._locked("stops", trace):
+                if expiring:
+                    expired = await self._matching.expire_day_orders()
+                    results.extend(OrderResult(order=order, fills=[]) for order in expired)
+                for symbol in crossed:
+                    results.extend(await self._matching.trigger_stops(symbol, trace=trace))
+                for symbol in {result.order.symbol for result in results}:
+                    self._publish_book_change(symbol)
+                halt_events = self._pricing.drain_halt_events()
+            trace.attributes["symbols"] = len(crossed)
+            trace.attributes["orders"] = len(results)
+            with trace.stage("broadcast", metrics.ORDER_BROADCAST):
+                for result in results:
+                    await self._broadcast(self._order_event(result))
+                await self._broadcast_halts(halt_events)
+
+    def _dispatch_sinks(self, updates: List[TickRecord], regime: MarketRegime, behind: bool) -> None:
+        # Sinks run off the tick path so Postgres, Redis, and ClickHouse latency never
+        # delays the next broadcast. Each tick carries every symbol, so a dropped cache
+        # write is repaired by the following one.
+        if self._sink_task is not None and not self._sink_task.done():
+            self._scheduler.record_shed("sinks_busy")
+            return
+        if behind:
+            self._scheduler.record_shed("behind")
+        self._sink_task = asyncio.create_task(
+            self._write_sinks(updates, regime, history=not behind), name="stockmarket-tick-sinks"
+        )
+
+    async def _write_sinks(self, updates: List[TickRecord], regime: MarketRegime, *, history: bool) -> None:
+        with self._traces.span("sinks", self._clock.now()) as trace:
+            trace.attributes["history"] = history
+            try:
+                with trace.stage("cache_tickers"):
+                    await self._storage.cache_tickers(updates)
+                if history:
+                    with trace.stage("record_ticks"):
+                        await self._storage.record_ticks(updates, regime.name)
+                    with trace.stage("analytics"):
+                        await self._analytics.publish_ticks(updates, regime)
+                    if self._archive is not None:
+                        with trace.stage("archive"):
+                            self._archive.append_ticks(updates)
+                            if self._archive.flush_due():
+                                await self._archive.flush()
+            except Exception as exc:
+                trace.error = type(exc).__name__
+                metrics.TICK_SINK_ERRORS.inc()
+
+    def scheduler_stats(self) -> Dict[str, Any]:
+        return self._scheduler.stats.as_json()
+
     async def _run_news_loop(self) -> None:
         try:
             while True:
-                await asyncio.sleep(self._news_interval)
-                async with self._lock:
+                await self._clock.sleep(self._news_interval)
+                async with self._locked("news"):
                     news = self._pricing.generate_news()
+                    self._publish_news()
                 if news:
                     await self._broadcast({"type": "news", "data": news.model_dump(mode="json")})
         except asyncio.CancelledError:
@@ -187,69 +427,384 @@ class StockMarketEngine:
     async def _run_regime_rotation(self) -> None:
         try:
             while True:
-                await asyncio.sleep(300)
-                async with self._lock:
-                    regime = self._pricing.rotate_regime()
-                await self._broadcast({"type": "regime", "data": regime.model_dump(mode="json")})
+                await self._clock.sleep(300)
+                async with self._locked("regime"):
+                    self._pricing.rotate_regime()
+                    self._publish_regimes()
+                await self._broadcast({"type": "regime", "data": self._regime_payload})
         except asyncio.CancelledError:
             return
 
-    def register(self, queue: asyncio.Queue) -> None:
-        self._subscribers[queue] = None
+    async def _run_universe_watch(self) -> None:
+        # Editing the dataset file lists, updates, and delists instruments without a restart.
+        assert self._dataset_path is not None
+        seen = _modified(self._dataset_path)
+        try:
+            while True:
+                await self._clock.sleep(self._universe_watch_interval)
+                modified = _modified(self._dataset_path)
+                if modified is None or modified == seen:
+                    continue
+                seen = modified
+                try:
+                    await self.reload_instruments()
+                except (KeyError, OSError, TypeError, ValueError):
+                    # Most likely a half-written file; its next modification is picked up again.
+                    metrics.UNIVERSE_ERRORS.inc()
+        except asyncio.CancelledError:
+            return
 
-    def unregister(self, queue: asyncio.Queue) -> None:
-        self._subscribers.pop(queue, None)
+    async def _run_leaderboard_loop(self) -> None:
+        # Rankings move with every tick; clients get the top of the table at a calmer pace,
+        # and only when it changed.
+        try:
+            while True:
+                await self._clock.sleep(self._leaderboard_interval)
+                async with self._locked("leaderboard"):
+                    changed = self._publish_leaderboard()
+                if changed:
+                    await self._broadcast(
+                        {"type": "leaderboard", "data": [entry.as_json() for entry in self._leaderboard_top]}
+                    )
+        except asyncio.CancelledError:
+            return
 
-    async def _broadcast(self, payload: Dict) -> None:
-        if not self._subscribers:
+    def _publish_regimes(self) -> None:
+        self._regime_payload = self._pricing.active_regime().model_dump(mode="json")
+        self._publish_snapshot(
+            "regimes", [item.model_dump(mode="json") for item in self._pricing.regimes()]
+        )
+
+    def _publish_news(self) -> None:
+        self._publish_snapshot(
+            "news", [item.model_dump(mode="json") for item in self._pricing.recent_news()]
+        )
+
+    def _publish_halts(self) -> None:
+        self._publish_snapshot("halts", [halt.as_json() for halt in self._pricing.halts()])
+
+    async def _broadcast_halts(self, events: List[HaltRecord]) -> None:
+        if not events:
             return
-        for queue in list(self._subscribers.keys()):
-            try:
-                queue.put_nowait(payload)
-            except asyncio.QueueFull:
-                self._subscribers.pop(queue, None)
-
-    async def tickers_snapshot(self) -> List[TickerSnapshot]:
-        cached = await self._storage.load_cached_tickers()
-        if cached:
-            return cached
-        async with self._lock:
-            return self._pricing.snapshot()
+        self._publish_halts()
+        for event in events:
+            metrics.HALTS.labels(event.status).inc()
+            await self._broadcast({"type": "halt", "data": event.as_json()})
 
-    async def regimes(self) -> List[MarketRegime]:
-        async with self._lock:
-            return self._pricing.regimes()
+    def _publish_leaderboard(self) -> bool:
+        top = self._matching.leaderboard(self._leaderboard_size)
+        if top == self._leaderboard_top:
+            return False
+        self._leaderboard_top = top
+        self._publish_snapshot("leaderboard", [entry.as_json() for entry in top])
+        return True
 
-    async def active_regime(self) -> MarketRegime:
-        async with self._lock:
-            return self._pricing.active_regime()
+    def _publish_auctions(self) -> None:
+        self._publish_snapshot("auctions", [record.as_json() for record in self._matching.auction_states()])
 
-    async def recent_news(self) -> List[MarketNewsItem]:
-        async with self._lock:
-            return self._pricing.recent_news()
+    async def _broadcast_auctions(self, records: List[AuctionRecord]) -> None:
+        # One event per batch: an opening call can reprice thousands of symbols at once.
+        if records:
+            await self._broadcast({"type": "auction", "data": [record.as_json() for record in records]})
 
-    async def place_order(self, payload: OrderRequest) -> OrderResponse:
-        async with self._lock:
-            response = await self._matching.place_order(payload)
-        await self._broadcast(
+    def _publish_heatmap(self) -> None:
+        aggregates = self._aggregates
+        snapshot = self._publish_snapshot(
+            "heatmap",
             {
-                "type": "order",
-                "data": {
-                    "order": response.order.model_dump(mode="json"),
-                    "fills": [fill.model_dump(mode="json") for fill in response.fills],
-                },
-            }
+                "composite": aggregates.composite(self._clock.now()).as_json(),
+                "sectors": [record.as_json() for record in aggregates.sectors()],
+                "regions": [record.as_json() for record in aggregates.regions()],
+            },
+        )
+        # Encoded once; every heatmap subscriber forwards the snapshot body as its text frame.
+        self._heatmap_fanout.publish(snapshot.body.decode())
+
+    def _publish_snapshot(self, channel: str, payload: Any) -> EncodedSnapshot:
+        snapshot = self._snapshots.publish(channel, payload)
+        if self._bus is not None:
+            self._bus.publish_snapshot(snapshot)
+        return snapshot
+
+    def snapshot(self, channel: str) -> EncodedSnapshot:
+        snapshot = self._snapshots.get(channel)
+        if snapshot is None:
+            raise KeyError(f"Unknown snapshot channel {channel}")
+        return snapshot
+
+    def register(self, queue: asyncio.Queue) -> None:
+        self._fanout.register(queue)
+
+    def unregister(self, queue: asyncio.Queue) -> None:
+        self._fanout.unregister(queue)
+
+    def register_heatmap(self, queue: asyncio.Queue) -> None:
+        self._heatmap_fanout.register(queue)
+
+    def unregister_heatmap(self, queue: asyncio.Queue) -> None:
+        self._heatmap_fanout.unregister(queue)
+
+    def register_depth(self, queue: asyncio.Queue) -> None:
+        self._depth_fanout.register(queue)
+
+    def unregister_depth(self, queue: asyncio.Queue) -> None:
+        self._depth_fanout.unregister(queue)
+
+    async def _broadcast(self, payload: Dict) -> None:
+        frame = self._frames.frame(payload)
+        self._replay.append(frame)
+        self._fanout.publish(frame)
+        if self._bus is not None:
+            self._bus.publish_event(frame)
+
+    def quote(self, symbol: str) -> QuoteRecord:
+        state = self._pricing.state(symbol)
+        bid, bid_size, ask, ask_size = self._matching.top_of_book(symbol)
+        return QuoteRecord(
+            symbol=symbol,
+            price=round(state.price, 2),
+            bid=None if bid is None else round(bid, 2),
+            bid_size=bid_size,
+            ask=None if ask is None else round(ask, 2),
+            ask_size=ask_size,
+            last_update=state.last_update,
         )
+
+    def candles(self, symbol: str) -> List[CandleRecord]:
+        return self._pricing.candles(symbol)
+
+    async def place_order(self, payload: OrderRequest) -> OrderResult:
+        with self._traces.span("order", self._clock.now()) as trace:
+            trace.attributes["symbol"] = payload.symbol.upper()
+            trace.attributes["side"] = payload.side
+            trace.attributes["order_type"] = payload.order_type
+            async with self._locked("order", trace):
+                response = await self._matching.place_order(payload, trace=trace)
+                symbol = response.order.symbol
+                triggered = await self._matching.trigger_stops(symbol, trace=trace) if response.fills else []
+                self._publish_book_change(symbol)
+                halt_events = self._pricing.drain_halt_events()
+            trace.attributes["order_id"] = response.order.order_id
+            trace.attributes["status"] = response.order.status
+            trace.attributes["fills"] = len(response.fills)
+            trace.attributes["stops_triggered"] = len(triggered)
+            with trace.stage("broadcast", metrics.ORDER_BROADCAST):
+                await self._broadcast(self._order_event(response))
+                for result in triggered:
+                    await self._broadcast(self._order_event(result))
+                await self._broadcast_halts(halt_events)
         return response
 
-    async def order_status(self, order_id: str) -> Optional[OrderStatus]:
+    async def mass_quote(self, payload: MassQuoteRequest) -> MassQuoteResult:
+        with self._traces.span("quotes", self._clock.now()) as trace:
+            trace.attributes["user_id"] = payload.user_id
+            trace.attributes["symbols"] = len(payload.quotes)
+            async with self._locked("quotes", trace):
+                response = await self._matching.mass_quote(payload, trace=trace)
+                triggered: List[OrderResult] = []
+                for symbol in dict.fromkeys(fill.symbol for fill in response.fills):
+                    triggered.extend(await self._matching.trigger_stops(symbol, trace=trace))
+                touched = dict.fromkeys(quote.symbol for quote in response.quotes)
+                touched.update(dict.fromkeys(result.order.symbol for result in triggered))
+                for symbol in touched:
+                    self._publish_book_change(symbol)
+                halt_events = self._pricing.drain_halt_events()
+            trace.attributes["fills"] = len(response.fills)
+            trace.attributes["stops_triggered"] = len(triggered)
+            with trace.stage("broadcast", metrics.ORDER_BROADCAST):
+                # Quotes themselves stay off the event stream; only their trades are broadcast.
+                for result in response.orders + triggered:
+                    await self._broadcast(self._order_event(result))
+                await self._broadcast_halts(halt_events)
+        return response
+
+    def leaderboard(self, top: int) -> List[LeaderboardRecord]:
+        return self._matching.leaderboard(top)
+
+    def leaderboard_standing(self, user_id: str) -> Optional[LeaderboardRecord]:
+        return self._matching.leaderboard_standing(user_id)
+
+    def maker_quotes(self, user_id: str) -> List[MakerQuoteRecord]:
+        return self._matching.maker_quotes(user_id)
+
+    async def list_instruments(
+        self, listings: Iterable[TickerState], *, delist_missing: bool = False
+    ) -> InstrumentChangeRecord:
+        """List new symbols and update the descriptive fields of listed ones.
+
+        New symbols get pricing state, books, and heatmap membership at once and
+        trade from the next tick; listed symbols keep their prices. With
+        ``delist_missing`` every listed symbol absent from ``listings`` is
+        delisted, which makes the call a full reconcile against a dataset.
+        """
+
+        listings = list(listings)
+        if delist_missing and not listings:
+            raise ValueError("Cannot delist every symbol")
+        async with self._locked("instruments"):
+            listed_symbols = self._pricing.symbols()
+            listed: List[str] = []
+            updated: List[str] = []
+            for listing in listings:
+                if listing.symbol in listed_symbols:
+                    if self._pricing.update_ticker(listing):
+                        self._aggregates.add(self._pricing.state(listing.symbol))
+                        updated.append(listing.symbol)
+                else:
+                    self._pricing.list_ticker(listing)
+                    self._aggregates.add(listing)
+                    listed.append(listing.symbol)
+            self._matching.list_symbols(listed)
+            delisted: List[str] = []
+            if delist_missing:
+                named = {listing.symbol for listing in listings}
+                delisted = [symbol for symbol in listed_symbols if symbol not in named]
+            cancelled = await self._delist(delisted)
+            change = InstrumentChangeRecord(
+                listed=listed, updated=updated, delisted=delisted, cancelled_orders=len(cancelled)
+            )
+            if listed or updated or delisted:
+                self._publish_universe()
+        await self._broadcast_universe(change, cancelled)
+        return change
+
+    async def delist_instruments(self, symbols: Iterable[str]) -> InstrumentChangeRecord:
+        """Stop trading ``symbols``, cancelling their open orders; unknown symbols raise KeyError."""
+
+        symbols = list(dict.fromkeys(symbols))
+        async with self._locked("instruments"):
+            listed_symbols = self._pricing.symbols()
+            for symbol in symbols:
+                if symbol not in listed_symbols:
+                    raise KeyError(symbol)
+            if len(symbols) >= len(listed_symbols):
+                raise ValueError("Cannot delist every symbol")
+            cancelled = await self._delist(symbols)
+            change = InstrumentChangeRecord(
+                listed=[], updated=[], delisted=symbols, cancelled_orders=len(cancelled)
+            )
+            if symbols:
+                self._publish_universe()
+        await self._broadcast_universe(change, cancelled)
+        return change
+
+    async def reload_instruments(self) -> InstrumentChangeRecord:
+        """Reconcile the listed symbols with the dataset file the engine booted from."""
+
+        if self._dataset_path is None:
+            raise ValueError("The engine was not booted from a dataset file")
+        # Parsing a large universe is CPU-bound; only applying it needs the lock.
+        listings = await asyncio.to_thread(load_universe, self._dataset_path, self._clock.now())
+        return await self.list_instruments(listings.values(), delist_missing=True)
+
+    async def _delist(self, symbols: List[str]) -> List[OrderRecord]:
+        for symbol in symbols:
+            self._pricing.delist_ticker(symbol)
+            self._aggregates.remove(symbol)
+        return await self._matching.delist_symbols(symbols)
+
+    def _publish_universe(self) -> None:
+        if self._board is not None:
+            # Slots are laid out for one universe; a new segment generation makes followers re-attach.
+            self._board.close()
+            self._board.open(self._pricing.states(), self._pricing.session_start)
+            for state in self._pricing.states():
+                self._board.write_symbol(state, self._matching.top_of_book(state.symbol))
+        self._publish_snapshot("tickers", [item.as_json() for item in self._pricing.snapshot()])
+        self._publish_halts()
+        self._publish_auctions()
+        self._publish_heatmap()
+
+    async def _broadcast_universe(self, change: InstrumentChangeRecord, cancelled: List[OrderRecord]) -> None:
+        for order in cancelled:
+            await self._broadcast(self._order_event(OrderResult(order=order, fills=[])))
+        if change.listed or change.updated or change.delisted:
+            await self._broadcast({"type": "instruments", "data": change.as_json()})
+
+    @staticmethod
+    def _order_event(result: OrderResult) -> Dict[str, Any]:
+        return {
+            "type": "order",
+            "data": {
+                "order": result.order.as_json(),
+                "fills": [fill.as_json() for fill in result.fills],
+            },
+        }
+
+    def _publish_book_change(self, symbol: str) -> None:
+        # Called under the lock so depth sequences reach subscribers in order.
+        depth_update = self._matching.flush_depth(symbol)
+        if depth_update is not None:
+            self._publish_depth(depth_update)
+        if self._board is not None:
+            self._board.write_symbol(self._pricing.state(symbol), self._matching.top_of_book(symbol))
+
+    def _publish_depth(self, update: DepthUpdate) -> None:
+        # Encoded once here; every depth subscriber forwards the same text frame.
+        self._depth_fanout.publish((update.symbol, orjson.dumps(update.as_json()).decode()))
+
+    def depth(self, symbol: str, levels: int = 10) -> Dict[str, Any]:
+        sequence, bids, asks = self._matching.depth(symbol, levels)
+        return {"symbol": symbol, "sequence": sequence, "bids": bids, "asks": asks}
+
+    def traces(
+        self, *, kind: Optional[str] = None, limit: int = 100, min_duration_ms: float = 0.0
+    ) -> List[Dict[str, Any]]:
+        spans = self._traces.query(kind=kind, limit=limit, min_duration_ms=min_duration_ms)
+        return [span.as_json() for span in spans]
+
+    async def profile(self, seconds: float, interval: float = 0.005) -> bytes:
+        return await self._profiler.profile(seconds, interval)
+
+    @property
+    def profiling(self) -> bool:
+        return self._profiler.busy
+
+    async def allocation_snapshot(self, seconds: float, limit: int = 25) -> Dict[str, Any]:
+        return await allocation_snapshot(seconds, limit=limit)
+
+    async def order_status(self, order_id: str) -> Optional[OrderRecord]:
         return await self._matching.order_status(order_id)
 
-    async def portfolio(self, user_id: str) -> PortfolioResponse:
+    async def user_orders(
+        self, user_id: str, *, open_only: bool = True, limit: int = 50, before: Optional[str] = None
+    ) -> List[OrderRecord]:
+        return await self._matching.user_orders(user_id, open_only=open_only, limit=limit, before=before)
+
+    async def cancel_order(self, order_id: str) -> Optional[OrderRecord]:
+        """Cancel one open order; returns None when it is unknown or no longer open."""
+
+        async with self._locked("cancel"):
+            cancelled = await self._matching.cancel_order(order_id)
+            if cancelled is not None:
+                self._publish_book_change(cancelled.symbol)
+        if cancelled is not None:
+            await self._broadcast(self._order_event(OrderResult(order=cancelled, fills=[])))
+        return cancelled
+
+    async def cancel_user_orders(self, user_id: str) -> List[OrderRecord]:
+        """Cancel every open order of ``user_id`` and return them."""
+
+        async with self._locked("cancel"):
+            cancelled = await self._matching.cancel_user_orders(user_id)
+            for symbol in dict.fromkeys(order.symbol for order in cancelled):
+                self._publish_book_change(symbol)
+        for order in cancelled:
+            await self._broadcast(self._order_event(OrderResult(order=order, fills=[])))
+        return cancelled
+
+    async def portfolio(self, user_id: str) -> PortfolioRecord:
         return await self._matching.portfolio(user_id)
 
-    async def recent_trades(self, limit: int = 50) -> List[TradeFill]:
+    async def recent_trades(self, limit: int = 50) -> List[FillRecord]:
         return await self._matching.recent_trades(limit)
 
 
-__all__ = ["StockMarketEngine", "RiskRejection"]
+def _modified(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+__all__ = ["StockMarketEngine", "RiskRejection", "TradingHalted"]
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict
+
+from . import metrics
+
+
+class Fanout:
+    """Delivers broadcast events to per-subscriber queues, dropping subscribers that fall behind."""
+
+    def __init__(self, channel: str = "ticks") -> None:
+        self._subscribers: Dict[asyncio.Queue, None] = {}
+        self._dropped = 0
+        self._subscriber_gauge = metrics.SUBSCRIBERS.labels(channel)
+        self._queue_depth_gauge = metrics.SUBSCRIBER_QUEUE_DEPTH.labels(channel)
+        self._dropped_counter = metrics.DROPPED_SUBSCRIBERS.labels(channel)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    def register(self, queue: asyncio.Queue) -> None:
+        self._subscribers[queue] = None
+        self._subscriber_gauge.set(len(self._subscribers))
+
+    def unregister(self, queue: asyncio.Queue) -> None:
+        self._subscribers.pop(queue, None)
+        self._subscriber_gauge.set(len(self._subscribers))
+
+    def publish(self, payload: Any) -> None:
+        if not self._subscribers:
+            return
+        deepest = 0
+        dropped = 0
+        for queue in list(self._subscribers.keys()):
+            depth = queue.qsize()
+            if depth > deepest:
+                deepest = depth
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                self._subscribers.pop(queue, None)
+                dropped += 1
+        self._queue_depth_gauge.set(deepest)
+        if dropped:
+            self._dropped += dropped
+            self._dropped_counter.inc(dropped)
+            self._subscriber_gauge.set(len(self._subscribers))
+
+
+__all__ = ["Fanout"]
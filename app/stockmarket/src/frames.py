@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import msgpack
+import orjson
+
+# WebSocket subprotocol -> frame encoding. Clients that offer neither get JSON text frames.
+SUBPROTOCOLS = {"stockmarket.msgpack": "msgpack", "stockmarket.json": "json"}
+# Broadcast prices are already rounded to cents, so compact frames carry them as integers.
+PRICE_SCALE = 100
+
+
+def negotiate(offered: Sequence[str]) -> Optional[str]:
+    """The first subprotocol offered by the client that names a known encoding."""
+
+    for name in offered:
+        if name in SUBPROTOCOLS:
+            return name
+    return None
+
+
+class BroadcastFrame:
+    """One broadcast event, encoded at most once per wire format however many sockets send it."""
+
+    __slots__ = ("payload", "_compact", "_json", "_text", "_binary")
+
+    def __init__(self, payload: Dict[str, Any], compact: Optional[Dict[str, Any]] = None) -> None:
+        self.payload = payload
+        self._compact = compact
+        self._json: Optional[bytes] = None
+        self._text: Optional[str] = None
+        self._binary: Optional[bytes] = None
+
+    def json(self) -> bytes:
+        if self._json is None:
+            self._json = orjson.dumps(self.payload)
+        return self._json
+
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.json().decode()
+        return self._text
+
+    def binary(self) -> bytes:
+        if self._binary is None:
+            body = self.payload
+            if self._compact is not None:
+                # The sequence is stamped after the frame is built, so it is copied in late.
+                body = self._compact
+                body["sequence"] = self.payload.get("sequence")
+            self._binary = msgpack.packb(body)
+        return self._binary
+
+
+class FrameEncoder:
+    """Wraps broadcast events in frames and keeps the state compact tick frames are relative to.
+
+    In MessagePack, tick rows are ``[symbol, price, open, high, low, volume, age]``
+    where the prices (in cents) and the cumulative volume are differences from
+    the symbol's previous row and ``age`` is how many milliseconds before the
+    frame's ``timestamp`` the symbol last updated. A symbol with no previous row,
+    because it was just listed or its descriptive fields changed, is sent with
+    absolute values followed by its ``name`` and ``sector``. The snapshot sent on
+    connect holds those full rows for every symbol, with the last update in
+    epoch milliseconds in place of the age. ``regime`` is only included when it
+    changes. Every other event is sent as its JSON payload packed as MessagePack.
+    """
+
+    def __init__(self) -> None:
+        # symbol -> [price, open, high, low, volume, updated_ms, name, sector] as last broadcast.
+        self._rows: Dict[str, List[Any]] = {}
+        self._regime: Optional[Dict[str, Any]] = None
+        self._snapshot: Optional[Tuple[str, int, bytes]] = None
+
+    def frame(self, payload: Dict[str, Any]) -> BroadcastFrame:
+        event_type = payload.get("type")
+        if event_type == "tick":
+            return BroadcastFrame(payload, self._tick(payload))
+        if event_type == "instruments":
+            # Updated symbols are resent in full on the next tick so clients pick up the new fields.
+            change = payload["data"]
+            for symbol in (*change["delisted"], *change["updated"]):
+                self._rows.pop(symbol, None)
+        return BroadcastFrame(payload)
+
+    def snapshot(self, epoch: str, sequence: int) -> bytes:
+        """The compact tickers snapshot matching the events up to ``sequence``, encoded once."""
+
+        cached = self._snapshot
+        if cached is None or cached[0] != epoch or cached[1] != sequence:
+            body = msgpack.packb(
+                {
+                    "type": "snapshot",
+                    "epoch": epoch,
+                    "sequence": sequence,
+                    "regime": self._regime,
+                    "data": [[symbol, *row] for symbol, row in self._rows.items()],
+                }
+            )
+            cached = self._snapshot = (epoch, sequence, body)
+        return cached[2]
+
+    def _tick(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        timestamp = _millis(payload["timestamp"])
+        known = self._rows
+        rows: List[List[Any]] = []
+        # Every symbol of a tick usually shares one update time; parse each distinct string once.
+        parsed_text: Optional[str] = None
+        updated = 0
+        for item in payload["data"]:
+            symbol = item["symbol"]
+            if item["last_update"] != parsed_text:
+                parsed_text = item["last_update"]
+                updated = _millis(parsed_text)
+            price = round(item["price"] * PRICE_SCALE)
+            open_price = round(item["open_price"] * PRICE_SCALE)
+            high = round(item["high_price"] * PRICE_SCALE)
+            low = round(item["low_price"] * PRICE_SCALE)
+            volume = item["volume"]
+            previous = known.get(symbol)
+            if previous is None:
+                name, sector = item["name"], item["sector"]
+                rows.append([symbol, price, open_price, high, low, volume, timestamp - updated, name, sector])
+                known[symbol] = [price, open_price, high, low, volume, updated, name, sector]
+                continue
+            rows.append(
+                [
+                    symbol,
+                    price - previous[0],
+                    open_price - previous[1],
+                    high - previous[2],
+                    low - previous[3],
+                    volume - previous[4],
+                    timestamp - updated,
+                ]
+            )
+            previous[:6] = (price, open_price, high, low, volume, updated)
+        compact: Dict[str, Any] = {"type": "tick", "timestamp": timestamp, "data": rows}
+        regime = payload.get("regime")
+        if regime != self._regime:
+            self._regime = regime
+            compact["regime"] = regime
+        return compact
+
+
+def _millis(text: str) -> int:
+    return round(datetime.fromisoformat(text).timestamp() * 1_000)
+
+
+__all__ = ["PRICE_SCALE", "SUBPROTOCOLS", "BroadcastFrame", "FrameEncoder", "negotiate"]
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import math
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .records import HaltRecord
+
+# (bucket, price) extremes of closed buckets; each deque is monotonic in price.
+_Samples = Deque[Tuple[int, float]]
+
+
+class TradingHalted(Exception):
+    """Raised when an order targets a symbol whose circuit breaker has tripped."""
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+        self.message = message
+
+
+class PriceBand:
+    """Rolling low/high of one symbol's price, bucketed in time.
+
+    Closed buckets feed a rising deque of lows and a falling deque of highs, so
+    the window's extremes sit at the deque fronts and each bucket is appended
+    and popped at most once. ``floor_up`` and ``ceiling_down`` hold those
+    extremes already scaled by the band, so an observation inside the current
+    bucket is a few comparisons.
+    """
+
+    __slots__ = ("phase", "bucket", "roll_at", "low", "high", "floor_up", "ceiling_down", "_lows", "_highs")
+
+    def __init__(self, phase: float = 0.0) -> None:
+        # Bands start their buckets at different offsets so they do not all roll on one tick.
+        self.phase = phase
+        self.bucket: Optional[int] = None
+        self.roll_at = -math.inf
+        self.low = self.high = 0.0
+        self.floor_up = math.inf
+        self.ceiling_down = -math.inf
+        self._lows: _Samples = deque()
+        self._highs: _Samples = deque()
+
+    def observe(self, timestamp: float, price: float, breaker: "CircuitBreaker") -> bool:
+        """Record a price and report whether it breaches the band."""
+
+        # PricingService.tick inlines this body for its hot loop; keep the two in step.
+        if timestamp >= self.roll_at:
+            self.roll(timestamp, price, breaker)
+        elif price < self.low:
+            self.low = price
+        elif price > self.high:
+            self.high = price
+        return (
+            price >= self.floor_up
+            or price <= self.ceiling_down
+            or price >= self.low * breaker.up
+            or price <= self.high * breaker.down
+        )
+
+    def reference(self, price: float, breaker: "CircuitBreaker") -> float:
+        if price >= self.floor_up or price >= self.low * breaker.up:
+            return min(self.floor_up / breaker.up, self.low)
+        return max(self.ceiling_down / breaker.down, self.high)
+
+    def reset(self) -> None:
+        self.bucket = None
+        self.roll_at = -math.inf
+        self._lows.clear()
+        self._highs.clear()
+        self.floor_up = math.inf
+        self.ceiling_down = -math.inf
+
+    def roll(self, timestamp: float, price: float, breaker: "CircuitBreaker") -> None:
+        """Close the current bucket and open the one containing ``timestamp``."""
+
+        lows, highs = self._lows, self._highs
+        if self.bucket is not None:
+            while lows and lows[-1][1] >= self.low:
+                lows.pop()
+            lows.append((self.bucket, self.low))
+            while highs and highs[-1][1] <= self.high:
+                highs.pop()
+            highs.append((self.bucket, self.high))
+        bucket = int((timestamp - self.phase) // breaker.resolution)
+        oldest = bucket - breaker.span
+        while lows and lows[0][0] <= oldest:
+            lows.popleft()
+        while highs and highs[0][0] <= oldest:
+            highs.popleft()
+        self.floor_up = lows[0][1] * breaker.up if lows else math.inf
+        self.ceiling_down = highs[0][1] * breaker.down if highs else -math.inf
+        self.bucket = bucket
+        self.roll_at = (bucket + 1) * breaker.resolution + self.phase
+        self.low = self.high = price
+
+
+class CircuitBreaker:
+    """Halts a symbol when its price moves more than ``threshold`` within ``window`` seconds.
+
+    Prices are bucketed at ``resolution`` seconds (a tenth of the window by
+    default), so the window is exact to within one bucket while the tick loop
+    only touches a symbol's deques once per bucket; bucket boundaries are
+    staggered across symbols to spread that work over consecutive ticks. A halt clears the symbol's band,
+    so trading resumes against fresh prices.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold: float = 0.10,
+        window: float = 300.0,
+        halt_seconds: float = 300.0,
+        resolution: Optional[float] = None,
+    ) -> None:
+        if threshold <= 0:
+            raise ValueError("Circuit breaker threshold must be positive")
+        if window <= 0 or halt_seconds <= 0:
+            raise ValueError("Circuit breaker window and halt duration must be positive")
+        self.threshold = threshold
+        self.window = window
+        self.halt_seconds = halt_seconds
+        self.resolution = resolution or window / 10
+        self.span = max(1, math.ceil(window / self.resolution))
+        self.up = 1.0 + threshold
+        self.down = 1.0 - threshold
+        self.bands: Dict[str, PriceBand] = {}
+        # Insertion order is resume order because every halt lasts halt_seconds.
+        self.halted: Dict[str, HaltRecord] = {}
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.halted
+
+    def halt(self, symbol: str) -> Optional[HaltRecord]:
+        return self.halted.get(symbol)
+
+    def halts(self) -> List[HaltRecord]:
+        return list(self.halted.values())
+
+    def band(self, symbol: str) -> PriceBand:
+        band = self.bands.get(symbol)
+        if band is None:
+            # Golden-ratio offsets spread bucket boundaries evenly however many bands exist.
+            phase = (len(self.bands) * 0.6180339887) % 1.0 * self.resolution
+            band = self.bands[symbol] = PriceBand(phase)
+        return band
+
+    def observe(self, symbol: str, timestamp: float, price: float) -> Optional[HaltRecord]:
+        """Record a price and return the new halt if it breaches the band."""
+
+        band = self.band(symbol)
+        if band.observe(timestamp, price, self):
+            return self.trip(symbol, timestamp, price)
+        return None
+
+    def trip(self, symbol: str, timestamp: float, price: float) -> HaltRecord:
+        band = self.bands[symbol]
+        reference = band.reference(price, self)
+        band.reset()
+        record = HaltRecord(
+            symbol=symbol,
+            status="HALTED",
+            reference_price=round(reference, 2),
+            trigger_price=round(price, 2),
+            move=round(price / reference - 1.0, 4),
+            halted_at=datetime.fromtimestamp(timestamp, timezone.utc),
+            resumes_at=datetime.fromtimestamp(timestamp + self.halt_seconds, timezone.utc),
+        )
+        self.halted[symbol] = record
+        return record
+
+    def release_due(self, timestamp: float) -> List[HaltRecord]:
+        """Lift halts whose cooldown has elapsed and return their resume records."""
+
+        resumed: List[HaltRecord] = []
+        for symbol, halt in self.halted.items():
+            if halt.resumes_at.timestamp() > timestamp:
+                break
+            resumed.append(
+                HaltRecord(
+                    symbol=symbol,
+                    status="RESUMED",
+                    reference_price=halt.reference_price,
+                    trigger_price=halt.trigger_price,
+                    move=halt.move,
+                    halted_at=halt.halted_at,
+                    resumes_at=halt.resumes_at,
+                )
+            )
+        for record in resumed:
+            del self.halted[record.symbol]
+        return resumed
+
+
+__all__ = ["CircuitBreaker", "PriceBand", "TradingHalted"]
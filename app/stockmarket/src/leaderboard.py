@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from typing import Callable, Dict, List, Optional, Tuple
+
+# (negated value, user id): ascending keys list the richest portfolio first, ties by user id.
+_Key = Tuple[float, str]
+
+
+class RankIndex:
+    """Sorted keys split into runs, with a Fenwick tree over the run lengths.
+
+    Finding a key's run is a bisection over the run maxima and its offset a
+    bisection inside the run, while the tree sums the lengths of the runs before
+    it, so inserts, removals, and rank lookups stay logarithmic without a
+    balanced tree. Runs split once they hold twice ``load`` keys; only a split or
+    an emptied run rebuilds the tree.
+    """
+
+    __slots__ = ("_load", "_runs", "_maxes", "_tree", "_size")
+
+    def __init__(self, load: int = 256) -> None:
+        self._load = load
+        self._runs: List[List[_Key]] = []
+        self._maxes: List[_Key] = []
+        self._tree: List[int] = [0]
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, key: _Key) -> None:
+        runs = self._runs
+        if not runs:
+            runs.append([key])
+            self._maxes.append(key)
+            self._size = 1
+            self._rebuild()
+            return
+        position = bisect_left(self._maxes, key)
+        if position == len(runs):
+            position -= 1
+            run = runs[position]
+            run.append(key)
+            self._maxes[position] = key
+        else:
+            run = runs[position]
+            insort(run, key)
+        self._size += 1
+        if len(run) > 2 * self._load:
+            runs[position : position + 1] = [run[: self._load], run[self._load :]]
+            self._maxes[position : position + 1] = [run[self._load - 1], run[-1]]
+            self._rebuild()
+        else:
+            self._grow(position, 1)
+
+    def remove(self, key: _Key) -> None:
+        position = bisect_left(self._maxes, key)
+        run = self._runs[position]
+        del run[bisect_left(run, key)]
+        self._size -= 1
+        if not run:
+            del self._runs[position]
+            del self._maxes[position]
+            self._rebuild()
+            return
+        self._maxes[position] = run[-1]
+        self._grow(position, -1)
+
+    def index(self, key: _Key) -> int:
+        """Zero-based position of ``key``, which must be present."""
+
+        position = bisect_left(self._maxes, key)
+        before = 0
+        node = position
+        while node > 0:
+            before += self._tree[node]
+            node &= node - 1
+        return before + bisect_left(self._runs[position], key)
+
+    def reset(self, keys: List[_Key]) -> None:
+        """Replace the contents with ``keys``, which must already be sorted."""
+
+        load = self._load
+        self._runs = [keys[start : start + load] for start in range(0, len(keys), load)]
+        self._maxes = [run[-1] for run in self._runs]
+        self._size = len(keys)
+        self._rebuild()
+
+    def head(self, count: int) -> List[_Key]:
+        keys: List[_Key] = []
+        for run in self._runs:
+            if len(keys) >= count:
+                break
+            keys.extend(run[: count - len(keys)])
+        return keys
+
+    def _grow(self, position: int, delta: int) -> None:
+        tree = self._tree
+        node = position + 1
+        while node < len(tree):
+            tree[node] += delta
+            node += node & -node
+
+    def _rebuild(self) -> None:
+        tree = [0]
+        tree.extend(len(run) for run in self._runs)
+        for node in range(1, len(tree)):
+            parent = node + (node & -node)
+            if parent < len(tree):
+                tree[parent] += tree[node]
+        self._tree = tree
+
+
+class Leaderboard:
+    """Users ranked by portfolio value: cash plus every holding marked to its last price.
+
+    A fill moves only its user's value, by the gap between the mark and the fill
+    price. Price moves reach users through the holders of each symbol, so a
+    revaluation touches the positions in symbols whose price changed and
+    re-ranks each affected user once, however many of their symbols moved.
+    """
+
+    def __init__(self, price_for: Callable[[str], float]) -> None:
+        self._price_for = price_for
+        self._index = RankIndex()
+        self._values: Dict[str, float] = {}
+        # symbol -> user -> quantity, for every non-zero position.
+        self._holders: Dict[str, Dict[str, float]] = {}
+        # The price each symbol's holders are currently valued at.
+        self._marks: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def load(self, user_id: str, cash: float, positions: Dict[str, float]) -> None:
+        """Seed a user from a stored portfolio, replacing anything already ranked."""
+
+        for holders in self._holders.values():
+            holders.pop(user_id, None)
+        value = cash
+        for symbol, quantity in positions.items():
+            if quantity:
+                self._holders.setdefault(symbol, {})[user_id] = quantity
+                value += quantity * self._mark(symbol)
+        self._move(user_id, value)
+
+    def apply_fill(self, user_id: str, symbol: str, quantity: float, price: float) -> None:
+        """Book a fill of signed ``quantity`` (negative for sells) at ``price``."""
+
+        holders = self._holders.setdefault(symbol, {})
+        mark = self._mark(symbol)
+        position = holders.get(user_id, 0.0) + quantity
+        if position:
+            holders[user_id] = position
+        else:
+            holders.pop(user_id, None)
+            if not holders:
+                # Nobody left to revalue; the next holder starts from the price of the day.
+                del self._holders[symbol]
+                del self._marks[symbol]
+        self._move(user_id, self._values.get(user_id, 0.0) + quantity * (mark - price))
+
+    def delist(self, symbol: str) -> None:
+        """Stop counting positions in ``symbol``, as a restart does for symbols no longer listed."""
+
+        holders = self._holders.pop(symbol, None)
+        mark = self._marks.pop(symbol, None)
+        if not holders:
+            return
+        for user_id, quantity in holders.items():
+            self._move(user_id, self._values[user_id] - quantity * mark)
+
+    def relist(self, symbol: str, holders: Dict[str, float]) -> None:
+        """Count positions kept through a delisting again, marked at the current price."""
+
+        if not holders:
+            return
+        self._holders[symbol] = dict(holders)
+        mark = self._mark(symbol)
+        for user_id, quantity in holders.items():
+            self._move(user_id, self._values.get(user_id, 0.0) + quantity * mark)
+
+    def revalue(self) -> int:
+        """Mark every held symbol to its current price and return how many users moved."""
+
+        deltas: Dict[str, float] = {}
+        marks = self._marks
+        for symbol, holders in self._holders.items():
+            price = self._price_for(symbol)
+            change = price - marks[symbol]
+            if not change:
+                continue
+            marks[symbol] = price
+            for user_id, quantity in holders.items():
+                deltas[user_id] = deltas.get(user_id, 0.0) + quantity * change
+        values = self._values
+        if len(deltas) * 4 > len(values):
+            # A broad move re-ranks most users; one sort is cheaper than that many reinsertions.
+            for user_id, delta in deltas.items():
+                values[user_id] += delta
+            self._index.reset(sorted((-value, user_id) for user_id, value in values.items()))
+        else:
+            for user_id, delta in deltas.items():
+                self._move(user_id, values[user_id] + delta)
+        return len(deltas)
+
+    def top(self, count: int) -> List[Tuple[str, float]]:
+        return [(user_id, -negated) for negated, user_id in self._index.head(count)]
+
+    def standing(self, user_id: str) -> Optional[Tuple[int, float]]:
+        """One-based rank and value of ``user_id``, or None when they have never traded."""
+
+        value = self._values.get(user_id)
+        if value is None:
+            return None
+        return self._index.index((-value, user_id)) + 1, value
+
+    def _mark(self, symbol: str) -> float:
+        mark = self._marks.get(symbol)
+        if mark is None:
+            mark = self._marks[symbol] = self._price_for(symbol)
+        return mark
+
+    def _move(self, user_id: str, value: float) -> None:
+        previous = self._values.get(user_id)
+        if previous == value:
+            return
+        if previous is not None:
+            self._index.remove((-previous, user_id))
+        self._values[user_id] = value
+        self._index.add((-value, user_id))
+
+
+__all__ = ["Leaderboard", "RankIndex"]
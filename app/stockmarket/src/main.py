@@ -2,28 +2,78 @@ from __future__ import annotations
 
 import asyncio
 import os
+import secrets
 from contextlib import asynccontextmanager
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import AsyncGenerator
+from typing import IO, Any, AsyncGenerator, Literal, Optional, Union
 
 import httpx
-from fastapi import Depends, FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+import orjson
+from fastapi import (
+    Body,
+    Depends,
+    FastAPI,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+)
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import ValidationError
 
+from . import metrics
 from .analytics import ClickHouseAnalyticsPipeline
-from .engine import StockMarketEngine, RiskRejection
+from .archive import TickArchive
+from .board import BoardFeed, BoardUnavailable, PriceBoardReader, PriceBoardWriter, acquire_leadership
+from .bus import MarketDataBus, MarketDataGateway
+from .diagnostics import ProfilerBusy
+from .engine import StockMarketEngine, RiskRejection, TradingHalted
+from .frames import SUBPROTOCOLS, BroadcastFrame, negotiate
+from .auctions import AuctionSchedule
+from .halts import CircuitBreaker
+from .records import (
+    CandleRecord,
+    FillRecord,
+    InstrumentChangeRecord,
+    LeaderboardRecord,
+    MakerQuoteRecord,
+    MassQuoteResult,
+    OrderRecord,
+    OrderResult,
+    PortfolioRecord,
+    QuoteRecord,
+)
+from .retention import TickRetention
 from .risk import RiskEngine
+from .snapshots import EncodedSnapshot, etag_matches
 from .storage import StockmarketStorage
+from .universe import ticker_state
 from .schemas import (
+    AuctionState,
+    Candle,
+    DepthSnapshot,
     HealthStatus,
+    InstrumentChanges,
+    InstrumentDefinition,
+    LeaderboardEntry,
+    MarketHeatmap,
+    MakerQuote,
     MarketNewsItem,
     MarketRegime,
+    MassQuoteRequest,
+    MassQuoteResponse,
     OrderRequest,
     OrderResponse,
     OrderStatus,
     PortfolioResponse,
+    Quote,
     TickerSnapshot,
     TradeFill,
+    TradingHalt,
 )
 
 app = FastAPI(title="VirtualBank Stockmarket Simulator", version="0.1.0")
@@ -39,10 +89,44 @@ _engine: StockMarketEngine | None = None
 _storage: StockmarketStorage | None = None
 _analytics: ClickHouseAnalyticsPipeline | None = None
 _http_client: httpx.AsyncClient | None = None
+_bus: MarketDataBus | None = None
+_gateway: MarketDataGateway | None = None
+_board_writer: PriceBoardWriter | None = None
+_board_feed: BoardFeed | None = None
+_leader_lock: IO[bytes] | None = None
+_retention: TickRetention | None = None
+
+# Gateways and the engine both serve snapshots and WebSocket fan-out.
+MarketFeed = Union[StockMarketEngine, MarketDataGateway]
+# Quotes and candles come from the engine itself or, on follower workers, the price board.
+QuoteSource = Union[StockMarketEngine, BoardFeed]
 
 
 TICK_INTERVAL = float(os.environ.get("STOCKMARKET_TICK_INTERVAL", "1.0"))
 NEWS_INTERVAL = float(os.environ.get("STOCKMARKET_NEWS_INTERVAL", "45"))
+SEED = int(os.environ["STOCKMARKET_SEED"]) if os.environ.get("STOCKMARKET_SEED") else None
+TRACE_CAPACITY = int(os.environ.get("STOCKMARKET_TRACE_CAPACITY", "2048"))
+REPLAY_CAPACITY = int(os.environ.get("STOCKMARKET_REPLAY_CAPACITY", "1024"))
+ADMIN_TOKEN = os.environ.get("STOCKMARKET_ADMIN_TOKEN")
+MODE = os.environ.get("STOCKMARKET_MODE", "engine").lower()
+STREAMS_ENABLED = os.environ.get("STOCKMARKET_STREAMS_ENABLED", "false").lower() == "true"
+STREAM_PREFIX = os.environ.get("STOCKMARKET_STREAM_PREFIX", "stockmarket")
+STREAM_MAXLEN = int(os.environ.get("STOCKMARKET_STREAM_MAXLEN", "10000"))
+PRICE_BOARD = os.environ.get("STOCKMARKET_PRICE_BOARD")
+HALT_THRESHOLD = float(os.environ.get("STOCKMARKET_HALT_THRESHOLD", "0"))
+HALT_WINDOW = float(os.environ.get("STOCKMARKET_HALT_WINDOW", "300"))
+HALT_DURATION = float(os.environ.get("STOCKMARKET_HALT_DURATION", "300"))
+OPENING_AUCTION = float(os.environ.get("STOCKMARKET_OPENING_AUCTION", "0"))
+CLOSING_AUCTION = float(os.environ.get("STOCKMARKET_CLOSING_AUCTION", "0"))
+LEADERBOARD_INTERVAL = float(os.environ.get("STOCKMARKET_LEADERBOARD_INTERVAL", "10"))
+LEADERBOARD_SIZE = int(os.environ.get("STOCKMARKET_LEADERBOARD_SIZE", "10"))
+ROLLUP_INTERVAL = float(os.environ.get("STOCKMARKET_ROLLUP_INTERVAL", "60"))
+TICK_RETENTION_DAYS = float(os.environ.get("STOCKMARKET_TICK_RETENTION_DAYS", "0"))
+MINUTE_BAR_RETENTION_DAYS = float(os.environ.get("STOCKMARKET_MINUTE_BAR_RETENTION_DAYS", "0"))
+RETENTION_BATCH = int(os.environ.get("STOCKMARKET_RETENTION_BATCH", "5000"))
+ARCHIVE_DIR = os.environ.get("STOCKMARKET_ARCHIVE_DIR")
+ARCHIVE_FLUSH_INTERVAL = float(os.environ.get("STOCKMARKET_ARCHIVE_FLUSH_INTERVAL", "10"))
+DATASET_WATCH_INTERVAL = float(os.environ.get("STOCKMARKET_DATASET_WATCH_INTERVAL", "0"))
 
 
 def dataset_path() -> Path:
@@ -52,21 +136,60 @@ def dataset_path() -> Path:
 
 async def get_engine() -> StockMarketEngine:
     if _engine is None:
+        if MODE == "gateway" or _board_feed is not None:
+            raise HTTPException(status_code=503, detail="This replica only serves market data")
         raise RuntimeError("Stock market engine not initialised")
     return _engine
 
 
-@app.on_event("startup")
-async def _startup() -> None:
-    global _engine, _storage, _analytics, _http_client
-    data = dataset_path()
-    if not data.exists():
-        raise RuntimeError(f"Dataset not found at {data}")
-    postgres_dsn = os.environ.get("STOCKMARKET_POSTGRES_DSN")
-    redis_url = os.environ.get("STOCKMARKET_REDIS_URL")
-    storage = StockmarketStorage(postgres_dsn, redis_url)
-    await storage.connect()
-    analytics = ClickHouseAnalyticsPipeline(
+async def get_feed() -> MarketFeed:
+    if _gateway is not None:
+        return _gateway
+    return await get_engine()
+
+
+async def get_quote_source() -> QuoteSource:
+    if _board_feed is not None:
+        return _board_feed
+    if _gateway is not None:
+        raise HTTPException(status_code=503, detail="Quotes are not served by gateway replicas")
+    return await get_engine()
+
+
+def _market_snapshot(channel: str) -> EncodedSnapshot:
+    for feed in (_engine, _board_feed, _gateway):
+        if feed is None:
+            continue
+        try:
+            return feed.snapshot(channel)
+        except KeyError:
+            continue
+        except BoardUnavailable as exc:
+            raise HTTPException(status_code=503, detail=str(exc)) from exc
+    if MODE == "gateway" or _board_feed is not None:
+        raise HTTPException(status_code=503, detail=f"{channel.capitalize()} are not served by this replica")
+    raise RuntimeError("Stock market engine not initialised")
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+def create_storage() -> StockmarketStorage:
+    return StockmarketStorage(
+        os.environ.get("STOCKMARKET_POSTGRES_DSN"),
+        os.environ.get("STOCKMARKET_REDIS_URL"),
+        pool_min_size=int(os.environ.get("STOCKMARKET_POSTGRES_POOL_MIN_SIZE", "1")),
+        pool_max_size=int(os.environ.get("STOCKMARKET_POSTGRES_POOL_MAX_SIZE", "5")),
+        statement_cache_size=int(os.environ.get("STOCKMARKET_POSTGRES_STATEMENT_CACHE_SIZE", "100")),
+    )
+
+
+def create_analytics() -> ClickHouseAnalyticsPipeline:
+    return ClickHouseAnalyticsPipeline(
         host=os.environ.get("STOCKMARKET_CLICKHOUSE_HOST"),
         port=int(os.environ.get("STOCKMARKET_CLICKHOUSE_PORT", "8123")),
         username=os.environ.get("STOCKMARKET_CLICKHOUSE_USER"),
@@ -74,11 +197,99 @@ async def _startup() -> None:
         database=os.environ.get("STOCKMARKET_CLICKHOUSE_DATABASE", "default"),
         enabled=os.environ.get("STOCKMARKET_ANALYTICS_ENABLED", "true").lower() != "false",
     )
-    await analytics.connect()
-    _http_client = httpx.AsyncClient(
-        timeout=float(os.environ.get("STOCKMARKET_HTTP_TIMEOUT", "5"))
+
+
+def create_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(timeout=float(os.environ.get("STOCKMARKET_HTTP_TIMEOUT", "5")))
+
+
+def create_bus() -> MarketDataBus | None:
+    redis_url = os.environ.get("STOCKMARKET_REDIS_URL")
+    if not STREAMS_ENABLED or not redis_url:
+        return None
+    return MarketDataBus(redis_url, prefix=STREAM_PREFIX, maxlen=STREAM_MAXLEN)
+
+
+def create_breaker() -> CircuitBreaker | None:
+    if HALT_THRESHOLD <= 0:
+        return None
+    return CircuitBreaker(threshold=HALT_THRESHOLD, window=HALT_WINDOW, halt_seconds=HALT_DURATION)
+
+
+def create_auction_schedule() -> AuctionSchedule | None:
+    if OPENING_AUCTION <= 0 and CLOSING_AUCTION <= 0:
+        return None
+    return AuctionSchedule(opening=max(0.0, OPENING_AUCTION), closing=max(0.0, CLOSING_AUCTION))
+
+
+def create_retention(storage: StockmarketStorage) -> TickRetention | None:
+    if ROLLUP_INTERVAL <= 0 or not storage.has_postgres:
+        return None
+    return TickRetention(
+        storage,
+        interval=ROLLUP_INTERVAL,
+        tick_retention=max(0.0, TICK_RETENTION_DAYS) * 86_400,
+        minute_bar_retention=max(0.0, MINUTE_BAR_RETENTION_DAYS) * 86_400,
+        batch_size=RETENTION_BATCH,
     )
+
+
+def create_archive() -> TickArchive | None:
+    if not ARCHIVE_DIR:
+        return None
+    return TickArchive(Path(ARCHIVE_DIR), flush_interval=ARCHIVE_FLUSH_INTERVAL)
+
+
+def create_gateway() -> MarketDataGateway:
+    redis_url = os.environ.get("STOCKMARKET_REDIS_URL")
+    if not redis_url:
+        raise RuntimeError("Gateway mode requires STOCKMARKET_REDIS_URL")
+    return MarketDataGateway(redis_url, prefix=STREAM_PREFIX, replay_capacity=REPLAY_CAPACITY)
+
+
+@app.on_event("startup")
+async def _startup() -> None:
+    global _engine, _storage, _analytics, _http_client, _bus, _gateway, _board_writer, _board_feed, _leader_lock
+    global _retention
+    if MODE == "gateway":
+        gateway = create_gateway()
+        await gateway.start()
+        _gateway = gateway
+        return
+    if MODE == "board" and not PRICE_BOARD:
+        raise RuntimeError("Board mode requires STOCKMARKET_PRICE_BOARD")
+    if PRICE_BOARD:
+        # One engine worker writes the board; board-mode replicas, on their own port,
+        # scale read-only market data across workers. An engine worker never follows,
+        # since it would share a port with the leader and refuse every write route.
+        if MODE == "engine":
+            _leader_lock = acquire_leadership(PRICE_BOARD)
+            if _leader_lock is None:
+                raise RuntimeError(
+                    f"Price board {PRICE_BOARD} already has an engine; "
+                    "run extra workers as a STOCKMARKET_MODE=board replica"
+                )
+        else:
+            _board_feed = BoardFeed(await PriceBoardReader.attach(PRICE_BOARD))
+            if STREAMS_ENABLED and os.environ.get("STOCKMARKET_REDIS_URL"):
+                gateway = create_gateway()
+                await gateway.start()
+                _gateway = gateway
+            return
+        _board_writer = PriceBoardWriter(PRICE_BOARD)
+    data = dataset_path()
+    if not data.exists():
+        raise RuntimeError(f"Dataset not found at {data}")
+    # Resolved through the module so harnesses can substitute local stand-ins.
+    storage = create_storage()
+    await storage.connect()
+    analytics = create_analytics()
+    await analytics.connect()
+    _http_client = create_http_client()
     risk_engine = RiskEngine(os.environ.get("STOCKMARKET_MIDDLEWARE_BASE_URL"), _http_client)
+    _bus = create_bus()
+    if _bus is not None:
+        await _bus.connect()
     engine = await StockMarketEngine.bootstrap(
         data,
         storage=storage,
@@ -86,8 +297,22 @@ async def _startup() -> None:
         analytics=analytics,
         tick_interval=TICK_INTERVAL,
         news_interval=NEWS_INTERVAL,
+        seed=SEED,
+        trace_capacity=TRACE_CAPACITY,
+        replay_capacity=REPLAY_CAPACITY,
+        bus=_bus,
+        board=_board_writer,
+        breaker=create_breaker(),
+        auctions=create_auction_schedule(),
+        leaderboard_interval=LEADERBOARD_INTERVAL,
+        leaderboard_size=LEADERBOARD_SIZE,
+        archive=create_archive(),
+        universe_watch_interval=DATASET_WATCH_INTERVAL,
     )
     await engine.start()
+    _retention = create_retention(storage)
+    if _retention is not None:
+        await _retention.start()
     _storage = storage
     _analytics = analytics
     _engine = engine
@@ -95,10 +320,29 @@ async def _startup() -> None:
 
 @app.on_event("shutdown")
 async def _shutdown() -> None:
-    global _engine, _storage, _analytics, _http_client
+    global _engine, _storage, _analytics, _http_client, _bus, _gateway, _board_writer, _board_feed, _leader_lock
+    global _retention
+    if _gateway is not None:
+        await _gateway.stop()
+        _gateway = None
+    if _board_feed is not None:
+        _board_feed.close()
+        _board_feed = None
+    if _retention is not None:
+        await _retention.stop()
+        _retention = None
     if _engine is not None:
         await _engine.stop()
         _engine = None
+    if _board_writer is not None:
+        _board_writer.close()
+        _board_writer = None
+    if _leader_lock is not None:
+        _leader_lock.close()
+        _leader_lock = None
+    if _bus is not None:
+        await _bus.close()
+        _bus = None
     if _analytics is not None:
         await _analytics.close()
         _analytics = None
@@ -116,77 +360,409 @@ async def live() -> HealthStatus:
 
 
 @app.get("/health/ready", response_model=HealthStatus)
-async def ready(engine: StockMarketEngine = Depends(get_engine)) -> HealthStatus:
-    status = "ok" if engine.is_ready else "starting"
+async def ready() -> HealthStatus:
+    feed = _board_feed or _gateway or await get_engine()
+    status = "ok" if feed.is_ready else "starting"
     return HealthStatus(status=status)
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics() -> Response:
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/admin/traces", include_in_schema=False, dependencies=[Depends(require_admin)])
+async def admin_traces(
+    kind: Optional[Literal["tick", "sinks", "order", "stops", "auction", "quotes"]] = None,
+    limit: int = Query(default=100, ge=1, le=10_000),
+    min_duration_ms: float = Query(default=0.0, ge=0),
+    engine: StockMarketEngine = Depends(get_engine),
+) -> Response:
+    spans = engine.traces(kind=kind, limit=limit, min_duration_ms=min_duration_ms)
+    return Response(content=orjson.dumps(spans), media_type="application/json")
+
+
+@app.get("/admin/scheduler", include_in_schema=False, dependencies=[Depends(require_admin)])
+async def admin_scheduler(engine: StockMarketEngine = Depends(get_engine)) -> dict[str, Any]:
+    return engine.scheduler_stats()
+
+
+@app.post("/admin/profile", include_in_schema=False, dependencies=[Depends(require_admin)])
+async def admin_profile(
+    seconds: float = Query(default=10.0, gt=0, le=300),
+    interval_ms: float = Query(default=5.0, ge=1, le=1_000),
+    engine: StockMarketEngine = Depends(get_engine),
+) -> Response:
+    try:
+        collapsed = await engine.profile(seconds, interval_ms / 1_000)
+    except ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    headers = {"Content-Disposition": 'attachment; filename="stockmarket-profile.collapsed"'}
+    return Response(content=collapsed, media_type="text/plain", headers=headers)
+
+
+@app.get("/admin/allocations", include_in_schema=False, dependencies=[Depends(require_admin)])
+async def admin_allocations(
+    seconds: float = Query(default=5.0, ge=0, le=300),
+    limit: int = Query(default=25, ge=1, le=500),
+    engine: StockMarketEngine = Depends(get_engine),
+) -> dict[str, Any]:
+    return await engine.allocation_snapshot(seconds, limit=limit)
+
+
+@app.put(
+    "/admin/instruments",
+    include_in_schema=False,
+    response_model=InstrumentChanges,
+    dependencies=[Depends(require_admin)],
+)
+async def admin_list_instruments(
+    definitions: list[InstrumentDefinition] = Body(..., min_length=1, max_length=10_000),
+    engine: StockMarketEngine = Depends(get_engine),
+) -> InstrumentChangeRecord:
+    now = datetime.now(timezone.utc)
+    return await engine.list_instruments(ticker_state(item.model_dump(), now) for item in definitions)
+
+
+@app.delete(
+    "/admin/instruments/{symbol}",
+    include_in_schema=False,
+    response_model=InstrumentChanges,
+    dependencies=[Depends(require_admin)],
+)
+async def admin_delist_instrument(
+    symbol: str, engine: StockMarketEngine = Depends(get_engine)
+) -> InstrumentChangeRecord:
+    try:
+        return await engine.delist_instruments([symbol.upper()])
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=f"Unknown symbol {symbol.upper()}") from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+
+@app.post(
+    "/admin/instruments/reload",
+    include_in_schema=False,
+    response_model=InstrumentChanges,
+    dependencies=[Depends(require_admin)],
+)
+async def admin_reload_instruments(engine: StockMarketEngine = Depends(get_engine)) -> InstrumentChangeRecord:
+    try:
+        return await engine.reload_instruments()
+    except (KeyError, TypeError, ValueError) as exc:
+        raise HTTPException(status_code=422, detail=f"Dataset could not be applied: {exc}") from exc
+
+
+def _snapshot_response(request: Request, snapshot: EncodedSnapshot) -> Response:
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+
 @app.get("/api/v1/markets/tickers", response_model=list[TickerSnapshot])
-async def tickers(engine: StockMarketEngine = Depends(get_engine)) -> list[TickerSnapshot]:
-    return await engine.tickers_snapshot()
+async def tickers(request: Request) -> Response:
+    return _snapshot_response(request, _market_snapshot("tickers"))
 
 
 @app.get("/api/v1/markets/regimes", response_model=list[MarketRegime])
-async def regimes(engine: StockMarketEngine = Depends(get_engine)) -> list[MarketRegime]:
-    return await engine.regimes()
+async def regimes(request: Request) -> Response:
+    return _snapshot_response(request, _market_snapshot("regimes"))
 
 
 @app.get("/api/v1/markets/news", response_model=list[MarketNewsItem])
-async def news(engine: StockMarketEngine = Depends(get_engine)) -> list[MarketNewsItem]:
-    return await engine.recent_news()
+async def news(request: Request) -> Response:
+    return _snapshot_response(request, _market_snapshot("news"))
+
+
+@app.get("/api/v1/markets/halts", response_model=list[TradingHalt])
+async def halts(request: Request) -> Response:
+    return _snapshot_response(request, _market_snapshot("halts"))
+
+
+@app.get("/api/v1/markets/auctions", response_model=list[AuctionState])
+async def auctions(request: Request) -> Response:
+    return _snapshot_response(request, _market_snapshot("auctions"))
+
+
+@app.get("/api/v1/markets/heatmap", response_model=MarketHeatmap)
+async def heatmap(request: Request) -> Response:
+    return _snapshot_response(request, _market_snapshot("heatmap"))
+
+
+@app.get("/api/v1/markets/{symbol}/quote", response_model=Quote)
+async def quote(symbol: str, source: QuoteSource = Depends(get_quote_source)) -> QuoteRecord:
+    try:
+        return source.quote(symbol.upper())
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=f"Unknown symbol {symbol.upper()}") from exc
+    except BoardUnavailable as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+
+@app.get("/api/v1/markets/{symbol}/candles", response_model=list[Candle])
+async def candles(symbol: str, source: QuoteSource = Depends(get_quote_source)) -> list[CandleRecord]:
+    try:
+        return source.candles(symbol.upper())
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=f"Unknown symbol {symbol.upper()}") from exc
+    except BoardUnavailable as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+
+@app.get("/api/v1/markets/{symbol}/depth", response_model=DepthSnapshot)
+async def depth(
+    symbol: str,
+    levels: int = Query(default=10, ge=1, le=500),
+    engine: StockMarketEngine = Depends(get_engine),
+) -> dict[str, Any]:
+    try:
+        return engine.depth(symbol.upper(), levels)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=f"Unknown symbol {symbol.upper()}") from exc
 
 
 @app.post("/api/v1/orders", response_model=OrderResponse)
 async def place_order(
     request: OrderRequest,
     engine: StockMarketEngine = Depends(get_engine),
-) -> OrderResponse:
+) -> OrderResult:
     try:
         return await engine.place_order(request)
     except RiskRejection as exc:
         raise HTTPException(status_code=409, detail=exc.message) from exc
+    except TradingHalted as exc:
+        raise HTTPException(status_code=409, detail=exc.message) from exc
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
 
 
 @app.get("/api/v1/orders/{order_id}", response_model=OrderStatus)
-async def get_order(order_id: str, engine: StockMarketEngine = Depends(get_engine)) -> OrderStatus:
+async def get_order(order_id: str, engine: StockMarketEngine = Depends(get_engine)) -> OrderRecord:
     status = await engine.order_status(order_id)
     if not status:
         raise HTTPException(status_code=404, detail="Order not found")
     return status
 
 
+@app.delete("/api/v1/orders/{order_id}", response_model=OrderStatus)
+async def cancel_order(order_id: str, engine: StockMarketEngine = Depends(get_engine)) -> OrderRecord:
+    cancelled = await engine.cancel_order(order_id)
+    if cancelled is not None:
+        return cancelled
+    if await engine.order_status(order_id) is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    raise HTTPException(status_code=409, detail="Order is no longer open")
+
+
+@app.get("/api/v1/users/{user_id}/orders", response_model=list[OrderStatus])
+async def user_orders(
+    user_id: str,
+    status: Literal["open", "all"] = "open",
+    limit: int = Query(default=50, ge=1, le=500),
+    # Keyset pagination: pass the order_id of the last order on the previous page.
+    before: Optional[str] = None,
+    engine: StockMarketEngine = Depends(get_engine),
+) -> list[OrderRecord]:
+    return await engine.user_orders(user_id, open_only=status == "open", limit=limit, before=before)
+
+
+@app.delete("/api/v1/users/{user_id}/orders", response_model=list[OrderStatus])
+async def cancel_user_orders(
+    user_id: str, engine: StockMarketEngine = Depends(get_engine)
+) -> list[OrderRecord]:
+    return await engine.cancel_user_orders(user_id)
+
+
+@app.post("/api/v1/quotes", response_model=MassQuoteResponse)
+async def mass_quote(
+    request: MassQuoteRequest,
+    engine: StockMarketEngine = Depends(get_engine),
+) -> MassQuoteResult:
+    try:
+        return await engine.mass_quote(request)
+    except RiskRejection as exc:
+        raise HTTPException(status_code=409, detail=exc.message) from exc
+
+
+@app.get("/api/v1/quotes/{user_id}", response_model=list[MakerQuote])
+async def maker_quotes(user_id: str, engine: StockMarketEngine = Depends(get_engine)) -> list[MakerQuoteRecord]:
+    return engine.maker_quotes(user_id)
+
+
 @app.get("/api/v1/portfolios/{user_id}", response_model=PortfolioResponse)
-async def portfolio(user_id: str, engine: StockMarketEngine = Depends(get_engine)) -> PortfolioResponse:
+async def portfolio(user_id: str, engine: StockMarketEngine = Depends(get_engine)) -> PortfolioRecord:
     return await engine.portfolio(user_id)
 
 
+@app.get("/api/v1/leaderboard", response_model=list[LeaderboardEntry])
+async def leaderboard(
+    top: int = Query(default=10, ge=1, le=1000),
+    engine: StockMarketEngine = Depends(get_engine),
+) -> list[LeaderboardRecord]:
+    return engine.leaderboard(top)
+
+
+@app.get("/api/v1/leaderboard/{user_id}", response_model=LeaderboardEntry)
+async def leaderboard_standing(user_id: str, engine: StockMarketEngine = Depends(get_engine)) -> LeaderboardRecord:
+    standing = engine.leaderboard_standing(user_id)
+    if standing is None:
+        raise HTTPException(status_code=404, detail="User has no ranked portfolio")
+    return standing
+
+
 @app.get("/api/v1/trades", response_model=list[TradeFill])
-async def trades(limit: int = 50, engine: StockMarketEngine = Depends(get_engine)) -> list[TradeFill]:
+async def trades(limit: int = 50, engine: StockMarketEngine = Depends(get_engine)) -> list[FillRecord]:
     return await engine.recent_trades(limit=limit)
 
 
 @asynccontextmanager
-async def _subscription_queue(engine: StockMarketEngine) -> AsyncGenerator[asyncio.Queue, None]:
+async def _subscription_queue(feed: MarketFeed) -> AsyncGenerator[asyncio.Queue, None]:
     queue: asyncio.Queue = asyncio.Queue(maxsize=100)
-    engine.register(queue)
+    feed.register(queue)
     try:
         yield queue
     finally:
-        engine.unregister(queue)
+        feed.unregister(queue)
 
 
 @app.websocket("/ws/ticks")
-async def ws_ticks(websocket: WebSocket, engine: StockMarketEngine = Depends(get_engine)) -> None:
-    await websocket.accept()
-    async with _subscription_queue(engine) as queue:
-        snapshot = [item.model_dump() for item in await engine.tickers_snapshot()]
-        await websocket.send_json({"type": "snapshot", "data": snapshot})
+async def ws_ticks(
+    websocket: WebSocket,
+    since: Optional[int] = None,
+    epoch: Optional[str] = None,
+    feed: MarketFeed = Depends(get_feed),
+) -> None:
+    """Broadcast event stream; the ``stockmarket.msgpack`` subprotocol selects compact binary frames."""
+
+    subprotocol = negotiate(websocket.scope.get("subprotocols", ()))
+    binary = subprotocol is not None and SUBPROTOCOLS[subprotocol] == "msgpack"
+    (metrics.WS_MSGPACK if binary else metrics.WS_JSON).inc()
+    await websocket.accept(subprotocol=subprotocol)
+    # Frames cache their encodings, so each event is encoded once per variant for every socket.
+    send = websocket.send_bytes if binary else websocket.send_text
+    encode = BroadcastFrame.binary if binary else BroadcastFrame.text
+    replay = feed.replay
+    missed = replay.since(since, epoch) if since is not None else None
+    if missed is not None:
+        metrics.WS_REPLAYED.inc()
+    try:
+        # A gap can outgrow the subscriber queue, so it is sent before joining the fan-out.
+        # Each pass picks up what was published while the previous one was being sent; a
+        # client too slow to catch up before the ring moves on gets a snapshot instead.
+        while missed:
+            for frame in missed:
+                await send(encode(frame))
+            since = missed[-1].payload["sequence"]
+            missed = replay.since(since, epoch)
+    except WebSocketDisconnect:
+        return
+    async with _subscription_queue(feed) as queue:
+        # Registration and the last ring lookup happen without yielding, so every event after
+        # the replayed gap (or the snapshot's sequence) arrives through the queue.
+        if missed is not None:
+            missed = replay.since(since, epoch)
         try:
+            if missed is not None:
+                for frame in missed:
+                    await send(encode(frame))
+            else:
+                (metrics.WS_SNAPSHOT if since is None else metrics.WS_RESUME_EXPIRED).inc()
+                if binary:
+                    await send(feed.frames.snapshot(replay.epoch, replay.sequence))
+                else:
+                    snapshot = feed.snapshot("tickers")
+                    await send(
+                        f'{{"type":"snapshot","epoch":"{replay.epoch}","sequence":{replay.sequence},"data":'
+                        + snapshot.body.decode()
+                        + "}"
+                    )
             while True:
-                payload = await queue.get()
-                await websocket.send_json(payload)
+                frame = await queue.get()
+                await send(encode(frame))
         except WebSocketDisconnect:
             return
 
+
+@app.websocket("/ws/depth")
+async def ws_depth(
+    websocket: WebSocket,
+    symbols: Optional[str] = None,
+    engine: StockMarketEngine = Depends(get_engine),
+) -> None:
+    await websocket.accept()
+    wanted = {item.strip().upper() for item in symbols.split(",") if item.strip()} if symbols else None
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
+    engine.register_depth(queue)
+    try:
+        while True:
+            symbol, message = await queue.get()
+            if wanted is None or symbol in wanted:
+                await websocket.send_text(message)
+    except WebSocketDisconnect:
+        return
+    finally:
+        engine.unregister_depth(queue)
+
+
+@app.websocket("/ws/heatmap")
+async def ws_heatmap(websocket: WebSocket, feed: MarketFeed = Depends(get_feed)) -> None:
+    await websocket.accept()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+    feed.register_heatmap(queue)
+    try:
+        # Every frame is a complete heatmap, so the current one doubles as the initial state.
+        await websocket.send_text(feed.snapshot("heatmap").body.decode())
+        while True:
+            await websocket.send_text(await queue.get())
+    except WebSocketDisconnect:
+        return
+    finally:
+        feed.unregister_heatmap(queue)
+
+
+@app.websocket("/ws/quotes")
+async def ws_quotes(
+    websocket: WebSocket,
+    user_id: str = Query(..., min_length=1),
+    engine: StockMarketEngine = Depends(get_engine),
+) -> None:
+    """Mass-quote command channel: each frame is ``{"id": ..., "quotes": [...]}`` for ``user_id``."""
+
+    await websocket.accept()
+    try:
+        while True:
+            frame = await websocket.receive_text()
+            request_id = None
+            try:
+                message = orjson.loads(frame)
+                if not isinstance(message, dict):
+                    raise ValueError("Quote frames must be JSON objects")
+                request_id = message.get("id")
+                request = MassQuoteRequest.model_validate({"user_id": user_id, "quotes": message.get("quotes")})
+                result = await engine.mass_quote(request)
+            except ValidationError as exc:
+                detail: Any = exc.errors(include_url=False, include_context=False)
+            except RiskRejection as exc:
+                detail = exc.message
+            except ValueError as exc:
+                detail = str(exc)
+            else:
+                await websocket.send_json(
+                    {
+                        "type": "quotes",
+                        "id": request_id,
+                        "data": {
+                            "user_id": result.user_id,
+                            "quotes": [quote.as_json() for quote in result.quotes],
+                            "fills": [fill.as_json() for fill in result.fills],
+                            "rejected": result.rejected,
+                        },
+                    }
+                )
+                continue
+            await websocket.send_json({"type": "error", "id": request_id, "detail": detail})
+    except WebSocketDisconnect:
+        return
@@ -1,22 +1,38 @@
 from __future__ import annotations
 from __future__ import annotations
 
+import random
+import time
 import uuid
 from collections import defaultdict, deque
 from datetime import datetime, timezone
-from typing import Deque, Dict, List, Optional, Set, Tuple
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
 
+from . import metrics
 from .analytics import ClickHouseAnalyticsPipeline
+from .archive import TickArchive
+from .auctions import AuctionCall, AuctionSchedule, clearing_price
+from .clock import Clock, SystemClock
+from .depth import DepthBook, DepthUpdate, Level
+from .diagnostics import TraceSpan
+from .halts import TradingHalted
+from .leaderboard import Leaderboard
 from .pricing import PricingService
 from .risk import RiskEngine
-from .schemas import (
-    OrderRequest,
-    OrderResponse,
-    OrderStatus,
-    PortfolioHolding,
-    PortfolioResponse,
-    TradeFill,
+from .records import (
+    OPEN_ORDER_STATUSES,
+    AuctionRecord,
+    FillRecord,
+    HoldingRecord,
+    LeaderboardRecord,
+    MakerQuoteRecord,
+    MassQuoteResult,
+    OrderRecord,
+    OrderResult,
+    PortfolioRecord,
 )
+from .schemas import MassQuoteRequest, OrderRequest
+from .stops import TriggerIndex
 from .storage import StockmarketStorage
 
 
@@ -29,52 +45,98 @@ class MatchingService:
         storage: StockmarketStorage,
         risk: RiskEngine,
         analytics: ClickHouseAnalyticsPipeline,
+        *,
+        clock: Optional[Clock] = None,
+        seed: Optional[int] = None,
+        auctions: Optional[AuctionSchedule] = None,
+        archive: Optional[TickArchive] = None,
     ) -> None:
         self._pricing = pricing
         self._storage = storage
         self._risk = risk
         self._analytics = analytics
+        self._archive = archive
+        self._clock: Clock = clock or SystemClock()
+        # Seeded runs derive order ids from their own stream so replays reproduce them.
+        self._id_rng = random.Random(f"{seed}:orders") if seed is not None else None
         self._order_books: Dict[str, Dict[str, List[Tuple[float, float, str, datetime]]]] = {
             symbol: {"BUY": [], "SELL": []} for symbol in pricing.symbols()
         }
-        self._orders: Dict[str, OrderStatus] = {}
-        self._trades: Deque[TradeFill] = deque(maxlen=1000)
+        # (symbol, side) -> ids withdrawn since that side was last read. Their depth is
+        # already gone; the entries are dropped in one pass by _book() before the next read.
+        self._withdrawn: Dict[Tuple[str, str], Set[str]] = defaultdict(set)
+        self._depth: Dict[str, DepthBook] = {symbol: DepthBook(symbol) for symbol in pricing.symbols()}
+        self._stops: Dict[str, TriggerIndex] = {symbol: TriggerIndex() for symbol in pricing.symbols()}
+        # DAY orders in arrival order, so expiry only looks at the oldest ones.
+        self._day_orders: Deque[OrderRecord] = deque()
+        self._auctions = auctions
+        self._call: Optional[AuctionCall] = None
+        self._orders: Dict[str, OrderRecord] = {}
+        # user -> open orders by id, kept in step with every persisted status change.
+        # Quote sides are left out: they are managed and listed as quotes, not orders.
+        self._open_orders: Dict[str, Dict[str, OrderRecord]] = defaultdict(dict)
+        # Symbols each maker quotes; the quote sides themselves live in _orders under quote_id().
+        self._maker_symbols: Dict[str, Dict[str, None]] = defaultdict(dict)
+        self._trades: Deque[FillRecord] = deque(maxlen=1000)
         self._portfolios: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
         self._cash_balances: Dict[str, float] = defaultdict(float)
+        self._leaderboard = Leaderboard(pricing.price_for)
 
     async def warm_state(self) -> None:
         open_orders = await self._storage.load_open_orders()
-        for order in open_orders:
+        for order in sorted(open_orders, key=lambda item: item.created_at):
             self._orders[order.order_id] = order
-            if order.remaining_quantity > 0:
+            self._index_order(order)
+            if order.time_in_force == "DAY":
+                self._day_orders.append(order)
+            if order.status == "PENDING":
+                self._stops[order.symbol].add(order.order_id, order.side, float(order.stop_price))
+            elif order.remaining_quantity > 0:
                 price = order.price if order.price is not None else self._pricing.price_for(order.symbol)
                 self._order_books[order.symbol][order.side].append(
                     (float(price), order.remaining_quantity, order.order_id, order.created_at)
                 )
+                self._depth[order.symbol].change(order.side, float(price), order.remaining_quantity)
+        for quote in await self._storage.load_quotes():
+            if quote.symbol not in self._order_books:
+                continue
+            self._maker_symbols[quote.user_id][quote.symbol] = None
+            for side, price, size in (("BUY", quote.bid_price, quote.bid_size), ("SELL", quote.ask_price, quote.ask_size)):
+                if size and price is not None:
+                    order = self._quote_order(quote.user_id, quote.symbol, side, price, size, quote.updated_at)
+                    self._order_books[quote.symbol][side].append((price, size, order.order_id, quote.updated_at))
+                    self._depth[quote.symbol].change(side, price, size)
+        for depth in self._depth.values():
+            # Restored levels are part of the initial snapshot, not an update.
+            depth.flush()
         portfolios = await self._storage.load_all_portfolios()
         for portfolio in portfolios:
-            self._cash_balances[portfolio.user_id] = portfolio.cash
-            for holding in portfolio.holdings:
-                self._portfolios[portfolio.user_id][holding.symbol] = holding.quantity
+            self._restore_portfolio(portfolio)
         trades = await self._storage.load_recent_trades(limit=1000)
         for trade in sorted(trades, key=lambda item: item.executed_at):
             self._trades.append(trade)
 
-    async def place_order(self, request: OrderRequest) -> OrderResponse:
+    async def place_order(self, request: OrderRequest, *, trace: Optional[TraceSpan] = None) -> OrderResult:
+        if trace is None:
+            trace = TraceSpan(kind="order", started_at=self._clock.now())
         symbol = request.symbol.upper()
         if symbol not in self._order_books:
             raise ValueError(f"Unknown symbol {symbol}")
+        halt = self._pricing.halt(symbol)
+        if halt is not None:
+            raise TradingHalted(f"Trading in {symbol} is halted until {halt.resumes_at.isoformat()}")
         normalised_request = request.model_copy(update={"symbol": symbol})
         notional_price = (
             normalised_request.price
-            if normalised_request.price is not None
-            else self._pricing.price_for(symbol)
+            or normalised_request.stop_price
+            or self._pricing.price_for(symbol)
         )
         notional = float(notional_price) * normalised_request.quantity
-        await self._risk.ensure_credit_limit(normalised_request, notional)
-        order_id = str(uuid.uuid4())
-        now = datetime.now(timezone.utc)
-        status = OrderStatus(
+        with trace.stage("risk_check", metrics.ORDER_RISK_CHECK):
+            await self._risk.ensure_credit_limit(normalised_request, notional)
+        order_id = self._next_order_id()
+        now = self._clock.now()
+        status = OrderRecord(
             order_id=order_id,
             user_id=normalised_request.user_id,
             symbol=symbol,
@@ -86,25 +148,655 @@ class MatchingService:
             status="ACCEPTED",
             created_at=now,
             updated_at=now,
+            time_in_force=normalised_request.time_in_force,
+            stop_price=normalised_request.stop_price,
         )
         self._orders[order_id] = status
-        fills, touched_users = self._match(status)
-        status.updated_at = datetime.now(timezone.utc)
-        await self._storage.record_order_status(status)
-        for counter_id in {fill.counter_order_id for fill in fills if fill.counter_order_id}:
-            if not counter_id:
-                continue
-            counter_status = self._orders.get(counter_id)
-            if counter_status:
-                await self._storage.record_order_status(counter_status)
+        if status.time_in_force == "DAY":
+            self._day_orders.append(status)
+        with trace.stage("match", metrics.ORDER_MATCH):
+            if status.stop_price is not None and not self._stop_reached(status):
+                status.status = "PENDING"
+                self._stops[symbol].add(order_id, status.side, float(status.stop_price))
+                fills: List[FillRecord] = []
+                touched_users = {status.user_id}
+            else:
+                fills, touched_users = self._execute(status)
+        return await self._finish(status, fills, touched_users, notional, trace)
+
+    async def _finish(
+        self,
+        status: OrderRecord,
+        fills: List[FillRecord],
+        touched_users: Set[str],
+        notional: float,
+        trace: TraceSpan,
+    ) -> OrderResult:
+        status.updated_at = self._clock.now()
+        started = time.perf_counter()
+        counters = [
+            self._orders[counter_id]
+            for counter_id in dict.fromkeys(fill.counter_order_id for fill in fills)
+            if counter_id and counter_id in self._orders
+        ]
+        portfolios = await self._persist_execution([status, *counters], fills, touched_users)
+        persisted = time.perf_counter()
         if fills:
-            await self._storage.record_trades(fills)
             await self._risk.publish_fills(status, fills)
         await self._risk.publish_order(status, notional)
-        await self._persist_portfolios(touched_users)
-        return OrderResponse(order=status, fills=fills)
+        published = time.perf_counter()
+        await self._publish_portfolios(portfolios)
+        persist_seconds = (persisted - started) + (time.perf_counter() - published)
+        metrics.ORDER_PUBLISH.observe(published - persisted)
+        metrics.ORDER_PERSIST.observe(persist_seconds)
+        trace.record("publish", published - persisted)
+        trace.record("persist", persist_seconds)
+        return OrderResult(order=status, fills=fills)
+
+    async def mass_quote(self, request: MassQuoteRequest, *, trace: Optional[TraceSpan] = None) -> MassQuoteResult:
+        """Replace a maker's two-sided quotes on many symbols in one pass.
+
+        Each side is a single book entry per maker and symbol that is updated in
+        place: shrinking it at the same price keeps its time priority, while a new
+        price or a larger size re-queues it behind the level. A quote that crosses
+        the book trades like a limit order. Quote sides are persisted as one compact
+        row per symbol, never as order history.
+        """
+
+        if trace is None:
+            trace = TraceSpan(kind="quotes", started_at=self._clock.now())
+        user_id = request.user_id
+        rejected: Dict[str, str] = {}
+        entries = []
+        for entry in request.quotes:
+            symbol = entry.symbol.upper()
+            if symbol not in self._order_books:
+                rejected[symbol] = f"Unknown symbol {symbol}"
+                continue
+            halt = self._pricing.halt(symbol)
+            if halt is not None:
+                rejected[symbol] = f"Trading in {symbol} is halted until {halt.resumes_at.isoformat()}"
+                continue
+            entries.append((symbol, entry))
+        notional = sum((entry.bid_price or 0.0) * entry.bid_size for _, entry in entries)
+        with trace.stage("risk_check", metrics.ORDER_RISK_CHECK):
+            await self._risk.ensure_quote_credit(user_id, notional)
+        now = self._clock.now()
+        changed: List[str] = []
+        results: List[OrderResult] = []
+        touched_users: Set[str] = set()
+        with trace.stage("match", metrics.ORDER_MATCH):
+            for symbol, entry in entries:
+                updated = False
+                for side, price, size in (
+                    ("BUY", entry.bid_price, entry.bid_size),
+                    ("SELL", entry.ask_price, entry.ask_size),
+                ):
+                    result = self._requote(user_id, symbol, side, price if size else None, size, now)
+                    if result is None:
+                        continue
+                    updated = True
+                    if result.fills:
+                        results.append(result)
+                        touched_users.update(self._orders[fill.counter_order_id].user_id for fill in result.fills)
+                if updated:
+                    self._maker_symbols[user_id][symbol] = None
+                    changed.append(symbol)
+        fills = [fill for result in results for fill in result.fills]
+        quotes = [self._maker_quote(user_id, symbol) for symbol, _ in entries]
+        started = time.perf_counter()
+        if fills:
+            touched_users.add(user_id)
+        # The maker's own sides are written from ``quotes``; counterparties may be anyone's.
+        counters = [self._orders[counter_id] for counter_id in dict.fromkeys(fill.counter_order_id for fill in fills)]
+        portfolios = await self._persist_execution(
+            counters,
+            fills,
+            touched_users,
+            quotes=[quote for quote in quotes if quote.symbol in changed],
+        )
+        for result in results:
+            await self._risk.publish_fills(result.order, result.fills)
+        await self._publish_portfolios(portfolios)
+        trace.record("persist", time.perf_counter() - started)
+        trace.attributes["changed"] = len(changed)
+        return MassQuoteResult(user_id=user_id, quotes=quotes, fills=fills, rejected=rejected, orders=results)
+
+    def maker_quotes(self, user_id: str) -> List[MakerQuoteRecord]:
+        return [self._maker_quote(user_id, symbol) for symbol in self._maker_symbols.get(user_id, ())]
+
+    def _requote(
+        self, user_id: str, symbol: str, side: str, price: Optional[float], size: int, now: datetime
+    ) -> Optional[OrderResult]:
+        """Move one quote side to ``price`` x ``size``; returns None when nothing changed."""
+
+        current = self._orders.get(quote_id(user_id, symbol, side))
+        live = current is not None and current.status in OPEN_ORDER_STATUSES
+        if live and price is not None and current.price == price and size <= current.remaining_quantity:
+            if size == current.remaining_quantity:
+                metrics.QUOTE_UNCHANGED.inc()
+                return None
+            # Shrinking in place keeps the entry, and with it the side's time priority.
+            self._resize(current, size)
+            current.updated_at = now
+            metrics.QUOTE_RESIZED.inc()
+            return OrderResult(order=current, fills=[])
+        if live:
+            self._withdraw(current)
+            current.status = "CANCELLED"
+            current.updated_at = now
+        if price is None:
+            if not live:
+                metrics.QUOTE_UNCHANGED.inc()
+                return None
+            metrics.QUOTE_PULLED.inc()
+            return OrderResult(order=current, fills=[])
+        order = self._quote_order(user_id, symbol, side, price, size, now)
+        fills, _ = self._execute(order)
+        metrics.QUOTE_REPLACED.inc()
+        return OrderResult(order=order, fills=fills)
+
+    def _quote_order(
+        self, user_id: str, symbol: str, side: str, price: float, size: int, now: datetime
+    ) -> OrderRecord:
+        order = OrderRecord(
+            order_id=quote_id(user_id, symbol, side),
+            user_id=user_id,
+            symbol=symbol,
+            side=side,
+            order_type="quote",
+            quantity=size,
+            remaining_quantity=size,
+            price=price,
+            status="ACCEPTED",
+            created_at=now,
+            updated_at=now,
+        )
+        self._orders[order.order_id] = order
+        return order
+
+    def _maker_quote(self, user_id: str, symbol: str) -> MakerQuoteRecord:
+        bid = self._orders.get(quote_id(user_id, symbol, "BUY"))
+        ask = self._orders.get(quote_id(user_id, symbol, "SELL"))
+        bid_live = bid is not None and bid.status in OPEN_ORDER_STATUSES
+        ask_live = ask is not None and ask.status in OPEN_ORDER_STATUSES
+        stamps = [order.updated_at for order in (bid, ask) if order is not None]
+        return MakerQuoteRecord(
+            user_id=user_id,
+            symbol=symbol,
+            bid_price=bid.price if bid_live else None,
+            bid_size=bid.remaining_quantity if bid_live else 0,
+            ask_price=ask.price if ask_live else None,
+            ask_size=ask.remaining_quantity if ask_live else 0,
+            updated_at=max(stamps) if stamps else self._clock.now(),
+        )
+
+    async def _persist_execution(
+        self,
+        orders: List[OrderRecord],
+        fills: List[FillRecord],
+        users: Set[str],
+        *,
+        quotes: Optional[List[MakerQuoteRecord]] = None,
+    ) -> List[PortfolioRecord]:
+        """Write the orders, fills, and positions of one execution in a single storage call.
+
+        Quote sides are stored as their maker's quote row rather than order history.
+        Returns the portfolio snapshots written, for publishing once they are durable.
+        """
+
+        statuses: Dict[str, OrderRecord] = {}
+        maker_quotes = {(quote.user_id, quote.symbol): quote for quote in quotes or ()}
+        for order in orders:
+            if order.order_type != "quote":
+                statuses[order.order_id] = order
+                self._index_order(order)
+            elif (order.user_id, order.symbol) not in maker_quotes:
+                maker_quotes[order.user_id, order.symbol] = self._maker_quote(order.user_id, order.symbol)
+        portfolios = [self._portfolio_snapshot(user_id) for user_id in users]
+        await self._storage.record_execution(
+            list(statuses.values()), fills, list(maker_quotes.values()), portfolios
+        )
+        if self._archive is not None and fills:
+            self._archive.append_trades(fills)
+        return portfolios
+
+    def _index_order(self, order: OrderRecord) -> None:
+        if order.status in OPEN_ORDER_STATUSES:
+            self._open_orders[order.user_id][order.order_id] = order
+            return
+        open_orders = self._open_orders.get(order.user_id)
+        if open_orders is not None:
+            open_orders.pop(order.order_id, None)
+            if not open_orders:
+                del self._open_orders[order.user_id]
+
+    async def user_orders(
+        self, user_id: str, *, open_only: bool, limit: int, before: Optional[str] = None
+    ) -> List[OrderRecord]:
+        """A page of ``user_id``'s orders, newest first, starting after the order ``before``.
+
+        Open orders come from the per-user index; the full history is read from
+        storage, where every order is written before its result is returned.
+        """
+
+        if not open_only and self._storage.has_postgres:
+            return await self._storage.load_user_orders(user_id, limit, before)
+        if open_only:
+            candidates = [
+                order for order in self._open_orders.get(user_id, {}).values() if order.status in OPEN_ORDER_STATUSES
+            ]
+        else:
+            # Without Postgres the orders of this process are all the history there is.
+            candidates = [
+                order for order in self._orders.values() if order.user_id == user_id and order.order_type != "quote"
+            ]
+        candidates.sort(key=_recency, reverse=True)
+        if before is not None:
+            cursor = self._orders.get(before)
+            if cursor is None:
+                return []
+            candidates = [order for order in candidates if _recency(order) < _recency(cursor)]
+        return candidates[:limit]
+
+    async def cancel_order(self, order_id: str) -> Optional[OrderRecord]:
+        """Withdraw one open order; returns None when it is unknown, already closed, or a quote side."""
+
+        order = self._orders.get(order_id)
+        if order is None or order.order_type == "quote" or order.status not in OPEN_ORDER_STATUSES:
+            return None
+        await self._cancel([order])
+        return order
+
+    async def cancel_user_orders(self, user_id: str) -> List[OrderRecord]:
+        """Withdraw every open order of ``user_id``, touching only that user's orders."""
+
+        open_orders = [
+            order for order in self._open_orders.get(user_id, {}).values() if order.status in OPEN_ORDER_STATUSES
+        ]
+        await self._cancel(open_orders)
+        return open_orders
+
+    async def _cancel(self, orders: List[OrderRecord]) -> None:
+        now = self._clock.now()
+        for order in orders:
+            self._withdraw(order)
+            order.status = "CANCELLED"
+            order.updated_at = now
+        await self._persist_execution(orders, [], set())
+
+    def crossed_stops(self) -> List[str]:
+        """Symbols whose current price has reached at least one pending stop."""
+
+        if self._call is not None:
+            # Stops wait for the uncross like every other order.
+            return []
+        return [
+            symbol
+            for symbol, stops in self._stops.items()
+            if stops
+            and stops.crossed(self._pricing.price_for(symbol))
+            and not self._pricing.is_halted(symbol)
+        ]
+
+    async def trigger_stops(self, symbol: str, *, trace: Optional[TraceSpan] = None) -> List[OrderResult]:
+        """Activate every stop on ``symbol`` crossed by its last price, including cascades."""
+
+        if trace is None:
+            trace = TraceSpan(kind="stops", started_at=self._clock.now())
+        stops = self._stops[symbol]
+        results: List[OrderResult] = []
+        while stops and not self._pricing.is_halted(symbol):
+            # Fills from one activation move the last price, which can cross further stops.
+            fired = stops.pop_crossed(self._pricing.price_for(symbol))
+            if not fired:
+                break
+            for position, order_id in enumerate(fired):
+                if self._pricing.is_halted(symbol):
+                    # A cascade tripped the breaker; the rest wait for the next crossing after resume.
+                    for pending_id in fired[position:]:
+                        pending = self._orders[pending_id]
+                        stops.add(pending_id, pending.side, float(pending.stop_price))
+                    break
+                order = self._orders[order_id]
+                with trace.stage("match", metrics.ORDER_MATCH):
+                    fills, touched_users = self._execute(order)
+                notional = float(order.price or order.stop_price) * order.quantity
+                results.append(await self._finish(order, fills, touched_users, notional, trace))
+        return results
+
+    def has_expired_day_orders(self) -> bool:
+        return bool(self._day_orders) and self._day_orders[0].created_at < self._trading_day_start()
+
+    async def expire_day_orders(self) -> List[OrderRecord]:
+        """Withdraw DAY orders created before the current trading day (UTC midnight)."""
+
+        day_start = self._trading_day_start()
+        now = self._clock.now()
+        expired: List[OrderRecord] = []
+        while self._day_orders and self._day_orders[0].created_at < day_start:
+            order = self._day_orders.popleft()
+            if order.status not in OPEN_ORDER_STATUSES:
+                continue
+            self._withdraw(order)
+            order.status = "EXPIRED"
+            order.updated_at = now
+            expired.append(order)
+        await self._persist_execution(expired, [], set())
+        return expired
+
+    def _trading_day_start(self) -> datetime:
+        now = self._clock.now().astimezone(timezone.utc)
+        return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def list_symbols(self, symbols: Iterable[str]) -> None:
+        """Open empty books for newly listed symbols.
+
+        Positions kept through an earlier delisting count towards their holders'
+        leaderboard value again.
+        """
+
+        listed: Set[str] = set()
+        for symbol in symbols:
+            if symbol in self._order_books:
+                continue
+            self._order_books[symbol] = {"BUY": [], "SELL": []}
+            self._depth[symbol] = DepthBook(symbol)
+            self._stops[symbol] = TriggerIndex()
+            listed.add(symbol)
+        if not listed:
+            return
+        holders: Dict[str, Dict[str, float]] = defaultdict(dict)
+        for user_id, positions in self._portfolios.items():
+            for symbol, quantity in positions.items():
+                if quantity and symbol in listed:
+                    holders[symbol][user_id] = quantity
+        for symbol, positions in holders.items():
+            self._leaderboard.relist(symbol, positions)
+
+    async def delist_symbols(self, symbols: Iterable[str]) -> List[OrderRecord]:
+        """Cancel every open order in ``symbols`` and close their books.
+
+        Positions stay in their holders' portfolios, valued at the last price,
+        but no longer count towards the leaderboard. Returns the cancelled orders.
+        """
+
+        now = self._clock.now()
+        cancelled: List[OrderRecord] = []
+        for symbol in symbols:
+            book = self._order_books.pop(symbol, None)
+            if book is None:
+                continue
+            del self._depth[symbol]
+            for side in ("BUY", "SELL"):
+                self._withdrawn.pop((symbol, side), None)
+            order_ids = [entry[2] for entries in book.values() for entry in entries]
+            order_ids.extend(self._stops.pop(symbol).order_ids())
+            call = self._call
+            if call is not None:
+                order_ids.extend(order.order_id for order in call.market_orders.pop(symbol, ()))
+                call.symbols.pop(symbol, None)
+                call.changed.pop(symbol, None)
+                call.indicative.pop(symbol, None)
+            for order_id in order_ids:
+                order = self._orders.get(order_id)
+                if order is None or order.status not in OPEN_ORDER_STATUSES:
+                    continue
+                order.status = "CANCELLED"
+                order.updated_at = now
+                cancelled.append(order)
+            for quoted in self._maker_symbols.values():
+                quoted.pop(symbol, None)
+            self._leaderboard.delist(symbol)
+        await self._persist_execution(cancelled, [], set())
+        return cancelled
+
+    @property
+    def auction(self) -> Optional[AuctionCall]:
+        return self._call
+
+    def auction_due(self) -> bool:
+        """Whether a call period should uncross or open now."""
+
+        if self._auctions is None:
+            return False
+        now = self._clock.now()
+        if self._call is not None:
+            return now >= self._call.uncross_at
+        return self._auctions.call_at(now) is not None
+
+    def open_auction(self) -> Optional[AuctionCall]:
+        scheduled = self._auctions.call_at(self._clock.now()) if self._auctions is not None else None
+        if scheduled is not None and self._call is None:
+            session, uncross_at = scheduled
+            self._call = AuctionCall(session=session, uncross_at=uncross_at)
+        return self._call
+
+    def indicative_auctions(self) -> List[AuctionRecord]:
+        """Recompute the indicative uncross of every symbol whose call book changed."""
+
+        call = self._call
+        if call is None or not call.changed:
+            return []
+        records: List[AuctionRecord] = []
+        for symbol in call.changed:
+            book = self._book(symbol)
+            market_buys, market_sells = self._queued_quantities(call, symbol)
+            uncross = clearing_price(
+                _levels(book["BUY"]),
+                _levels(book["SELL"]),
+                market_buys,
+                market_sells,
+                self._pricing.price_for(symbol),
+            )
+            record = AuctionRecord(
+                symbol=symbol,
+                session=call.session,
+                status="INDICATIVE",
+                price=None if uncross is None else round(uncross.price, 2),
+                volume=0 if uncross is None else uncross.volume,
+                imbalance=0 if uncross is None else uncross.imbalance,
+                uncross_at=call.uncross_at,
+            )
+            call.indicative[symbol] = record
+            records.append(record)
+        call.changed.clear()
+        return records
+
+    def auction_states(self) -> List[AuctionRecord]:
+        return list(self._call.indicative.values()) if self._call is not None else []
+
+    async def uncross_auction(
+        self, *, trace: Optional[TraceSpan] = None
+    ) -> Tuple[List[OrderResult], List[AuctionRecord]]:
+        """Close the current call period and fill every crossing order at one price per symbol.
+
+        Each symbol's clearing price comes from a single pass over its cumulative
+        demand and supply; the crossing orders are then paired off in price-time
+        order and persisted together, so a symbol's opening burst costs one sort
+        and one batch of writes instead of a book walk and a round of writes per
+        order. Market orders left over after the uncross are cancelled.
+        """
+
+        if trace is None:
+            trace = TraceSpan(kind="auction", started_at=self._clock.now())
+        call = self._call
+        self._call = None
+        if call is None:
+            return [], []
+        now = self._clock.now()
+        changed: Dict[str, OrderRecord] = {}
+        fills_by_order: Dict[str, List[FillRecord]] = defaultdict(list)
+        touched_users: Set[str] = set()
+        records: List[AuctionRecord] = []
+        with trace.stage("uncross"):
+            for symbol in call.symbols:
+                market = call.market_orders.get(symbol, [])
+                record = self._uncross_symbol(call, symbol, market, now, changed, fills_by_order, touched_users)
+                if record is not None:
+                    records.append(record)
+                for order in market:
+                    if order.remaining_quantity > 0:
+                        order.status = "CANCELLED"
+                        order.updated_at = now
+                        changed[order.order_id] = order
+        results = [OrderResult(order=order, fills=fills_by_order.get(order_id, [])) for order_id, order in changed.items()]
+        fills = [fill for result in results for fill in result.fills]
+        with trace.stage("persist"):
+            portfolios = await self._persist_execution(list(changed.values()), fills, touched_users)
+            for result in results:
+                if result.fills:
+                    await self._risk.publish_fills(result.order, result.fills)
+            await self._publish_portfolios(portfolios)
+        return results, records
+
+    def _uncross_symbol(
+        self,
+        call: AuctionCall,
+        symbol: str,
+        market: List[OrderRecord],
+        now: datetime,
+        changed: Dict[str, OrderRecord],
+        fills_by_order: Dict[str, List[FillRecord]],
+        touched_users: Set[str],
+    ) -> Optional[AuctionRecord]:
+        book = self._book(symbol)
+        market_buys, market_sells = self._queued_quantities(call, symbol)
+        uncross = clearing_price(
+            _levels(book["BUY"]), _levels(book["SELL"]), market_buys, market_sells, self._pricing.price_for(symbol)
+        )
+        if uncross is None:
+            return None
+        price = uncross.price
+        # Market orders go first, then limits from the most aggressive price, each in arrival order.
+        buys = [order for order in market if order.side == "BUY"] + [
+            self._orders[order_id]
+            for _, _, order_id, _ in sorted(
+                (entry for entry in book["BUY"] if entry[0] >= price), key=lambda entry: (-entry[0], entry[3])
+            )
+        ]
+        sells = [order for order in market if order.side == "SELL"] + [
+            self._orders[order_id]
+            for _, _, order_id, _ in sorted(
+                (entry for entry in book["SELL"] if entry[0] <= price), key=lambda entry: (entry[0], entry[3])
+            )
+        ]
+        fill_price = round(price, 2)
+        remaining = uncross.volume
+        buy_orders = iter(buys)
+        sell_orders = iter(sells)
+        buy = next(buy_orders)
+        sell = next(sell_orders)
+        while remaining:
+            quantity = min(buy.remaining_quantity, sell.remaining_quantity, remaining)
+            # The later arrival plays the incoming order, as it would have in continuous matching.
+            incoming, resting = (buy, sell) if buy.created_at >= sell.created_at else (sell, buy)
+            fill = FillRecord(
+                order_id=incoming.order_id,
+                counter_order_id=resting.order_id,
+                symbol=symbol,
+                price=fill_price,
+                quantity=quantity,
+                executed_at=now,
+            )
+            self._trades.append(fill)
+            fills_by_order[incoming.order_id].append(fill)
+            for order in (buy, sell):
+                order.remaining_quantity -= quantity
+                order.status = "FILLED" if order.remaining_quantity == 0 else "PARTIALLY_FILLED"
+                order.updated_at = now
+                changed[order.order_id] = order
+                touched_users.add(order.user_id)
+                self._apply_fill(order.user_id, symbol, order.side, quantity, price)
+            remaining -= quantity
+            if remaining and buy.remaining_quantity == 0:
+                buy = next(buy_orders)
+            if remaining and sell.remaining_quantity == 0:
+                sell = next(sell_orders)
+        depth = self._depth[symbol]
+        for side in ("BUY", "SELL"):
+            resting_entries: List[Tuple[float, float, str, datetime]] = []
+            for entry in book[side]:
+                entry_price, quantity, order_id, created = entry
+                left = self._orders[order_id].remaining_quantity
+                if left != quantity:
+                    depth.change(side, entry_price, left - quantity)
+                if left:
+                    resting_entries.append(entry if left == quantity else (entry_price, left, order_id, created))
+            book[side] = resting_entries
+        self._pricing.record_trade(symbol, uncross.volume, price)
+        metrics.AUCTION_UNCROSSES.labels(call.session).inc()
+        return AuctionRecord(
+            symbol=symbol,
+            session=call.session,
+            status="UNCROSSED",
+            price=fill_price,
+            volume=uncross.volume,
+            imbalance=uncross.imbalance,
+            uncross_at=call.uncross_at,
+        )
+
+    def _queued_quantities(self, call: AuctionCall, symbol: str) -> Tuple[int, int]:
+        buys = sells = 0
+        for order in call.market_orders.get(symbol, ()):
+            if order.side == "BUY":
+                buys += order.remaining_quantity
+            else:
+                sells += order.remaining_quantity
+        return buys, sells
+
+    def _stop_reached(self, order: OrderRecord) -> bool:
+        price = self._pricing.price_for(order.symbol)
+        if order.side == "BUY":
+            return price >= float(order.stop_price)
+        return price <= float(order.stop_price)
+
+    def _resize(self, order: OrderRecord, size: int) -> None:
+        """Shrink a resting order to ``size`` without moving it in its queue."""
 
-    async def order_status(self, order_id: str) -> Optional[OrderStatus]:
+        side_book = self._book(order.symbol)[order.side]
+        for position, (price, quantity, order_id, created) in enumerate(side_book):
+            if order_id == order.order_id:
+                side_book[position] = (price, size, order_id, created)
+                self._depth[order.symbol].change(order.side, price, size - quantity)
+                break
+        order.quantity -= order.remaining_quantity - size
+        order.remaining_quantity = size
+        if self._call is not None:
+            self._call.changed[order.symbol] = None
+
+    def _withdraw(self, order: OrderRecord) -> None:
+        """Take an open order out of the trigger index or the book."""
+
+        if order.status == "PENDING":
+            self._stops[order.symbol].discard(order.order_id)
+            return
+        if self._call is not None and self._call.discard(order):
+            return
+        if order.price is None:
+            # Only market orders restored mid-call rest without a price of their own.
+            side_book = self._book(order.symbol)[order.side]
+            for position, (price, quantity, order_id, _) in enumerate(side_book):
+                if order_id == order.order_id:
+                    del side_book[position]
+                    self._depth[order.symbol].change(order.side, price, -quantity)
+                    return
+            return
+        # A resting entry always sits at the order's price with its remaining quantity.
+        self._depth[order.symbol].change(order.side, float(order.price), -order.remaining_quantity)
+        self._withdrawn[order.symbol, order.side].add(order.order_id)
+
+    def _book(self, symbol: str) -> Dict[str, List[Tuple[float, float, str, datetime]]]:
+        """``symbol``'s order book, with entries withdrawn since the last read dropped."""
+
+        book = self._order_books[symbol]
+        for side in ("BUY", "SELL"):
+            withdrawn = self._withdrawn.pop((symbol, side), None)
+            if withdrawn:
+                book[side][:] = [entry for entry in book[side] if entry[2] not in withdrawn]
+        return book
+
+    async def order_status(self, order_id: str) -> Optional[OrderRecord]:
         if order_id in self._orders:
             return self._orders[order_id]
         loaded = await self._storage.load_order(order_id)
@@ -112,36 +804,69 @@ class MatchingService:
             self._orders[order_id] = loaded
         return loaded
 
-    async def portfolio(self, user_id: str) -> PortfolioResponse:
+    async def portfolio(self, user_id: str) -> PortfolioRecord:
         if user_id not in self._portfolios:
             stored = await self._storage.load_portfolio(user_id)
             if stored:
-                self._cash_balances[user_id] = stored.cash
-                for holding in stored.holdings:
-                    self._portfolios[user_id][holding.symbol] = holding.quantity
+                self._restore_portfolio(stored)
                 return stored
-        holdings = [
-            PortfolioHolding(
-                symbol=symbol,
-                quantity=int(quantity),
-                market_value=round(quantity * self._pricing.price_for(symbol), 2),
-                last_price=round(self._pricing.price_for(symbol), 2),
-            )
-            for symbol, quantity in self._portfolios[user_id].items()
-            if abs(quantity) > 0
-        ]
-        snapshot = PortfolioResponse(
-            user_id=user_id,
-            cash=round(self._cash_balances[user_id], 2),
-            holdings=holdings,
-            last_updated=datetime.now(timezone.utc),
-        )
+        snapshot = self._portfolio_snapshot(user_id)
         await self._storage.record_portfolio_snapshot(snapshot)
         await self._analytics.publish_portfolio_snapshot(snapshot)
         await self._risk.publish_portfolio(snapshot)
         return snapshot
 
-    async def recent_trades(self, limit: int) -> List[TradeFill]:
+    def _restore_portfolio(self, portfolio: PortfolioRecord) -> None:
+        self._cash_balances[portfolio.user_id] = portfolio.cash
+        positions = self._portfolios[portfolio.user_id]
+        for holding in portfolio.holdings:
+            positions[holding.symbol] = holding.quantity
+        # Holdings in symbols no longer listed have no price to be marked at.
+        self._leaderboard.load(
+            portfolio.user_id,
+            portfolio.cash,
+            {symbol: quantity for symbol, quantity in positions.items() if symbol in self._order_books},
+        )
+
+    def revalue_leaderboard(self) -> int:
+        return self._leaderboard.revalue()
+
+    def leaderboard(self, top: int) -> List[LeaderboardRecord]:
+        participants = len(self._leaderboard)
+        return [
+            LeaderboardRecord(rank=rank, user_id=user_id, value=round(value, 2), participants=participants)
+            for rank, (user_id, value) in enumerate(self._leaderboard.top(top), start=1)
+        ]
+
+    def leaderboard_standing(self, user_id: str) -> Optional[LeaderboardRecord]:
+        standing = self._leaderboard.standing(user_id)
+        if standing is None:
+            return None
+        rank, value = standing
+        return LeaderboardRecord(
+            rank=rank, user_id=user_id, value=round(value, 2), participants=len(self._leaderboard)
+        )
+
+    def top_of_book(self, symbol: str) -> Tuple[Optional[float], int, Optional[float], int]:
+        """Best bid and ask with the total resting quantity at each price."""
+
+        depth = self._depth[symbol]
+        bid = depth.best("BUY")
+        ask = depth.best("SELL")
+        return (
+            bid[0] if bid else None,
+            bid[1] if bid else 0,
+            ask[0] if ask else None,
+            ask[1] if ask else 0,
+        )
+
+    def depth(self, symbol: str, levels: int) -> Tuple[int, List[Level], List[Level]]:
+        return self._depth[symbol].snapshot(levels)
+
+    def flush_depth(self, symbol: str) -> Optional[DepthUpdate]:
+        return self._depth[symbol].flush()
+
+    async def recent_trades(self, limit: int) -> List[FillRecord]:
         if limit <= len(self._trades):
             return list(list(self._trades)[-limit:])
         trades = await self._storage.load_recent_trades(limit)
@@ -150,56 +875,94 @@ class MatchingService:
                 self._trades.append(trade)
         return trades or list(self._trades)[-limit:]
 
-    async def _persist_portfolios(self, users: Set[str]) -> None:
-        if not users:
-            return
-        for user_id in users:
-            holdings = [
-                PortfolioHolding(
-                    symbol=symbol,
-                    quantity=int(quantity),
-                    market_value=round(quantity * self._pricing.price_for(symbol), 2),
-                    last_price=round(self._pricing.price_for(symbol), 2),
-                )
-                for symbol, quantity in self._portfolios[user_id].items()
-                if abs(quantity) > 0
-            ]
-            snapshot = PortfolioResponse(
-                user_id=user_id,
-                cash=round(self._cash_balances[user_id], 2),
-                holdings=holdings,
-                last_updated=datetime.now(timezone.utc),
+    def _portfolio_snapshot(self, user_id: str) -> PortfolioRecord:
+        holdings = [
+            HoldingRecord(
+                symbol=symbol,
+                quantity=int(quantity),
+                market_value=round(quantity * self._pricing.price_for(symbol), 2),
+                last_price=round(self._pricing.price_for(symbol), 2),
             )
-            await self._storage.record_portfolio_snapshot(snapshot)
+            for symbol, quantity in self._portfolios[user_id].items()
+            if abs(quantity) > 0
+        ]
+        return PortfolioRecord(
+            user_id=user_id,
+            cash=round(self._cash_balances[user_id], 2),
+            holdings=holdings,
+            last_updated=self._clock.now(),
+        )
+
+    async def _publish_portfolios(self, portfolios: List[PortfolioRecord]) -> None:
+        for snapshot in portfolios:
             await self._analytics.publish_portfolio_snapshot(snapshot)
             await self._risk.publish_portfolio(snapshot)
 
-    def _match(self, order: OrderStatus) -> Tuple[List[TradeFill], Set[str]]:
-        book = self._order_books[order.symbol]
+    def _execute(self, order: OrderRecord) -> Tuple[List[FillRecord], Set[str]]:
+        """Match ``order`` now, or queue it for the uncross while a call period is open."""
+
+        call = self._call
+        if call is None:
+            return self._match(order)
+        now = self._clock.now()
+        if order.time_in_force in ("IOC", "FOK"):
+            # Nothing executes before the uncross, so immediate orders cannot be satisfied.
+            order.status = "CANCELLED"
+        else:
+            if order.order_type in ("limit", "stop_limit", "quote"):
+                # Limits rest in the book even when they cross it; the uncross clears them.
+                price = float(order.price)
+                self._book(order.symbol)[order.side].append(
+                    (price, order.remaining_quantity, order.order_id, now)
+                )
+                self._depth[order.symbol].change(order.side, price, order.remaining_quantity)
+            order.status = "ACCEPTED"
+            call.add(order)
+        order.updated_at = now
+        return [], {order.user_id}
+
+    def _match(self, order: OrderRecord) -> Tuple[List[FillRecord], Set[str]]:
+        book = self._book(order.symbol)
+        depth = self._depth[order.symbol]
         counter_side = "SELL" if order.side == "BUY" else "BUY"
         counter_book = book[counter_side]
-        fills: List[TradeFill] = []
+        # Best price first, then earliest arrival: lowest asks for a buy, highest bids for a sell.
+        priority = _ask_priority if order.side == "BUY" else _bid_priority
+        fills: List[FillRecord] = []
         touched_users: Set[str] = {order.user_id}
-        now = datetime.now(timezone.utc)
+        now = self._clock.now()
+
+        # Market and triggered stop orders take any price; limit, stop-limit and quote orders stop at theirs.
+        limit_price = float(order.price) if order.order_type in ("limit", "stop_limit", "quote") else None
 
         def price_is_crossable(candidate_price: float) -> bool:
-            if order.order_type == "market":
+            if limit_price is None:
                 return True
             if order.side == "BUY":
-                return candidate_price <= float(order.price)
-            return candidate_price >= float(order.price)
+                return candidate_price <= limit_price
+            return candidate_price >= limit_price
+
+        if order.time_in_force == "FOK":
+            counter_book.sort(key=priority)
+            available = 0
+            for candidate_price, quantity, _, _ in counter_book:
+                if available >= order.remaining_quantity or not price_is_crossable(candidate_price):
+                    break
+                available += quantity
+            if available < order.remaining_quantity:
+                order.status = "CANCELLED"
+                order.updated_at = now
+                return fills, touched_users
 
         while counter_book and order.remaining_quantity > 0:
-            counter_book.sort(key=lambda entry: (entry[0], entry[3]))
-            if order.side == "BUY":
-                candidate_price, quantity, counter_order_id, created = counter_book[0]
-            else:
-                candidate_price, quantity, counter_order_id, created = counter_book[-1]
+            counter_book.sort(key=priority)
+            candidate_price, quantity, counter_order_id, created = counter_book[0]
             if not price_is_crossable(candidate_price):
                 break
             trade_qty = min(order.remaining_quantity, quantity)
             order.remaining_quantity -= trade_qty
             quantity -= trade_qty
+            depth.change(counter_side, candidate_price, -trade_qty)
             counter_status = self._orders[counter_order_id]
             counter_status.remaining_quantity -= trade_qty
             counter_status.updated_at = now
@@ -207,7 +970,7 @@ class MatchingService:
                 counter_status.status = "FILLED"
             else:
                 counter_status.status = "PARTIALLY_FILLED"
-            fill = TradeFill(
+            fill = FillRecord(
                 order_id=order.order_id,
                 counter_order_id=counter_order_id,
                 symbol=order.symbol,
@@ -221,42 +984,63 @@ class MatchingService:
             touched_users.add(counter_status.user_id)
             self._apply_fill(order.user_id, order.symbol, order.side, trade_qty, candidate_price)
             self._apply_fill(counter_status.user_id, counter_status.symbol, counter_status.side, trade_qty, candidate_price)
+            halted = self._pricing.is_halted(order.symbol)
             if quantity == 0:
-                if order.side == "BUY":
-                    counter_book.pop(0)
-                else:
-                    counter_book.pop()
+                counter_book.pop(0)
             else:
-                if order.side == "BUY":
-                    counter_book[0] = (candidate_price, quantity, counter_order_id, created)
-                else:
-                    counter_book[-1] = (candidate_price, quantity, counter_order_id, created)
+                counter_book[0] = (candidate_price, quantity, counter_order_id, created)
+            if halted:
+                # The fill tripped the circuit breaker; the remainder is handled like an unmatched one.
+                break
 
         if order.remaining_quantity == 0:
             order.status = "FILLED"
-        elif order.remaining_quantity < order.quantity:
-            order.status = "PARTIALLY_FILLED"
+        elif limit_price is None or order.time_in_force in ("IOC", "FOK"):
+            # Market and immediate-or-cancel remainders never rest in the book.
+            order.status = "CANCELLED"
         else:
-            order.status = "ACCEPTED"
-            book[order.side].append(
-                (
-                    float(order.price)
-                    if order.price is not None
-                    else self._pricing.price_for(order.symbol),
-                    order.remaining_quantity,
-                    order.order_id,
-                    now,
-                )
-            )
+            order.status = "PARTIALLY_FILLED" if order.remaining_quantity < order.quantity else "ACCEPTED"
+            book[order.side].append((limit_price, order.remaining_quantity, order.order_id, now))
+            depth.change(order.side, limit_price, order.remaining_quantity)
         order.updated_at = now
         return fills, touched_users
 
+    def _next_order_id(self) -> str:
+        if self._id_rng is None:
+            return str(uuid.uuid4())
+        return str(uuid.UUID(int=self._id_rng.getrandbits(128), version=4))
+
     def _apply_fill(self, user_id: str, symbol: str, side: str, quantity: int, price: float) -> None:
         multiplier = 1 if side == "BUY" else -1
         position = self._portfolios[user_id][symbol]
         self._portfolios[user_id][symbol] = position + multiplier * quantity
         cash_delta = -price * quantity if side == "BUY" else price * quantity
         self._cash_balances[user_id] += cash_delta
+        self._leaderboard.apply_fill(user_id, symbol, multiplier * quantity, price)
+
+
+def quote_id(user_id: str, symbol: str, side: str) -> str:
+    # Stable per maker, symbol, and side, so a requote reuses the same book identity.
+    return f"quote:{user_id}:{symbol}:{side}"
+
+
+def _ask_priority(entry: Tuple[float, float, str, datetime]) -> Tuple[float, datetime]:
+    return entry[0], entry[3]
+
+
+def _bid_priority(entry: Tuple[float, float, str, datetime]) -> Tuple[float, datetime]:
+    return -entry[0], entry[3]
+
+
+def _recency(order: OrderRecord) -> Tuple[datetime, str]:
+    return order.created_at, order.order_id
+
+
+def _levels(entries: List[Tuple[float, float, str, datetime]]) -> Dict[float, int]:
+    levels: Dict[float, int] = {}
+    for price, quantity, _, _ in entries:
+        levels[price] = levels.get(price, 0) + int(quantity)
+    return levels
 
 
-__all__ = ["MatchingService"]
+__all__ = ["MatchingService", "quote_id"]
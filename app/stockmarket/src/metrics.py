@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.context_managers import Timer
+
+REGISTRY = CollectorRegistry(auto_describe=True)
+
+# Hot-path latencies sit well below the HTTP buckets used by the middleware.
+_FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+TICK_LOOP_SECONDS = Histogram(
+    "virtualbank_stockmarket_tick_loop_seconds",
+    "Duration of one price loop iteration excluding the inter-tick sleep",
+    buckets=_FAST_BUCKETS,
+    registry=REGISTRY,
+)
+
+TICK_LATENESS_SECONDS = Histogram(
+    "virtualbank_stockmarket_tick_lateness_seconds",
+    "How far past its scheduled deadline each tick started",
+    buckets=_FAST_BUCKETS,
+    registry=REGISTRY,
+)
+
+TICK_OVERRUNS = Counter(
+    "virtualbank_stockmarket_tick_overruns_total",
+    "Ticks whose work took longer than the tick interval",
+    registry=REGISTRY,
+)
+
+TICKS_SKIPPED = Counter(
+    "virtualbank_stockmarket_ticks_skipped_total",
+    "Tick deadlines merged into a later tick because the loop fell behind",
+    registry=REGISTRY,
+)
+
+TICK_SINKS_SHED = Counter(
+    "virtualbank_stockmarket_tick_sinks_shed_total",
+    "Ticks whose sink writes were dropped to protect broadcasts",
+    labelnames=["reason"],
+    registry=REGISTRY,
+)
+
+LOCK_WAIT_SECONDS = Histogram(
+    "virtualbank_stockmarket_engine_lock_wait_seconds",
+    "Time spent waiting to acquire the engine lock",
+    labelnames=["operation"],
+    buckets=_FAST_BUCKETS,
+    registry=REGISTRY,
+)
+
+LOCK_HOLD_SECONDS = Histogram(
+    "virtualbank_stockmarket_engine_lock_hold_seconds",
+    "Time the engine lock was held",
+    labelnames=["operation"],
+    buckets=_FAST_BUCKETS,
+    registry=REGISTRY,
+)
+
+ORDER_STAGE_SECONDS = Histogram(
+    "virtualbank_stockmarket_order_stage_seconds",
+    "place_order latency broken down by stage",
+    labelnames=["stage"],
+    buckets=_FAST_BUCKETS,
+    registry=REGISTRY,
+)
+
+DATASTORE_SECONDS = Histogram(
+    "virtualbank_stockmarket_datastore_seconds",
+    "Latency of PostgreSQL, Redis, and ClickHouse calls",
+    labelnames=["backend", "operation"],
+    buckets=_FAST_BUCKETS,
+    registry=REGISTRY,
+)
+
+SUBSCRIBERS = Gauge(
+    "virtualbank_stockmarket_subscribers",
+    "Connected WebSocket subscribers",
+    labelnames=["channel"],
+    registry=REGISTRY,
+)
+
+SUBSCRIBER_QUEUE_DEPTH = Gauge(
+    "virtualbank_stockmarket_subscriber_queue_depth_max",
+    "Deepest subscriber queue observed during the latest broadcast",
+    labelnames=["channel"],
+    registry=REGISTRY,
+)
+
+DROPPED_SUBSCRIBERS = Counter(
+    "virtualbank_stockmarket_dropped_subscribers_total",
+    "Subscribers dropped because their queue was full",
+    labelnames=["channel"],
+    registry=REGISTRY,
+)
+
+HALTS = Counter(
+    "virtualbank_stockmarket_halts_total",
+    "Circuit breaker halts and resumes",
+    labelnames=["status"],
+    registry=REGISTRY,
+)
+
+AUCTION_UNCROSSES = Counter(
+    "virtualbank_stockmarket_auction_uncrosses_total",
+    "Symbols that traded in a call auction uncross",
+    labelnames=["session"],
+    registry=REGISTRY,
+)
+
+QUOTE_UPDATES = Counter(
+    "virtualbank_stockmarket_quote_updates_total",
+    "Mass-quote sides by how they changed the book",
+    labelnames=["outcome"],
+    registry=REGISTRY,
+)
+
+WS_RESUMES = Counter(
+    "virtualbank_stockmarket_ws_resumes_total",
+    "Tick stream connections by how they were brought up to date: replayed gap, expired resume, or fresh snapshot",
+    labelnames=["outcome"],
+    registry=REGISTRY,
+)
+
+WS_ENCODINGS = Counter(
+    "virtualbank_stockmarket_ws_encodings_total",
+    "Tick stream connections by the frame encoding negotiated during the handshake",
+    labelnames=["encoding"],
+    registry=REGISTRY,
+)
+
+BUS_DROPPED = Counter(
+    "virtualbank_stockmarket_bus_dropped_total",
+    "Stream events and snapshots not delivered to Redis because the bus queue was full or Redis failed",
+    registry=REGISTRY,
+)
+
+HISTORY_ROWS = Counter(
+    "virtualbank_stockmarket_history_rows_total",
+    "Tick history rows written by rollups and deleted by retention",
+    labelnames=["table", "action"],
+    registry=REGISTRY,
+)
+
+SWALLOWED_ERRORS = Counter(
+    "virtualbank_stockmarket_swallowed_errors_total",
+    "Errors deliberately ignored so trading keeps running",
+    labelnames=["component"],
+    registry=REGISTRY,
+)
+
+# Children are resolved once so the hot paths skip the label lookup.
+ORDER_RISK_CHECK = ORDER_STAGE_SECONDS.labels("risk_check")
+ORDER_MATCH = ORDER_STAGE_SECONDS.labels("match")
+ORDER_PERSIST = ORDER_STAGE_SECONDS.labels("persist")
+ORDER_PUBLISH = ORDER_STAGE_SECONDS.labels("publish")
+ORDER_BROADCAST = ORDER_STAGE_SECONDS.labels("broadcast")
+ANALYTICS_ERRORS = SWALLOWED_ERRORS.labels("analytics")
+RISK_ERRORS = SWALLOWED_ERRORS.labels("risk")
+TICK_SINK_ERRORS = SWALLOWED_ERRORS.labels("tick_sinks")
+BUS_ERRORS = SWALLOWED_ERRORS.labels("bus")
+GATEWAY_ERRORS = SWALLOWED_ERRORS.labels("gateway")
+RETENTION_ERRORS = SWALLOWED_ERRORS.labels("retention")
+UNIVERSE_ERRORS = SWALLOWED_ERRORS.labels("universe")
+MINUTE_BARS_ROLLED = HISTORY_ROWS.labels("market_tick_bars_1m", "rollup")
+HOUR_BARS_ROLLED = HISTORY_ROWS.labels("market_tick_bars_1h", "rollup")
+TICKS_PURGED = HISTORY_ROWS.labels("market_ticks", "purge")
+MINUTE_BARS_PURGED = HISTORY_ROWS.labels("market_tick_bars_1m", "purge")
+QUOTE_UNCHANGED = QUOTE_UPDATES.labels("unchanged")
+QUOTE_RESIZED = QUOTE_UPDATES.labels("resized")
+QUOTE_REPLACED = QUOTE_UPDATES.labels("replaced")
+QUOTE_PULLED = QUOTE_UPDATES.labels("pulled")
+WS_REPLAYED = WS_RESUMES.labels("replayed")
+WS_RESUME_EXPIRED = WS_RESUMES.labels("expired")
+WS_SNAPSHOT = WS_RESUMES.labels("snapshot")
+WS_JSON = WS_ENCODINGS.labels("json")
+WS_MSGPACK = WS_ENCODINGS.labels("msgpack")
+
+
+def datastore_timer(backend: str, operation: str) -> Timer:
+    return DATASTORE_SECONDS.labels(backend, operation).time()
+
+
+def render() -> tuple[bytes, str]:
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+__all__ = [
+    "ANALYTICS_ERRORS",
+    "AUCTION_UNCROSSES",
+    "BUS_DROPPED",
+    "BUS_ERRORS",
+    "DATASTORE_SECONDS",
+    "DROPPED_SUBSCRIBERS",
+    "GATEWAY_ERRORS",
+    "HALTS",
+    "HISTORY_ROWS",
+    "HOUR_BARS_ROLLED",
+    "LOCK_HOLD_SECONDS",
+    "LOCK_WAIT_SECONDS",
+    "MINUTE_BARS_PURGED",
+    "MINUTE_BARS_ROLLED",
+    "ORDER_BROADCAST",
+    "ORDER_MATCH",
+    "ORDER_PERSIST",
+    "ORDER_PUBLISH",
+    "ORDER_RISK_CHECK",
+    "QUOTE_PULLED",
+    "QUOTE_REPLACED",
+    "QUOTE_RESIZED",
+    "QUOTE_UNCHANGED",
+    "QUOTE_UPDATES",
+    "REGISTRY",
+    "RETENTION_ERRORS",
+    "RISK_ERRORS",
+    "SUBSCRIBERS",
+    "SUBSCRIBER_QUEUE_DEPTH",
+    "SWALLOWED_ERRORS",
+    "TICKS_PURGED",
+    "TICKS_SKIPPED",
+    "TICK_LATENESS_SECONDS",
+    "TICK_LOOP_SECONDS",
+    "TICK_OVERRUNS",
+    "TICK_SINKS_SHED",
+    "TICK_SINK_ERRORS",
+    "UNIVERSE_ERRORS",
+    "WS_ENCODINGS",
+    "WS_JSON",
+    "WS_MSGPACK",
+    "WS_REPLAYED",
+    "WS_RESUME_EXPIRED",
+    "WS_RESUMES",
+    "WS_SNAPSHOT",
+    "datastore_timer",
+    "render",
+]
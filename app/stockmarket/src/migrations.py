@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+import asyncpg
+
+# Arbitrary key for pg_advisory_lock, shared by every process that migrates this database.
+_LOCK_KEY = 0x5653_4D4B
+
+
+@dataclass(frozen=True, slots=True)
+class Migration:
+    """One schema step, applied at most once per database and never edited once released."""
+
+    version: int
+    name: str
+    statements: Tuple[str, ...]
+
+
+MIGRATIONS: Tuple[Migration, ...] = (
+    Migration(
+        1,
+        "create_market_tables",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS market_orders (
+                order_id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                side TEXT NOT NULL,
+                order_type TEXT NOT NULL,
+                quantity INTEGER NOT NULL,
+                remaining_quantity INTEGER NOT NULL,
+                price NUMERIC,
+                status TEXT NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL,
+                updated_at TIMESTAMPTZ NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS market_trades (
+                order_id TEXT NOT NULL,
+                counter_order_id TEXT,
+                symbol TEXT NOT NULL,
+                price NUMERIC NOT NULL,
+                quantity INTEGER NOT NULL,
+                executed_at TIMESTAMPTZ NOT NULL,
+                PRIMARY KEY (order_id, executed_at, symbol)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS market_portfolios (
+                user_id TEXT PRIMARY KEY,
+                cash NUMERIC NOT NULL,
+                holdings JSONB NOT NULL,
+                last_updated TIMESTAMPTZ NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS market_ticks (
+                symbol TEXT NOT NULL,
+                price NUMERIC NOT NULL,
+                open_price NUMERIC NOT NULL,
+                high_price NUMERIC NOT NULL,
+                low_price NUMERIC NOT NULL,
+                volume INTEGER NOT NULL,
+                regime TEXT NOT NULL,
+                recorded_at TIMESTAMPTZ NOT NULL
+            )
+            """,
+        ),
+    ),
+    # Volumes from before user ids were tracked lack the column entirely.
+    Migration(
+        2,
+        "backfill_order_user_id",
+        (
+            "ALTER TABLE market_orders ADD COLUMN IF NOT EXISTS user_id TEXT",
+            "UPDATE market_orders SET user_id = 'legacy-user' WHERE user_id IS NULL",
+            "ALTER TABLE market_orders ALTER COLUMN user_id SET NOT NULL",
+        ),
+    ),
+    Migration(
+        3,
+        "add_order_time_in_force",
+        (
+            """
+            ALTER TABLE market_orders
+            ADD COLUMN IF NOT EXISTS time_in_force TEXT NOT NULL DEFAULT 'GTC',
+            ADD COLUMN IF NOT EXISTS stop_price NUMERIC
+            """,
+        ),
+    ),
+    Migration(
+        4,
+        "create_market_quotes",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS market_quotes (
+                user_id TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                bid_price NUMERIC,
+                bid_size INTEGER NOT NULL,
+                ask_price NUMERIC,
+                ask_size INTEGER NOT NULL,
+                updated_at TIMESTAMPTZ NOT NULL,
+                PRIMARY KEY (user_id, symbol)
+            )
+            """,
+        ),
+    ),
+    Migration(
+        5,
+        "index_read_paths",
+        (
+            # Recovery reads only open orders; the partial index stays the size of the book.
+            """
+            CREATE INDEX IF NOT EXISTS market_orders_open_idx
+            ON market_orders (created_at)
+            WHERE status IN ('ACCEPTED', 'PARTIALLY_FILLED', 'PENDING')
+            """,
+            "CREATE INDEX IF NOT EXISTS market_trades_executed_at_idx ON market_trades (executed_at DESC)",
+            "CREATE INDEX IF NOT EXISTS market_ticks_symbol_recorded_at_idx ON market_ticks (symbol, recorded_at)",
+        ),
+    ),
+    Migration(
+        6,
+        "create_tick_rollups",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS market_tick_bars_1m (
+                symbol TEXT NOT NULL,
+                bucket_start TIMESTAMPTZ NOT NULL,
+                open_price NUMERIC NOT NULL,
+                high_price NUMERIC NOT NULL,
+                low_price NUMERIC NOT NULL,
+                close_price NUMERIC NOT NULL,
+                volume BIGINT NOT NULL,
+                ticks INTEGER NOT NULL,
+                PRIMARY KEY (symbol, bucket_start)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS market_tick_bars_1h (
+                symbol TEXT NOT NULL,
+                bucket_start TIMESTAMPTZ NOT NULL,
+                open_price NUMERIC NOT NULL,
+                high_price NUMERIC NOT NULL,
+                low_price NUMERIC NOT NULL,
+                close_price NUMERIC NOT NULL,
+                volume BIGINT NOT NULL,
+                ticks INTEGER NOT NULL,
+                PRIMARY KEY (symbol, bucket_start)
+            )
+            """,
+            # How far each rollup has progressed; history before it is safe to purge.
+            """
+            CREATE TABLE IF NOT EXISTS market_rollup_watermarks (
+                resolution TEXT PRIMARY KEY,
+                rolled_until TIMESTAMPTZ NOT NULL
+            )
+            """,
+            # Ticks arrive in time order, so block ranges summarise them in a few pages and
+            # rollup and purge range scans skip everything else.
+            "CREATE INDEX IF NOT EXISTS market_ticks_recorded_at_brin ON market_ticks USING brin (recorded_at)",
+            "CREATE INDEX IF NOT EXISTS market_tick_bars_1m_bucket_brin ON market_tick_bars_1m USING brin (bucket_start)",
+        ),
+    ),
+    Migration(
+        7,
+        "index_user_orders",
+        (
+            # Order history pages walk one user's orders newest first, keyed on (created_at, order_id).
+            """
+            CREATE INDEX IF NOT EXISTS market_orders_user_created_idx
+            ON market_orders (user_id, created_at DESC, order_id DESC)
+            """,
+        ),
+    ),
+)
+
+
+async def migrate(conn: asyncpg.Connection, migrations: Sequence[Migration] = MIGRATIONS) -> List[int]:
+    """Apply pending migrations in version order and return the versions applied.
+
+    Each migration runs in its own transaction together with its bookkeeping
+    row, so a failed step leaves the database at the previous version. An
+    advisory lock keeps workers booting side by side from applying the same step
+    twice; once everything is applied, startup costs one small query.
+    """
+
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS market_schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """
+    )
+    await conn.execute("SELECT pg_advisory_lock($1)", _LOCK_KEY)
+    try:
+        rows = await conn.fetch("SELECT version FROM market_schema_migrations")
+        done = {row["version"] for row in rows}
+        applied: List[int] = []
+        for migration in sorted(migrations, key=lambda item: item.version):
+            if migration.version in done:
+                continue
+            async with conn.transaction():
+                for statement in migration.statements:
+                    await conn.execute(statement)
+                await conn.execute(
+                    "INSERT INTO market_schema_migrations (version, name) VALUES ($1, $2)",
+                    migration.version,
+                    migration.name,
+                )
+            applied.append(migration.version)
+        return applied
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", _LOCK_KEY)
+
+
+__all__ = ["MIGRATIONS", "Migration", "migrate"]
@@ -2,16 +2,18 @@ from __future__ import annotations
 
 import math
 import random
-import time
 from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Deque, Dict, Iterable, List, Optional
 
-from .schemas import MarketNewsItem, MarketRegime, TickerSnapshot
+from .clock import Clock, SystemClock
+from .halts import CircuitBreaker, PriceBand
+from .records import CandleRecord, HaltRecord, TickRecord
+from .schemas import MarketNewsItem, MarketRegime
 
 
-@dataclass
+@dataclass(slots=True)
 class TickerState:
     symbol: str
     name: str
@@ -24,12 +26,43 @@ class TickerState:
     low_price: float
     volume: int
     last_update: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    region: str = "Global"
+    # Millions at the base price; weights the symbol in sector, region, and composite totals.
+    market_cap: float = 0.0
+    # Current one-minute bar; bar_start is an epoch second aligned to the minute.
+    bar_start: float = 0.0
+    bar_open: float = 0.0
+    bar_high: float = 0.0
+    bar_low: float = 0.0
+    bar_base_volume: int = 0
+    # Circuit-breaker window, attached on the first tick when breakers are enabled.
+    band: Optional[PriceBand] = None
+
+
+def roll_bar(state: TickerState, bar_start: float, price: float) -> None:
+    if state.bar_start != bar_start:
+        state.bar_start = bar_start
+        state.bar_open = state.bar_high = state.bar_low = price
+        state.bar_base_volume = state.volume
+        return
+    if price > state.bar_high:
+        state.bar_high = price
+    elif price < state.bar_low:
+        state.bar_low = price
 
 
 class PricingService:
     """Encapsulates pricing, regime rotation, and market news generation."""
 
-    def __init__(self, tickers: Dict[str, TickerState], regimes: List[MarketRegime]) -> None:
+    def __init__(
+        self,
+        tickers: Dict[str, TickerState],
+        regimes: List[MarketRegime],
+        *,
+        clock: Optional[Clock] = None,
+        seed: Optional[int] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
         if not tickers:
             raise ValueError("PricingService requires at least one ticker")
         if not regimes:
@@ -38,18 +71,66 @@ class PricingService:
         self._regimes = regimes
         self._active_regime_index = 0
         self._news: Deque[MarketNewsItem] = deque(maxlen=50)
+        self._clock: Clock = clock or SystemClock()
+        self._seed = seed
+        self._rng = random.Random(seed)
+        self._sector_bias_bucket: Optional[tuple[int, int]] = None
+        self._sector_biases: Dict[str, float] = {}
+        self._session_start = self._clock.now()
+        self._breaker = breaker
+        self._halt_events: List[HaltRecord] = []
+        # Delisted symbols keep their last state so positions in them can still be valued.
+        self._delisted: Dict[str, TickerState] = {}
 
-    def tick(self) -> List[TickerSnapshot]:
+    @property
+    def session_start(self) -> datetime:
+        return self._session_start
+
+    def tick(self) -> List[TickRecord]:
         regime = self.active_regime()
-        updates: List[TickerSnapshot] = []
-        timestamp = datetime.now(timezone.utc)
+        updates: List[TickRecord] = []
+        timestamp = self._clock.now()
+        epoch_seconds = timestamp.timestamp()
+        bar_start = epoch_seconds // 60 * 60
+        self._refresh_sector_biases()
+        breaker = self._breaker
+        halted: Dict[str, HaltRecord] = {}
+        if breaker is not None:
+            self._halt_events.extend(breaker.release_due(epoch_seconds))
+            band_up = breaker.up
+            band_down = breaker.down
+            halted = breaker.halted
         for state in self._tickers.values():
             delta = self._sample_return(state, regime)
+            if halted and state.symbol in halted:
+                # Halted symbols hold their price; the sample is still drawn so the
+                # random streams of every other symbol are unaffected by the halt.
+                updates.append(self._snapshot_from_state(state))
+                continue
             new_price = max(0.5, state.price * math.exp(delta))
             state.price = new_price
             state.high_price = max(state.high_price, new_price)
             state.low_price = min(state.low_price, new_price)
             state.last_update = timestamp
+            roll_bar(state, bar_start, new_price)
+            if breaker is not None:
+                # Inlined PriceBand.observe: at 10k symbols the method call alone is measurable.
+                band = state.band
+                if band is None:
+                    band = state.band = breaker.band(state.symbol)
+                if epoch_seconds >= band.roll_at:
+                    band.roll(epoch_seconds, new_price, breaker)
+                elif new_price < band.low:
+                    band.low = new_price
+                elif new_price > band.high:
+                    band.high = new_price
+                if (
+                    new_price >= band.floor_up
+                    or new_price <= band.ceiling_down
+                    or new_price >= band.low * band_up
+                    or new_price <= band.high * band_down
+                ):
+                    self._halt_events.append(breaker.trip(state.symbol, epoch_seconds, new_price))
             updates.append(self._snapshot_from_state(state))
         return updates
 
@@ -61,9 +142,32 @@ class PricingService:
         state.high_price = max(state.high_price, price)
         state.low_price = min(state.low_price, price)
         state.volume += quantity
-        state.last_update = datetime.now(timezone.utc)
+        state.last_update = self._clock.now()
+        epoch_seconds = state.last_update.timestamp()
+        roll_bar(state, epoch_seconds // 60 * 60, price)
+        if self._breaker is not None and symbol not in self._breaker.halted:
+            # Only an auction uncross trades a halted symbol, and it must not re-trip the halt.
+            halt = self._breaker.observe(symbol, epoch_seconds, price)
+            if halt is not None:
+                self._halt_events.append(halt)
+
+    def is_halted(self, symbol: str) -> bool:
+        return self._breaker is not None and symbol in self._breaker
+
+    def halt(self, symbol: str) -> Optional[HaltRecord]:
+        return self._breaker.halt(symbol) if self._breaker is not None else None
+
+    def halts(self) -> List[HaltRecord]:
+        return self._breaker.halts() if self._breaker is not None else []
+
+    def drain_halt_events(self) -> List[HaltRecord]:
+        """Halts tripped and lifted since the last call, in the order they happened."""
 
-    def snapshot(self) -> List[TickerSnapshot]:
+        events = self._halt_events
+        self._halt_events = []
+        return events
+
+    def snapshot(self) -> List[TickRecord]:
         return [self._snapshot_from_state(state) for state in self._tickers.values()]
 
     def active_regime(self) -> MarketRegime:
@@ -75,15 +179,15 @@ class PricingService:
     def rotate_regime(self) -> MarketRegime:
         self._active_regime_index = (self._active_regime_index + 1) % len(self._regimes)
         regime = self._regimes[self._active_regime_index]
-        regime.started_at = datetime.now(timezone.utc)
+        regime.started_at = self._clock.now()
         return regime
 
     def generate_news(self) -> Optional[MarketNewsItem]:
         if not self._tickers:
             return None
-        symbol = random.choice(list(self._tickers.keys()))
+        symbol = self._rng.choice(list(self._tickers.keys()))
         ticker = self._tickers[symbol]
-        sentiment = random.choice(["positive", "neutral", "negative"])
+        sentiment = self._rng.choice(["positive", "neutral", "negative"])
         headline = {
             "positive": f"{ticker.name} surges on upbeat community momentum",
             "neutral": f"{ticker.name} reports steady progress in quarterly briefing",
@@ -93,7 +197,7 @@ class PricingService:
             symbol=symbol,
             headline=headline,
             sentiment=sentiment,
-            created_at=datetime.now(timezone.utc),
+            created_at=self._clock.now(),
         )
         self._news.appendleft(item)
         return item
@@ -102,25 +206,80 @@ class PricingService:
         return list(self._news)
 
     def price_for(self, symbol: str) -> float:
-        state = self._tickers[symbol]
+        state = self._tickers.get(symbol)
+        if state is None:
+            state = self._delisted[symbol]
         return state.price
 
+    def list_ticker(self, state: TickerState) -> None:
+        """Start pricing a new symbol from the next tick."""
+
+        self._delisted.pop(state.symbol, None)
+        self._tickers[state.symbol] = state
+
+    def update_ticker(self, listing: TickerState) -> bool:
+        """Copy the descriptive fields of ``listing`` onto the live symbol; returns whether any changed.
+
+        Prices carry on from the market, so only a new listing starts at its base price.
+        """
+
+        state = self._tickers[listing.symbol]
+        fields = ("name", "sector", "region", "market_cap", "volatility")
+        changed = False
+        for name in fields:
+            value = getattr(listing, name)
+            if getattr(state, name) != value:
+                setattr(state, name, value)
+                changed = True
+        return changed
+
+    def delist_ticker(self, symbol: str) -> TickerState:
+        if len(self._tickers) == 1 and symbol in self._tickers:
+            raise ValueError("Cannot delist the last listed symbol")
+        state = self._tickers.pop(symbol)
+        self._delisted[symbol] = state
+        if self._breaker is not None:
+            self._breaker.halted.pop(symbol, None)
+            self._breaker.bands.pop(symbol, None)
+        state.band = None
+        return state
+
     def symbols(self) -> Iterable[str]:
         return self._tickers.keys()
 
+    def state(self, symbol: str) -> TickerState:
+        return self._tickers[symbol]
+
+    def states(self) -> Iterable[TickerState]:
+        return self._tickers.values()
+
+    def candles(self, symbol: str) -> List[CandleRecord]:
+        return session_candles(self._tickers[symbol], self._session_start)
+
     def _sample_return(self, state: TickerState, regime: MarketRegime) -> float:
         base_drift = regime.drift
-        noise = random.gauss(0, state.volatility * regime.volatility_multiplier)
+        noise = self._rng.gauss(0, state.volatility * regime.volatility_multiplier)
         sector_bias = self._sector_bias(state.sector)
         return base_drift + noise + sector_bias
 
+    def _refresh_sector_biases(self) -> None:
+        bucket = (self._active_regime_index, int(self._clock.timestamp() // 3600))
+        if bucket != self._sector_bias_bucket:
+            self._sector_bias_bucket = bucket
+            self._sector_biases.clear()
+
     def _sector_bias(self, sector: str) -> float:
-        seed_value = hash((sector, self._active_regime_index, int(time.time() // 3600))) & 0xFFFFFFFF
-        rng = random.Random(seed_value)
-        return rng.uniform(-0.0005, 0.0005)
+        bias = self._sector_biases.get(sector)
+        if bias is None:
+            regime_index, hour = self._sector_bias_bucket or (self._active_regime_index, 0)
+            # String seeds hash deterministically, unlike hash() which is salted per process.
+            rng = random.Random(f"{self._seed}:{sector}:{regime_index}:{hour}")
+            bias = rng.uniform(-0.0005, 0.0005)
+            self._sector_biases[sector] = bias
+        return bias
 
-    def _snapshot_from_state(self, state: TickerState) -> TickerSnapshot:
-        return TickerSnapshot(
+    def _snapshot_from_state(self, state: TickerState) -> TickRecord:
+        return TickRecord(
             symbol=state.symbol,
             name=state.name,
             sector=state.sector,
@@ -131,3 +290,34 @@ class PricingService:
             volume=state.volume,
             last_update=state.last_update,
         )
+
+
+def session_candles(state: TickerState, session_start: datetime) -> List[CandleRecord]:
+    """Session-to-date and current one-minute candles for a ticker."""
+
+    candles = [
+        CandleRecord(
+            symbol=state.symbol,
+            interval="session",
+            start=session_start,
+            open=round(state.open_price, 2),
+            high=round(state.high_price, 2),
+            low=round(state.low_price, 2),
+            close=round(state.price, 2),
+            volume=state.volume,
+        )
+    ]
+    if state.bar_start:
+        candles.append(
+            CandleRecord(
+                symbol=state.symbol,
+                interval="1m",
+                start=datetime.fromtimestamp(state.bar_start, timezone.utc),
+                open=round(state.bar_open, 2),
+                high=round(state.bar_high, 2),
+                low=round(state.bar_low, 2),
+                close=round(state.price, 2),
+                volume=state.volume - state.bar_base_volume,
+            )
+        )
+    return candles
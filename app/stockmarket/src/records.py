@@ -0,0 +1,369 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Orders in these states are resting in the book or waiting on their stop trigger.
+OPEN_ORDER_STATUSES = ("ACCEPTED", "PARTIALLY_FILLED", "PENDING")
+
+
+class _JsonCached:
+    """Caches the JSON-ready form of a record so every sink shares one encoding."""
+
+    __slots__ = ("_json_cache",)
+
+    def as_json(self) -> Dict[str, Any]:
+        cached = getattr(self, "_json_cache", None)
+        if cached is None:
+            cached = self._encode()
+            object.__setattr__(self, "_json_cache", cached)
+        return cached
+
+    def _encode(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+@dataclass(slots=True)
+class TickRecord(_JsonCached):
+    symbol: str
+    name: str
+    sector: str
+    price: float
+    open_price: float
+    high_price: float
+    low_price: float
+    volume: int
+    last_update: datetime
+
+    def _encode(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "name": self.name,
+            "sector": self.sector,
+            "price": self.price,
+            "open_price": self.open_price,
+            "high_price": self.high_price,
+            "low_price": self.low_price,
+            "volume": self.volume,
+            "last_update": self.last_update.isoformat(),
+        }
+
+
+@dataclass(slots=True)
+class FillRecord(_JsonCached):
+    order_id: str
+    counter_order_id: Optional[str]
+    symbol: str
+    price: float
+    quantity: int
+    executed_at: datetime
+
+    def _encode(self) -> Dict[str, Any]:
+        return {
+            "order_id": self.order_id,
+            "counter_order_id": self.counter_order_id,
+            "symbol": self.symbol,
+            "price": self.price,
+            "quantity": self.quantity,
+            "executed_at": self.executed_at.isoformat(),
+        }
+
+
+@dataclass(slots=True)
+class OrderRecord(_JsonCached):
+    order_id: str
+    user_id: str
+    symbol: str
+    side: str
+    order_type: str
+    quantity: int
+    remaining_quantity: int
+    price: Optional[float]
+    status: str
+    created_at: datetime
+    updated_at: datetime
+    time_in_force: str = "GTC"
+    stop_price: Optional[float] = None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # Orders mutate while they rest in the book, so any write drops the cached encoding.
+        object.__setattr__(self, name, value)
+        object.__setattr__(self, "_json_cache", None)
+
+    def _encode(self) -> Dict[str, Any]:
+        return {
+            "order_id": self.order_id,
+            "user_id": self.user_id,
+            "symbol": self.symbol,
+            "side": self.side,
+            "order_type": self.order_type,
+            "quantity": self.quantity,
+            "remaining_quantity": self.remaining_quantity,
+            "price": self.price,
+            "status": self.status,
+            "time_in_force": self.time_in_force,
+            "stop_price": self.stop_price,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+
+@dataclass(slots=True)
+class HoldingRecord(_JsonCached):
+    symbol: str
+    quantity: int
+    market_value: float
+    last_price: float
+
+    def _encode(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "quantity": self.quantity,
+            "market_value": self.market_value,
+            "last_price": self.last_price,
+        }
+
+
+@dataclass(slots=True)
+class PortfolioRecord(_JsonCached):
+    user_id: str
+    cash: float
+    holdings: List[HoldingRecord]
+    last_updated: datetime
+
+    def _encode(self) -> Dict[str, Any]:
+        return {
+            "user_id": self.user_id,
+            "cash": self.cash,
+            "holdings": [holding.as_json() for holding in self.holdings],
+            "last_updated": self.last_updated.isoformat(),
+        }
+
+
+@dataclass(slots=True)
+class QuoteRecord(_JsonCached):
+    symbol: str
+    price: float
+    bid: Optional[float]
+    bid_size: int
+    ask: Optional[float]
+    ask_size: int
+    last_update: datetime
+
+    def _encode(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "price": self.price,
+            "bid": self.bid,
+            "bid_size": self.bid_size,
+            "ask": self.ask,
+            "ask_size": self.ask_size,
+            "last_update": self.last_update.isoformat(),
+        }
+
+
+@dataclass(slots=True)
+class CandleRecord(_JsonCached):
+    symbol: str
+    interval: str
+    start: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: int
+
+    def _encode(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "interval": self.interval,
+            "start": self.start.isoformat(),
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "volume": self.volume,
+        }
+
+
+@dataclass(slots=True)
+class HaltRecord(_JsonCached):
+    symbol: str
+    status: str
+    reference_price: float
+    trigger_price: float
+    move: float
+    halted_at: datetime
+    resumes_at: datetime
+
+    def _encode(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "status": self.status,
+            "reference_price": self.reference_price,
+            "trigger_price": self.trigger_price,
+            "move": self.move,
+            "halted_at": self.halted_at.isoformat(),
+            "resumes_at": self.resumes_at.isoformat(),
+        }
+
+
+@dataclass(slots=True)
+class AuctionRecord(_JsonCached):
+    symbol: str
+    session: str
+    status: str
+    price: Optional[float]
+    volume: int
+    imbalance: int
+    uncross_at: datetime
+
+    def _encode(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "session": self.session,
+            "status": self.status,
+            "price": self.price,
+            "volume": self.volume,
+            "imbalance": self.imbalance,
+            "uncross_at": self.uncross_at.isoformat(),
+        }
+
+
+@dataclass(slots=True)
+class MakerQuoteRecord(_JsonCached):
+    user_id: str
+    symbol: str
+    bid_price: Optional[float]
+    bid_size: int
+    ask_price: Optional[float]
+    ask_size: int
+    updated_at: datetime
+
+    def _encode(self) -> Dict[str, Any]:
+        return {
+            "user_id": self.user_id,
+            "symbol": self.symbol,
+            "bid_price": self.bid_price,
+            "bid_size": self.bid_size,
+            "ask_price": self.ask_price,
+            "ask_size": self.ask_size,
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+
+@dataclass(slots=True)
+class SectorRecord(_JsonCached):
+    name: str
+    # Cap-weighted return since the open.
+    change: float
+    market_cap: float
+    volume: int
+    advancers: int
+    decliners: int
+    members: int
+
+    def _encode(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "change": self.change,
+            "market_cap": self.market_cap,
+            "volume": self.volume,
+            "advancers": self.advancers,
+            "decliners": self.decliners,
+            "members": self.members,
+        }
+
+
+@dataclass(slots=True)
+class CompositeRecord(_JsonCached):
+    level: float
+    change: float
+    market_cap: float
+    volume: int
+    advancers: int
+    decliners: int
+    members: int
+    updated_at: datetime
+
+    def _encode(self) -> Dict[str, Any]:
+        return {
+            "level": self.level,
+            "change": self.change,
+            "market_cap": self.market_cap,
+            "volume": self.volume,
+            "advancers": self.advancers,
+            "decliners": self.decliners,
+            "members": self.members,
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+
+@dataclass(slots=True)
+class LeaderboardRecord(_JsonCached):
+    rank: int
+    user_id: str
+    value: float
+    participants: int
+
+    def _encode(self) -> Dict[str, Any]:
+        return {
+            "rank": self.rank,
+            "user_id": self.user_id,
+            "value": self.value,
+            "participants": self.participants,
+        }
+
+
+@dataclass(slots=True)
+class InstrumentChangeRecord(_JsonCached):
+    listed: List[str]
+    updated: List[str]
+    delisted: List[str]
+    cancelled_orders: int
+
+    def _encode(self) -> Dict[str, Any]:
+        return {
+            "listed": self.listed,
+            "updated": self.updated,
+            "delisted": self.delisted,
+            "cancelled_orders": self.cancelled_orders,
+        }
+
+
+@dataclass(slots=True)
+class OrderResult:
+    order: OrderRecord
+    fills: List[FillRecord]
+
+
+@dataclass(slots=True)
+class MassQuoteResult:
+    user_id: str
+    quotes: List[MakerQuoteRecord]
+    fills: List[FillRecord]
+    rejected: Dict[str, str]
+    # Quote sides that traded on entry, reported like orders so their fills reach the trade feeds.
+    orders: List[OrderResult]
+
+
+__all__ = [
+    "OPEN_ORDER_STATUSES",
+    "AuctionRecord",
+    "CandleRecord",
+    "CompositeRecord",
+    "FillRecord",
+    "HaltRecord",
+    "HoldingRecord",
+    "InstrumentChangeRecord",
+    "LeaderboardRecord",
+    "MakerQuoteRecord",
+    "MassQuoteResult",
+    "OrderRecord",
+    "OrderResult",
+    "PortfolioRecord",
+    "QuoteRecord",
+    "SectorRecord",
+    "TickRecord",
+]
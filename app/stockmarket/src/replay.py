@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import uuid
+from collections import deque
+from itertools import islice
+from typing import Deque, List, Optional, Tuple
+
+from .frames import BroadcastFrame
+
+
+class ReplayLog:
+    """Stamps broadcast events with a sequence number and keeps the most recent ones.
+
+    Sequences start at 1 and increase by one per event, so the events after any
+    retained sequence are a contiguous tail of the ring. The epoch changes with
+    every process, which keeps a client from resuming against sequences issued
+    by a previous run.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        if capacity <= 0:
+            raise ValueError("Replay capacity must be positive")
+        self.epoch = uuid.uuid4().hex[:12]
+        self._events: Deque[Tuple[int, BroadcastFrame]] = deque(maxlen=capacity)
+        self._sequence = 0
+
+    @property
+    def sequence(self) -> int:
+        return self._sequence
+
+    def append(self, frame: BroadcastFrame) -> int:
+        self._sequence += 1
+        frame.payload["sequence"] = self._sequence
+        self._events.append((self._sequence, frame))
+        return self._sequence
+
+    def since(self, sequence: int, epoch: Optional[str]) -> Optional[List[BroadcastFrame]]:
+        """Return the events after ``sequence``, or None when the gap cannot be replayed."""
+
+        if epoch != self.epoch or sequence > self._sequence or sequence < 0:
+            return None
+        oldest = self._events[0][0] if self._events else self._sequence + 1
+        if sequence + 1 < oldest:
+            return None
+        return [frame for _, frame in islice(self._events, sequence + 1 - oldest, None)]
+
+
+__all__ = ["ReplayLog"]
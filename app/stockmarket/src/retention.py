@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional, Tuple
+
+import asyncpg
+from prometheus_client import Counter
+
+from . import metrics
+from .clock import Clock, SystemClock
+from .storage import StockmarketStorage
+
+_Rollup = Callable[[datetime, timedelta], Awaitable[Tuple[Optional[datetime], int]]]
+_Purge = Callable[[datetime, int], Awaitable[int]]
+
+HOUR = timedelta(hours=1)
+
+
+class TickRetention:
+    """Rolls tick history up into one-minute and one-hour bars and deletes what has expired.
+
+    Every ``interval`` seconds the job folds closed minutes of raw ticks into
+    one-minute bars and closed hours of those into one-hour bars, then deletes
+    raw ticks older than ``tick_retention`` and one-minute bars older than
+    ``minute_bar_retention`` seconds (zero keeps them). Every step works in
+    chunks of at most ``rollup_span`` seconds of history or ``batch_size`` rows,
+    each its own short transaction, and waits ``pause`` seconds between chunks so
+    the tick sink and order persistence keep their connections. Rows are only
+    deleted once they have been rolled up, so a stalled rollup holds retention
+    back instead of losing history.
+    """
+
+    def __init__(
+        self,
+        storage: StockmarketStorage,
+        *,
+        clock: Optional[Clock] = None,
+        interval: float = 60.0,
+        tick_retention: float = 0.0,
+        minute_bar_retention: float = 0.0,
+        batch_size: int = 5000,
+        rollup_span: float = 600.0,
+        settle: float = 30.0,
+        pause: float = 0.05,
+    ) -> None:
+        if interval <= 0:
+            raise ValueError("Rollup interval must be positive")
+        if batch_size <= 0:
+            raise ValueError("Retention batch size must be positive")
+        if rollup_span < 60 or rollup_span % 60:
+            raise ValueError("Rollup span must be a whole number of minutes")
+        self._storage = storage
+        self._clock = clock or SystemClock()
+        self._interval = interval
+        self._tick_retention = timedelta(seconds=tick_retention)
+        self._minute_bar_retention = timedelta(seconds=minute_bar_retention)
+        self._batch_size = batch_size
+        self._rollup_span = timedelta(seconds=rollup_span)
+        # Ticks reach Postgres through the sink queue, so a minute is only rolled up once
+        # stragglers for it have had time to land.
+        self._settle = timedelta(seconds=settle)
+        self._pause = pause
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_once(self) -> None:
+        storage = self._storage
+        now = self._clock.now()
+        closed = (now - self._settle).replace(second=0, microsecond=0)
+        minute_mark = await self._roll(
+            storage.rollup_minute_bars, closed, self._rollup_span, metrics.MINUTE_BARS_ROLLED
+        )
+        if minute_mark is None:
+            return
+        hour_mark = await self._roll(
+            storage.rollup_hour_bars, minute_mark.replace(minute=0), HOUR, metrics.HOUR_BARS_ROLLED
+        )
+        if self._tick_retention:
+            await self._purge(storage.purge_ticks, min(now - self._tick_retention, minute_mark), metrics.TICKS_PURGED)
+        if self._minute_bar_retention and hour_mark is not None:
+            await self._purge(
+                storage.purge_minute_bars,
+                min(now - self._minute_bar_retention, hour_mark),
+                metrics.MINUTE_BARS_PURGED,
+            )
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                try:
+                    await self.run_once()
+                except (asyncpg.PostgresError, OSError):
+                    # The next pass resumes from the stored watermarks.
+                    metrics.RETENTION_ERRORS.inc()
+                await self._clock.sleep(self._interval)
+        except asyncio.CancelledError:
+            return
+
+    async def _roll(self, rollup: _Rollup, until: datetime, span: timedelta, rolled: Counter) -> Optional[datetime]:
+        while True:
+            mark, written = await rollup(until, span)
+            rolled.inc(written)
+            if mark is None or mark >= until:
+                return mark
+            await self._clock.sleep(self._pause)
+
+    async def _purge(self, purge: _Purge, before: datetime, purged: Counter) -> None:
+        while True:
+            deleted = await purge(before, self._batch_size)
+            purged.inc(deleted)
+            if deleted < self._batch_size:
+                return
+            await self._clock.sleep(self._pause)
+
+
+__all__ = ["TickRetention"]
@@ -4,7 +4,9 @@ from typing import Optional, Sequence
 
 import httpx
 
-from .schemas import OrderRequest, OrderStatus, PortfolioResponse, TradeFill
+from . import metrics
+from .records import FillRecord, OrderRecord, PortfolioRecord
+from .schemas import OrderRequest
 
 
 class RiskRejection(Exception):
@@ -56,25 +58,51 @@ class RiskEngine:
                 f"Insufficient credit for order notional {notional:.2f}. Available: {available:.2f}"
             )
 
-    async def publish_order(self, status: OrderStatus, notional: float) -> None:
+    async def ensure_quote_credit(self, user_id: str, notional: float) -> None:
+        """Check a mass quote's combined bid notional with one credit lookup."""
+
+        if not self._base_url or notional <= 0:
+            return
+        url = f"{self._base_url}/{self._credit_endpoint}/{user_id}"
+        try:
+            response = await self._http.get(url, params={"notional": notional})
+            response.raise_for_status()
+            payload = response.json()
+        except httpx.HTTPError as exc:
+            raise RiskRejection(f"Risk service unavailable: {exc}") from exc
+        available = float(payload.get("available", 0.0))
+        if available < notional:
+            await self.publish_event(
+                "risk.limit_breach",
+                {
+                    "user_id": user_id,
+                    "requested_notional": round(notional, 2),
+                    "available_notional": round(available, 2),
+                },
+            )
+            raise RiskRejection(
+                f"Insufficient credit for quoted notional {notional:.2f}. Available: {available:.2f}"
+            )
+
+    async def publish_order(self, status: OrderRecord, notional: float) -> None:
         await self.publish_event(
             "risk.order.accepted",
-            {"order": status.model_dump(mode="json"), "notional": round(notional, 2)},
+            {"order": status.as_json(), "notional": round(notional, 2)},
         )
 
-    async def publish_fills(self, status: OrderStatus, fills: Sequence[TradeFill]) -> None:
+    async def publish_fills(self, status: OrderRecord, fills: Sequence[FillRecord]) -> None:
         await self.publish_event(
             "risk.order.filled",
             {
-                "order": status.model_dump(mode="json"),
-                "fills": [fill.model_dump(mode="json") for fill in fills],
+                "order": status.as_json(),
+                "fills": [fill.as_json() for fill in fills],
             },
         )
 
-    async def publish_portfolio(self, snapshot: PortfolioResponse) -> None:
+    async def publish_portfolio(self, snapshot: PortfolioRecord) -> None:
         await self.publish_event(
             "risk.portfolio.snapshot",
-            snapshot.model_dump(mode="json"),
+            snapshot.as_json(),
         )
 
     async def publish_event(self, event_type: str, payload: dict) -> None:
@@ -87,6 +115,7 @@ class RiskEngine:
             response.raise_for_status()
         except httpx.HTTPError:
             # Do not let downstream connectivity prevent trading operations.
+            metrics.RISK_ERRORS.inc()
             return
 
 
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict
+
+from . import metrics
+from .clock import Clock
+
+
+@dataclass(slots=True)
+class SchedulerStats:
+    ticks: int = 0
+    overruns: int = 0
+    skipped: int = 0
+    shed: int = 0
+    last_lateness_ms: float = 0.0
+    max_lateness_ms: float = 0.0
+    last_duration_ms: float = 0.0
+    max_duration_ms: float = 0.0
+
+    def as_json(self) -> Dict[str, Any]:
+        return {
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "shed": self.shed,
+            "last_lateness_ms": round(self.last_lateness_ms, 3),
+            "max_lateness_ms": round(self.max_lateness_ms, 3),
+            "last_duration_ms": round(self.last_duration_ms, 3),
+            "max_duration_ms": round(self.max_duration_ms, 3),
+        }
+
+
+class FixedRateScheduler:
+    """Runs a callback on fixed deadlines instead of sleeping a full interval after each run.
+
+    Deadlines advance by whole intervals from the first one, so tick work never pushes the
+    schedule back. A tick that starts one or more intervals late covers the missed deadlines
+    itself rather than replaying them back to back; the callback is told it is behind so it
+    can shed optional work.
+    """
+
+    def __init__(self, clock: Clock, interval: float) -> None:
+        if interval <= 0:
+            raise ValueError("Tick interval must be positive")
+        self._clock = clock
+        self._interval = interval
+        self.stats = SchedulerStats()
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    def record_shed(self, reason: str) -> None:
+        self.stats.shed += 1
+        metrics.TICK_SINKS_SHED.labels(reason).inc()
+
+    async def run(self, tick: Callable[[bool], Awaitable[None]]) -> None:
+        stats = self.stats
+        deadline = self._clock.monotonic() + self._interval
+        while True:
+            delay = deadline - self._clock.monotonic()
+            if delay > 0:
+                await self._clock.sleep(delay)
+            started = self._clock.monotonic()
+            lateness = max(0.0, started - deadline)
+            missed = int(lateness // self._interval)
+            if missed:
+                stats.skipped += missed
+                metrics.TICKS_SKIPPED.inc(missed)
+            deadline += (missed + 1) * self._interval
+            stats.last_lateness_ms = lateness * 1_000
+            stats.max_lateness_ms = max(stats.max_lateness_ms, stats.last_lateness_ms)
+            metrics.TICK_LATENESS_SECONDS.observe(lateness)
+
+            with metrics.TICK_LOOP_SECONDS.time():
+                await tick(missed > 0)
+
+            duration = self._clock.monotonic() - started
+            stats.ticks += 1
+            stats.last_duration_ms = duration * 1_000
+            stats.max_duration_ms = max(stats.max_duration_ms, stats.last_duration_ms)
+            if duration > self._interval:
+                stats.overruns += 1
+                metrics.TICK_OVERRUNS.inc()
+
+
+__all__ = ["FixedRateScheduler", "SchedulerStats"]
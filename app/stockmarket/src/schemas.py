@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Literal, Optional
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 class TickerSnapshot(BaseModel):
@@ -18,6 +18,106 @@ class TickerSnapshot(BaseModel):
     last_update: datetime
 
 
+class Quote(BaseModel):
+    symbol: str
+    price: float
+    bid: Optional[float]
+    bid_size: int
+    ask: Optional[float]
+    ask_size: int
+    last_update: datetime
+
+
+class Candle(BaseModel):
+    symbol: str
+    interval: Literal["session", "1m"]
+    start: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: int
+
+
+class DepthSnapshot(BaseModel):
+    symbol: str
+    sequence: int
+    bids: list[tuple[float, int]]
+    asks: list[tuple[float, int]]
+
+
+class TradingHalt(BaseModel):
+    symbol: str
+    status: Literal["HALTED", "RESUMED"]
+    reference_price: float
+    trigger_price: float
+    move: float
+    halted_at: datetime
+    resumes_at: datetime
+
+
+class AuctionState(BaseModel):
+    symbol: str
+    session: Literal["OPENING", "CLOSING"]
+    status: Literal["INDICATIVE", "UNCROSSED"]
+    price: Optional[float]
+    volume: int
+    imbalance: int
+    uncross_at: datetime
+
+
+class SectorAggregate(BaseModel):
+    name: str
+    change: float
+    market_cap: float
+    volume: int
+    advancers: int
+    decliners: int
+    members: int
+
+
+class CompositeIndex(BaseModel):
+    level: float
+    change: float
+    market_cap: float
+    volume: int
+    advancers: int
+    decliners: int
+    members: int
+    updated_at: datetime
+
+
+class MarketHeatmap(BaseModel):
+    composite: CompositeIndex
+    sectors: list[SectorAggregate]
+    regions: list[SectorAggregate]
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: str
+    value: float
+    participants: int
+
+
+class InstrumentDefinition(BaseModel):
+    # The shape of one company in the dataset file.
+    ticker: str = Field(..., min_length=1, max_length=16)
+    name: Optional[str] = None
+    sector: str = "General"
+    region: str = "Global"
+    base_price: float = Field(25.0, gt=0)
+    volatility: float = Field(0.08, gt=0)
+    market_cap_millions: float = Field(0.0, ge=0)
+
+
+class InstrumentChanges(BaseModel):
+    listed: list[str]
+    updated: list[str]
+    delisted: list[str]
+    cancelled_orders: int
+
+
 class MarketRegime(BaseModel):
     name: str
     description: str
@@ -37,16 +137,28 @@ class OrderRequest(BaseModel):
     user_id: str = Field(..., min_length=1)
     symbol: str = Field(..., min_length=1)
     side: Literal["BUY", "SELL"]
-    order_type: Literal["limit", "market"] = "limit"
+    order_type: Literal["limit", "market", "stop", "stop_limit"] = "limit"
     quantity: int = Field(..., gt=0)
-    price: Optional[float] = Field(None, gt=0)
+    price: Optional[float] = Field(None, gt=0, validate_default=True)
+    stop_price: Optional[float] = Field(None, gt=0, validate_default=True)
+    time_in_force: Literal["GTC", "DAY", "IOC", "FOK"] = "GTC"
 
     @field_validator("price")
     @classmethod
     def _ensure_price_for_limit(cls, value: Optional[float], info):
         order_type = info.data.get("order_type", "limit")
-        if order_type == "limit" and value is None:
-            raise ValueError("price is required for limit orders")
+        if order_type in ("limit", "stop_limit") and value is None:
+            raise ValueError(f"price is required for {order_type} orders")
+        return value
+
+    @field_validator("stop_price")
+    @classmethod
+    def _ensure_stop_price_for_stops(cls, value: Optional[float], info):
+        order_type = info.data.get("order_type", "limit")
+        if order_type in ("stop", "stop_limit") and value is None:
+            raise ValueError(f"stop_price is required for {order_type} orders")
+        if order_type in ("limit", "market") and value is not None:
+            raise ValueError(f"stop_price is not accepted for {order_type} orders")
         return value
 
 
@@ -55,11 +167,13 @@ class OrderStatus(BaseModel):
     user_id: str
     symbol: str
     side: Literal["BUY", "SELL"]
-    order_type: Literal["limit", "market"]
+    order_type: Literal["limit", "market", "stop", "stop_limit", "quote"]
     quantity: int
     remaining_quantity: int
     price: Optional[float]
-    status: Literal["ACCEPTED", "PARTIALLY_FILLED", "FILLED"]
+    status: Literal["PENDING", "ACCEPTED", "PARTIALLY_FILLED", "FILLED", "CANCELLED", "EXPIRED"]
+    time_in_force: Literal["GTC", "DAY", "IOC", "FOK"] = "GTC"
+    stop_price: Optional[float] = None
     created_at: datetime
     updated_at: datetime
 
@@ -78,6 +192,55 @@ class OrderResponse(BaseModel):
     fills: list[TradeFill]
 
 
+class MassQuoteEntry(BaseModel):
+    symbol: str = Field(..., min_length=1)
+    bid_price: Optional[float] = Field(None, gt=0)
+    bid_size: int = Field(0, ge=0)
+    ask_price: Optional[float] = Field(None, gt=0)
+    ask_size: int = Field(0, ge=0)
+
+    @model_validator(mode="after")
+    def _ensure_priced_sides(self) -> "MassQuoteEntry":
+        # A side with size zero (or no price) pulls the maker's quote on that side.
+        if self.bid_size and self.bid_price is None:
+            raise ValueError("bid_price is required when bid_size is positive")
+        if self.ask_size and self.ask_price is None:
+            raise ValueError("ask_price is required when ask_size is positive")
+        if self.bid_size and self.ask_size and self.bid_price >= self.ask_price:
+            raise ValueError("bid_price must be below ask_price")
+        return self
+
+
+class MassQuoteRequest(BaseModel):
+    user_id: str = Field(..., min_length=1)
+    quotes: list[MassQuoteEntry] = Field(..., min_length=1, max_length=1000)
+
+    @field_validator("quotes")
+    @classmethod
+    def _ensure_unique_symbols(cls, value: list[MassQuoteEntry]):
+        symbols = [entry.symbol.upper() for entry in value]
+        if len(set(symbols)) != len(symbols):
+            raise ValueError("each symbol may appear only once per mass quote")
+        return value
+
+
+class MakerQuote(BaseModel):
+    user_id: str
+    symbol: str
+    bid_price: Optional[float]
+    bid_size: int
+    ask_price: Optional[float]
+    ask_size: int
+    updated_at: datetime
+
+
+class MassQuoteResponse(BaseModel):
+    user_id: str
+    quotes: list[MakerQuote]
+    fills: list[TradeFill]
+    rejected: dict[str, str]
+
+
 class PortfolioHolding(BaseModel):
     symbol: str
     quantity: int
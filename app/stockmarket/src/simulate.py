@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+import httpx
+
+from .analytics import ClickHouseAnalyticsPipeline
+from .archive import TickArchive
+from .clock import VirtualClock
+from .engine import StockMarketEngine
+from .risk import RiskEngine
+from .storage import StockmarketStorage
+
+
+async def simulate(
+    dataset_path: Path,
+    *,
+    seed: int,
+    duration: float,
+    tick_interval: float = 1.0,
+    news_interval: float = 45.0,
+    start: Optional[datetime] = None,
+    output: Optional[BinaryIO] = None,
+    step: float = 60.0,
+    archive: Optional[Path] = None,
+) -> str:
+    """Run the engine on a virtual clock and return a digest of every broadcast event.
+
+    Storage, risk, and analytics run without backing services so identical seeds
+    always yield identical event streams (and therefore identical digests).
+    With ``archive`` set, the session's ticks and trades are also written there
+    as segment files for later replays.
+    """
+
+    clock = VirtualClock(start or datetime(2024, 1, 1, 9, 30, tzinfo=timezone.utc))
+    digest = hashlib.sha256()
+    async with httpx.AsyncClient() as http_client:
+        engine = await StockMarketEngine.bootstrap(
+            dataset_path,
+            storage=StockmarketStorage(None, None),
+            risk=RiskEngine(None, http_client),
+            analytics=ClickHouseAnalyticsPipeline(host=None, enabled=False),
+            tick_interval=tick_interval,
+            news_interval=news_interval,
+            clock=clock,
+            seed=seed,
+            archive=TickArchive(archive, clock=clock) if archive is not None else None,
+        )
+        queue: asyncio.Queue = asyncio.Queue()
+        engine.register(queue)
+        await engine.start()
+        try:
+            while clock.elapsed < duration:
+                await clock.advance(min(step, duration - clock.elapsed))
+                while not queue.empty():
+                    line = queue.get_nowait().json() + b"\n"
+                    digest.update(line)
+                    if output is not None:
+                        output.write(line)
+        finally:
+            engine.unregister(queue)
+            await engine.stop()
+    return digest.hexdigest()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay a seeded trading session on a virtual clock.")
+    parser.add_argument("--dataset", type=Path, default=Path("/app/data/dataset/fake_companies.json"))
+    parser.add_argument("--seed", type=int, required=True)
+    parser.add_argument("--duration", type=float, default=6.5 * 3600, help="Simulated seconds (default: one session)")
+    parser.add_argument("--tick-interval", type=float, default=1.0)
+    parser.add_argument("--news-interval", type=float, default=45.0)
+    parser.add_argument("--output", type=Path, help="Write every broadcast event as JSON lines")
+    parser.add_argument("--archive", type=Path, help="Write ticks and trades as archive segments under this directory")
+    args = parser.parse_args(argv)
+
+    handle = args.output.open("wb") if args.output else None
+    try:
+        digest = asyncio.run(
+            simulate(
+                args.dataset,
+                seed=args.seed,
+                duration=args.duration,
+                tick_interval=args.tick_interval,
+                news_interval=args.news_interval,
+                output=handle,
+                archive=args.archive,
+            )
+        )
+    finally:
+        if handle is not None:
+            handle.close()
+    sys.stdout.write(f"{digest}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import orjson
+
+
+@dataclass(frozen=True, slots=True)
+class EncodedSnapshot:
+    """Immutable, pre-encoded JSON body for a market data channel."""
+
+    channel: str
+    version: int
+    body: bytes
+    etag: str
+
+
+class SnapshotPublisher:
+    """Keeps the latest versioned snapshot per channel so reads never re-encode."""
+
+    def __init__(self) -> None:
+        # The epoch keeps ETags from colliding across process restarts.
+        self._epoch = uuid.uuid4().hex[:12]
+        self._snapshots: Dict[str, EncodedSnapshot] = {}
+
+    def publish(self, channel: str, payload: Any) -> EncodedSnapshot:
+        previous = self._snapshots.get(channel)
+        version = previous.version + 1 if previous else 1
+        snapshot = EncodedSnapshot(
+            channel=channel,
+            version=version,
+            body=orjson.dumps(payload),
+            etag=f'"{channel}-{self._epoch}-{version}"',
+        )
+        self._snapshots[channel] = snapshot
+        return snapshot
+
+    def get(self, channel: str) -> Optional[EncodedSnapshot]:
+        return self._snapshots.get(channel)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+__all__ = ["EncodedSnapshot", "SnapshotPublisher", "etag_matches"]
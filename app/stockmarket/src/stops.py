@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right, insort
+from itertools import count
+from typing import Dict, List, Tuple
+
+# (stop price, arrival sequence, order id); the sequence keeps equal stops in time priority.
+_Trigger = Tuple[float, int, str]
+
+
+class TriggerIndex:
+    """Pending stop orders for one symbol, kept sorted by stop price.
+
+    Buy stops fire when the price rises to their stop and sell stops when it falls
+    to theirs, so the crossed triggers are always a prefix of the buy list and a
+    suffix of the sell list. A price that crosses nothing costs two bisections.
+    """
+
+    __slots__ = ("_buys", "_sells", "_keys", "_arrivals")
+
+    def __init__(self) -> None:
+        self._buys: List[_Trigger] = []
+        self._sells: List[_Trigger] = []
+        self._keys: Dict[str, Tuple[str, _Trigger]] = {}
+        self._arrivals = count()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self._keys
+
+    def add(self, order_id: str, side: str, stop_price: float) -> None:
+        key = (stop_price, next(self._arrivals), order_id)
+        insort(self._buys if side == "BUY" else self._sells, key)
+        self._keys[order_id] = (side, key)
+
+    def discard(self, order_id: str) -> bool:
+        entry = self._keys.pop(order_id, None)
+        if entry is None:
+            return False
+        side, key = entry
+        triggers = self._buys if side == "BUY" else self._sells
+        del triggers[bisect_left(triggers, key)]
+        return True
+
+    def order_ids(self) -> List[str]:
+        return list(self._keys)
+
+    def crossed(self, price: float) -> bool:
+        return bool(
+            (self._buys and self._buys[0][0] <= price) or (self._sells and self._sells[-1][0] >= price)
+        )
+
+    def pop_crossed(self, price: float) -> List[str]:
+        """Remove and return the orders whose stop ``price`` has reached, nearest stop first."""
+
+        fired: List[str] = []
+        end = bisect_right(self._buys, (price, float("inf"), ""))
+        if end:
+            fired.extend(order_id for _, _, order_id in self._buys[:end])
+            del self._buys[:end]
+        start = bisect_left(self._sells, (price, -1, ""))
+        if start < len(self._sells):
+            crossed = self._sells[start:]
+            crossed.sort(key=lambda key: (-key[0], key[1]))
+            fired.extend(order_id for _, _, order_id in crossed)
+            del self._sells[start:]
+        for order_id in fired:
+            del self._keys[order_id]
+        return fired
+
+
+__all__ = ["TriggerIndex"]
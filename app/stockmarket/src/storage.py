@@ -1,35 +1,66 @@
 from __future__ import annotations
 
 import json
-from datetime import datetime
-from typing import List, Optional, Sequence
+from datetime import datetime, timedelta
+from typing import Any, List, Optional, Sequence, Tuple
 
 import asyncpg
 from redis.asyncio import Redis
 
-from .schemas import (
-    OrderStatus,
-    PortfolioHolding,
-    PortfolioResponse,
-    TickerSnapshot,
-    TradeFill,
+from . import metrics
+from .migrations import migrate
+from .records import (
+    OPEN_ORDER_STATUSES,
+    FillRecord,
+    HoldingRecord,
+    MakerQuoteRecord,
+    OrderRecord,
+    PortfolioRecord,
+    TickRecord,
 )
 
 
+# Spelled out rather than bound as a parameter: the planner only uses the partial index
+# market_orders_open_idx when the query repeats its predicate literally.
+_OPEN_ORDERS = "status IN ({})".format(", ".join(f"'{status}'" for status in OPEN_ORDER_STATUSES))
+
+
 class StockmarketStorage:
-    """Persists market state into PostgreSQL and Redis."""
+    """Persists market state into PostgreSQL and Redis.
+
+    Queries are sent with parameters, so asyncpg prepares each query text once per
+    pooled connection and reuses it from the connection's statement cache;
+    ``statement_cache_size=0`` turns that off for poolers that cannot keep
+    prepared statements, such as PgBouncer in transaction mode.
+    """
 
-    def __init__(self, postgres_dsn: Optional[str], redis_url: Optional[str]) -> None:
+    def __init__(
+        self,
+        postgres_dsn: Optional[str],
+        redis_url: Optional[str],
+        *,
+        pool_min_size: int = 1,
+        pool_max_size: int = 5,
+        statement_cache_size: int = 100,
+    ) -> None:
         self._postgres_dsn = postgres_dsn
         self._redis_url = redis_url
+        self._pool_min_size = pool_min_size
+        self._pool_max_size = pool_max_size
+        self._statement_cache_size = statement_cache_size
         self._pool: Optional[asyncpg.Pool] = None
         self._redis: Optional[Redis] = None
 
     async def connect(self) -> None:
         if self._postgres_dsn:
-            self._pool = await asyncpg.create_pool(self._postgres_dsn, min_size=1, max_size=5)
+            self._pool = await asyncpg.create_pool(
+                self._postgres_dsn,
+                min_size=self._pool_min_size,
+                max_size=self._pool_max_size,
+                statement_cache_size=self._statement_cache_size,
+            )
             async with self._pool.acquire() as conn:
-                await self._initialise_postgres(conn)
+                await migrate(conn)
         if self._redis_url:
             self._redis = Redis.from_url(self._redis_url, encoding="utf-8", decode_responses=True)
 
@@ -49,69 +80,7 @@ class StockmarketStorage:
     def has_redis(self) -> bool:
         return self._redis is not None
 
-    async def record_order_status(self, status: OrderStatus) -> None:
-        if not self._pool:
-            return
-        query = """
-            INSERT INTO market_orders (
-                order_id, user_id, symbol, side, order_type, quantity,
-                remaining_quantity, price, status, created_at, updated_at
-            )
-            VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9,$10,$11)
-            ON CONFLICT (order_id)
-            DO UPDATE SET
-                remaining_quantity = EXCLUDED.remaining_quantity,
-                status = EXCLUDED.status,
-                price = EXCLUDED.price,
-                updated_at = EXCLUDED.updated_at
-        """
-        async with self._pool.acquire() as conn:
-            await conn.execute(
-                query,
-                status.order_id,
-                status.user_id,
-                status.symbol,
-                status.side,
-                status.order_type,
-                status.quantity,
-                status.remaining_quantity,
-                status.price,
-                status.status,
-                status.created_at,
-                status.updated_at,
-            )
-
-    async def record_trades(self, fills: Sequence[TradeFill]) -> None:
-        if not self._pool or not fills:
-            return
-        query = """
-            INSERT INTO market_trades (
-                order_id,
-                counter_order_id,
-                symbol,
-                price,
-                quantity,
-                executed_at
-            )
-            VALUES ($1,$2,$3,$4,$5,$6)
-            ON CONFLICT (order_id, executed_at, symbol)
-            DO NOTHING
-        """
-        rows = [
-            (
-                fill.order_id,
-                fill.counter_order_id,
-                fill.symbol,
-                fill.price,
-                fill.quantity,
-                fill.executed_at,
-            )
-            for fill in fills
-        ]
-        async with self._pool.acquire() as conn:
-            await conn.executemany(query, rows)
-
-    async def record_portfolio_snapshot(self, snapshot: PortfolioResponse) -> None:
+    async def record_portfolio_snapshot(self, snapshot: PortfolioRecord) -> None:
         if not self._pool:
             return
         query = """
@@ -123,17 +92,152 @@ class StockmarketStorage:
                 holdings = EXCLUDED.holdings,
                 last_updated = EXCLUDED.last_updated
         """
-        holdings_payload = [holding.model_dump() for holding in snapshot.holdings]
-        async with self._pool.acquire() as conn:
-            await conn.execute(
-                query,
-                snapshot.user_id,
-                snapshot.cash,
-                json.dumps(holdings_payload),
-                snapshot.last_updated,
+        holdings_payload = snapshot.as_json()["holdings"]
+        with metrics.datastore_timer("postgres", "record_portfolio_snapshot"):
+            async with self._pool.acquire() as conn:
+                await conn.execute(
+                    query,
+                    snapshot.user_id,
+                    snapshot.cash,
+                    json.dumps(holdings_payload),
+                    snapshot.last_updated,
+                )
+
+    async def record_execution(
+        self,
+        orders: Sequence[OrderRecord],
+        fills: Sequence[FillRecord],
+        quotes: Sequence[MakerQuoteRecord],
+        portfolios: Sequence[PortfolioRecord],
+    ) -> None:
+        """Persist every row one execution produced in a single statement.
+
+        Each table gets a data-modifying CTE fed by column arrays, so the taker,
+        its counterparties, the fills, maker quotes, and positions commit
+        atomically in one round trip, and the query text never varies with the
+        batch size. Orders, quotes, and portfolios must be unique by key.
+        """
+
+        if not self._pool or not (orders or fills or quotes or portfolios):
+            return
+        query = """
+            WITH orders AS (
+                INSERT INTO market_orders (
+                    order_id, user_id, symbol, side, order_type, quantity,
+                    remaining_quantity, price, status, created_at, updated_at,
+                    time_in_force, stop_price
+                )
+                SELECT * FROM unnest(
+                    $1::text[], $2::text[], $3::text[], $4::text[], $5::text[], $6::integer[],
+                    $7::integer[], $8::numeric[], $9::text[], $10::timestamptz[], $11::timestamptz[],
+                    $12::text[], $13::numeric[]
+                )
+                ON CONFLICT (order_id)
+                DO UPDATE SET
+                    remaining_quantity = EXCLUDED.remaining_quantity,
+                    status = EXCLUDED.status,
+                    price = EXCLUDED.price,
+                    updated_at = EXCLUDED.updated_at
+            ),
+            trades AS (
+                INSERT INTO market_trades (
+                    order_id, counter_order_id, symbol, price, quantity, executed_at
+                )
+                SELECT * FROM unnest(
+                    $14::text[], $15::text[], $16::text[], $17::numeric[], $18::integer[], $19::timestamptz[]
+                )
+                ON CONFLICT (order_id, executed_at, symbol)
+                DO NOTHING
+            ),
+            quotes AS (
+                INSERT INTO market_quotes (
+                    user_id, symbol, bid_price, bid_size, ask_price, ask_size, updated_at
+                )
+                SELECT * FROM unnest(
+                    $20::text[], $21::text[], $22::numeric[], $23::integer[], $24::numeric[], $25::integer[],
+                    $26::timestamptz[]
+                )
+                ON CONFLICT (user_id, symbol)
+                DO UPDATE SET
+                    bid_price = EXCLUDED.bid_price,
+                    bid_size = EXCLUDED.bid_size,
+                    ask_price = EXCLUDED.ask_price,
+                    ask_size = EXCLUDED.ask_size,
+                    updated_at = EXCLUDED.updated_at
+            ),
+            portfolios AS (
+                INSERT INTO market_portfolios (user_id, cash, holdings, last_updated)
+                SELECT * FROM unnest($27::text[], $28::numeric[], $29::jsonb[], $30::timestamptz[])
+                ON CONFLICT (user_id)
+                DO UPDATE SET
+                    cash = EXCLUDED.cash,
+                    holdings = EXCLUDED.holdings,
+                    last_updated = EXCLUDED.last_updated
             )
+            SELECT 1
+        """
+        arguments = [
+            *_columns(
+                13,
+                [
+                    (
+                        order.order_id,
+                        order.user_id,
+                        order.symbol,
+                        order.side,
+                        order.order_type,
+                        order.quantity,
+                        order.remaining_quantity,
+                        order.price,
+                        order.status,
+                        order.created_at,
+                        order.updated_at,
+                        order.time_in_force,
+                        order.stop_price,
+                    )
+                    for order in orders
+                ],
+            ),
+            *_columns(
+                6,
+                [
+                    (fill.order_id, fill.counter_order_id, fill.symbol, fill.price, fill.quantity, fill.executed_at)
+                    for fill in fills
+                ],
+            ),
+            *_columns(
+                7,
+                [
+                    (
+                        quote.user_id,
+                        quote.symbol,
+                        quote.bid_price,
+                        quote.bid_size,
+                        quote.ask_price,
+                        quote.ask_size,
+                        quote.updated_at,
+                    )
+                    for quote in quotes
+                ],
+            ),
+            *_columns(
+                4,
+                [
+                    (
+                        snapshot.user_id,
+                        snapshot.cash,
+                        json.dumps(snapshot.as_json()["holdings"]),
+                        snapshot.last_updated,
+                    )
+                    for snapshot in portfolios
+                ],
+            ),
+        ]
+        with metrics.datastore_timer("postgres", "record_execution"):
+            async with self._pool.acquire() as conn:
+                await conn.execute(query, *arguments)
 
-    async def record_ticks(self, ticks: Sequence[TickerSnapshot], regime_name: str) -> None:
+    async def record_ticks(self, ticks: Sequence[TickRecord], regime_name: str) -> None:
         if not self._pool or not ticks:
             return
         query = """
@@ -162,23 +266,160 @@ class StockmarketStorage:
             )
             for tick in ticks
         ]
-        async with self._pool.acquire() as conn:
-            await conn.executemany(query, rows)
+        with metrics.datastore_timer("postgres", "record_ticks"):
+            async with self._pool.acquire() as conn:
+                await conn.executemany(query, rows)
+
+    async def rollup_minute_bars(self, until: datetime, span: timedelta) -> Tuple[Optional[datetime], int]:
+        """Fold the next ``span`` of raw ticks before ``until`` into one-minute bars.
+
+        Returns the new watermark and the number of bars written; the watermark
+        is None while there are no ticks at all. ``until`` and ``span`` must fall
+        on whole minutes. Tick volumes are cumulative for the day, so a bar's
+        volume is the growth across its minute.
+        """
+
+        query = """
+            INSERT INTO market_tick_bars_1m (
+                symbol, bucket_start, open_price, high_price, low_price, close_price, volume, ticks
+            )
+            SELECT symbol,
+                   date_trunc('minute', recorded_at),
+                   (array_agg(price ORDER BY recorded_at))[1],
+                   max(price),
+                   min(price),
+                   (array_agg(price ORDER BY recorded_at DESC))[1],
+                   max(volume) - min(volume),
+                   count(*)
+            FROM market_ticks
+            WHERE recorded_at >= $1 AND recorded_at < $2
+            GROUP BY symbol, date_trunc('minute', recorded_at)
+            ON CONFLICT (symbol, bucket_start) DO NOTHING
+        """
+        start = "SELECT date_trunc('minute', min(recorded_at)) FROM market_ticks"
+        return await self._rollup("1m", start, query, until, span)
+
+    async def rollup_hour_bars(self, until: datetime, span: timedelta) -> Tuple[Optional[datetime], int]:
+        """Fold the next ``span`` of one-minute bars before ``until`` into one-hour bars.
+
+        ``until`` and ``span`` must fall on whole hours; ``until`` should not pass
+        the one-minute watermark, or hours still being rolled up are cut short.
+        """
+
+        query = """
+            INSERT INTO market_tick_bars_1h (
+                symbol, bucket_start, open_price, high_price, low_price, close_price, volume, ticks
+            )
+            SELECT symbol,
+                   date_trunc('hour', bucket_start),
+                   (array_agg(open_price ORDER BY bucket_start))[1],
+                   max(high_price),
+                   min(low_price),
+                   (array_agg(close_price ORDER BY bucket_start DESC))[1],
+                   sum(volume),
+                   sum(ticks)
+            FROM market_tick_bars_1m
+            WHERE bucket_start >= $1 AND bucket_start < $2
+            GROUP BY symbol, date_trunc('hour', bucket_start)
+            ON CONFLICT (symbol, bucket_start) DO NOTHING
+        """
+        start = "SELECT date_trunc('hour', min(bucket_start)) FROM market_tick_bars_1m"
+        return await self._rollup("1h", start, query, until, span)
+
+    async def rollup_watermark(self, resolution: str) -> Optional[datetime]:
+        """Everything before the returned time has been rolled up into ``resolution`` bars."""
+
+        if not self._pool:
+            return None
+        query = "SELECT rolled_until FROM market_rollup_watermarks WHERE resolution = $1"
+        with metrics.datastore_timer("postgres", "rollup_watermark"):
+            async with self._pool.acquire() as conn:
+                return await conn.fetchval(query, resolution)
+
+    async def purge_ticks(self, before: datetime, limit: int) -> int:
+        """Delete up to ``limit`` raw ticks recorded before ``before`` and return how many went."""
+
+        query = """
+            DELETE FROM market_ticks
+            WHERE ctid = ANY(ARRAY(
+                SELECT ctid FROM market_ticks WHERE recorded_at < $1 LIMIT $2
+            ))
+        """
+        return await self._purge("purge_ticks", query, before, limit)
+
+    async def purge_minute_bars(self, before: datetime, limit: int) -> int:
+        """Delete up to ``limit`` one-minute bars starting before ``before``."""
+
+        query = """
+            DELETE FROM market_tick_bars_1m
+            WHERE ctid = ANY(ARRAY(
+                SELECT ctid FROM market_tick_bars_1m WHERE bucket_start < $1 LIMIT $2
+            ))
+        """
+        return await self._purge("purge_minute_bars", query, before, limit)
+
+    async def _rollup(
+        self,
+        resolution: str,
+        start_query: str,
+        query: str,
+        until: datetime,
+        span: timedelta,
+    ) -> Tuple[Optional[datetime], int]:
+        if not self._pool:
+            return None, 0
+        with metrics.datastore_timer("postgres", f"rollup_{resolution}"):
+            async with self._pool.acquire() as conn:
+                # The bars and the watermark move together, so a crash between chunks
+                # neither skips history nor leaves a half-written bucket behind.
+                async with conn.transaction():
+                    start = await conn.fetchval(
+                        "SELECT rolled_until FROM market_rollup_watermarks WHERE resolution = $1 FOR UPDATE",
+                        resolution,
+                    )
+                    if start is None:
+                        start = await conn.fetchval(start_query)
+                        if start is None:
+                            return None, 0
+                    end = min(start + span, until)
+                    if end <= start:
+                        return start, 0
+                    status = await conn.execute(query, start, end)
+                    await conn.execute(
+                        """
+                        INSERT INTO market_rollup_watermarks (resolution, rolled_until)
+                        VALUES ($1, $2)
+                        ON CONFLICT (resolution) DO UPDATE SET rolled_until = EXCLUDED.rolled_until
+                        """,
+                        resolution,
+                        end,
+                    )
+        return end, _affected(status)
 
-    async def load_order(self, order_id: str) -> Optional[OrderStatus]:
+    async def _purge(self, operation: str, query: str, before: datetime, limit: int) -> int:
+        if not self._pool:
+            return 0
+        with metrics.datastore_timer("postgres", operation):
+            async with self._pool.acquire() as conn:
+                status = await conn.execute(query, before, limit)
+        return _affected(status)
+
+    async def load_order(self, order_id: str) -> Optional[OrderRecord]:
         if not self._pool:
             return None
         query = """
             SELECT order_id, user_id, symbol, side, order_type, quantity,
-                   remaining_quantity, price, status, created_at, updated_at
+                   remaining_quantity, price, status, created_at, updated_at,
+                   time_in_force, stop_price
             FROM market_orders
             WHERE order_id = $1
         """
-        async with self._pool.acquire() as conn:
-            row = await conn.fetchrow(query, order_id)
+        with metrics.datastore_timer("postgres", "load_order"):
+            async with self._pool.acquire() as conn:
+                row = await conn.fetchrow(query, order_id)
         if not row:
             return None
-        return OrderStatus(
+        return OrderRecord(
             order_id=row["order_id"],
             user_id=row["user_id"],
             symbol=row["symbol"],
@@ -186,25 +427,71 @@ class StockmarketStorage:
             order_type=row["order_type"],
             quantity=row["quantity"],
             remaining_quantity=row["remaining_quantity"],
-            price=row["price"],
+            price=float(row["price"]) if row["price"] is not None else None,
             status=row["status"],
             created_at=row["created_at"],
             updated_at=row["updated_at"],
+            time_in_force=row["time_in_force"],
+            stop_price=float(row["stop_price"]) if row["stop_price"] is not None else None,
         )
 
-    async def load_open_orders(self) -> List[OrderStatus]:
+    async def load_open_orders(self) -> List[OrderRecord]:
         if not self._pool:
             return []
+        query = f"""
+            SELECT order_id, user_id, symbol, side, order_type, quantity,
+                   remaining_quantity, price, status, created_at, updated_at,
+                   time_in_force, stop_price
+            FROM market_orders
+            WHERE {_OPEN_ORDERS}
+        """
+        with metrics.datastore_timer("postgres", "load_open_orders"):
+            async with self._pool.acquire() as conn:
+                rows = await conn.fetch(query)
+        return [
+            OrderRecord(
+                order_id=row["order_id"],
+                user_id=row["user_id"],
+                symbol=row["symbol"],
+                side=row["side"],
+                order_type=row["order_type"],
+                quantity=row["quantity"],
+                remaining_quantity=row["remaining_quantity"],
+                price=float(row["price"]) if row["price"] is not None else None,
+                status=row["status"],
+                created_at=row["created_at"],
+                updated_at=row["updated_at"],
+                time_in_force=row["time_in_force"],
+                stop_price=float(row["stop_price"]) if row["stop_price"] is not None else None,
+            )
+            for row in rows
+        ]
+
+    async def load_user_orders(
+        self, user_id: str, limit: int, before: Optional[str] = None
+    ) -> List[OrderRecord]:
+        """A page of ``user_id``'s orders, newest first, starting after the order ``before``."""
+
+        if not self._pool:
+            return []
+        # An unknown cursor matches no row, so it yields an empty page rather than the first one.
         query = """
             SELECT order_id, user_id, symbol, side, order_type, quantity,
-                   remaining_quantity, price, status, created_at, updated_at
+                   remaining_quantity, price, status, created_at, updated_at,
+                   time_in_force, stop_price
             FROM market_orders
-            WHERE status != 'FILLED'
+            WHERE user_id = $1
+              AND ($3::text IS NULL OR (created_at, order_id) < (
+                  SELECT created_at, order_id FROM market_orders WHERE order_id = $3
+              ))
+            ORDER BY created_at DESC, order_id DESC
+            LIMIT $2
         """
-        async with self._pool.acquire() as conn:
-            rows = await conn.fetch(query)
+        with metrics.datastore_timer("postgres", "load_user_orders"):
+            async with self._pool.acquire() as conn:
+                rows = await conn.fetch(query, user_id, limit, before)
         return [
-            OrderStatus(
+            OrderRecord(
                 order_id=row["order_id"],
                 user_id=row["user_id"],
                 symbol=row["symbol"],
@@ -212,15 +499,41 @@ class StockmarketStorage:
                 order_type=row["order_type"],
                 quantity=row["quantity"],
                 remaining_quantity=row["remaining_quantity"],
-                price=row["price"],
+                price=float(row["price"]) if row["price"] is not None else None,
                 status=row["status"],
                 created_at=row["created_at"],
                 updated_at=row["updated_at"],
+                time_in_force=row["time_in_force"],
+                stop_price=float(row["stop_price"]) if row["stop_price"] is not None else None,
             )
             for row in rows
         ]
 
-    async def load_portfolio(self, user_id: str) -> Optional[PortfolioResponse]:
+    async def load_quotes(self) -> List[MakerQuoteRecord]:
+        if not self._pool:
+            return []
+        query = """
+            SELECT user_id, symbol, bid_price, bid_size, ask_price, ask_size, updated_at
+            FROM market_quotes
+            WHERE bid_size > 0 OR ask_size > 0
+        """
+        with metrics.datastore_timer("postgres", "load_quotes"):
+            async with self._pool.acquire() as conn:
+                rows = await conn.fetch(query)
+        return [
+            MakerQuoteRecord(
+                user_id=row["user_id"],
+                symbol=row["symbol"],
+                bid_price=float(row["bid_price"]) if row["bid_price"] is not None else None,
+                bid_size=row["bid_size"],
+                ask_price=float(row["ask_price"]) if row["ask_price"] is not None else None,
+                ask_size=row["ask_size"],
+                updated_at=row["updated_at"],
+            )
+            for row in rows
+        ]
+
+    async def load_portfolio(self, user_id: str) -> Optional[PortfolioRecord]:
         if not self._pool:
             return None
         query = """
@@ -228,19 +541,20 @@ class StockmarketStorage:
             FROM market_portfolios
             WHERE user_id = $1
         """
-        async with self._pool.acquire() as conn:
-            row = await conn.fetchrow(query, user_id)
+        with metrics.datastore_timer("postgres", "load_portfolio"):
+            async with self._pool.acquire() as conn:
+                row = await conn.fetchrow(query, user_id)
         if not row:
             return None
         holdings = json.loads(row["holdings"] or "[]")
-        return PortfolioResponse(
+        return PortfolioRecord(
             user_id=row["user_id"],
             cash=float(row["cash"]),
-            holdings=[PortfolioHolding(**item) for item in holdings],
+            holdings=[HoldingRecord(**item) for item in holdings],
             last_updated=row["last_updated"],
         )
 
-    async def load_recent_trades(self, limit: int) -> List[TradeFill]:
+    async def load_recent_trades(self, limit: int) -> List[FillRecord]:
         if not self._pool:
             return []
         query = """
@@ -249,10 +563,11 @@ class StockmarketStorage:
             ORDER BY executed_at DESC
             LIMIT $1
         """
-        async with self._pool.acquire() as conn:
-            rows = await conn.fetch(query, limit)
+        with metrics.datastore_timer("postgres", "load_recent_trades"):
+            async with self._pool.acquire() as conn:
+                rows = await conn.fetch(query, limit)
         return [
-            TradeFill(
+            FillRecord(
                 order_id=row["order_id"],
                 counter_order_id=row["counter_order_id"],
                 symbol=row["symbol"],
@@ -263,119 +578,49 @@ class StockmarketStorage:
             for row in rows
         ]
 
-    async def load_all_portfolios(self) -> List[PortfolioResponse]:
+    async def load_all_portfolios(self) -> List[PortfolioRecord]:
         if not self._pool:
             return []
         query = """
             SELECT user_id, cash, holdings, last_updated
             FROM market_portfolios
         """
-        async with self._pool.acquire() as conn:
-            rows = await conn.fetch(query)
-        responses: List[PortfolioResponse] = []
+        with metrics.datastore_timer("postgres", "load_all_portfolios"):
+            async with self._pool.acquire() as conn:
+                rows = await conn.fetch(query)
+        responses: List[PortfolioRecord] = []
         for row in rows:
             holdings = json.loads(row["holdings"] or "[]")
             responses.append(
-                PortfolioResponse(
+                PortfolioRecord(
                     user_id=row["user_id"],
                     cash=float(row["cash"]),
-                    holdings=[PortfolioHolding(**item) for item in holdings],
+                    holdings=[HoldingRecord(**item) for item in holdings],
                     last_updated=row["last_updated"],
                 )
             )
         return responses
 
-    async def cache_tickers(self, snapshots: Sequence[TickerSnapshot]) -> None:
+    async def cache_tickers(self, snapshots: Sequence[TickRecord]) -> None:
         if not self._redis or not snapshots:
             return
         mapping = {
-            snapshot.symbol: json.dumps(snapshot.model_dump(mode="json"))
+            snapshot.symbol: json.dumps(snapshot.as_json())
             for snapshot in snapshots
         }
-        await self._redis.hset("market:tickers", mapping=mapping)
+        with metrics.datastore_timer("redis", "cache_tickers"):
+            await self._redis.hset("market:tickers", mapping=mapping)
 
-    async def load_cached_tickers(self) -> List[TickerSnapshot]:
-        if not self._redis:
-            return []
-        data = await self._redis.hgetall("market:tickers")
-        snapshots: List[TickerSnapshot] = []
-        for value in data.values():
-            payload = json.loads(value)
-            payload["last_update"] = datetime.fromisoformat(payload["last_update"])
-            snapshots.append(TickerSnapshot(**payload))
-        return snapshots
-
-    async def _initialise_postgres(self, conn: asyncpg.Connection) -> None:
-        await conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS market_orders (
-                order_id TEXT PRIMARY KEY,
-                user_id TEXT NOT NULL,
-                symbol TEXT NOT NULL,
-                side TEXT NOT NULL,
-                order_type TEXT NOT NULL,
-                quantity INTEGER NOT NULL,
-                remaining_quantity INTEGER NOT NULL,
-                price NUMERIC,
-                status TEXT NOT NULL,
-                created_at TIMESTAMPTZ NOT NULL,
-                updated_at TIMESTAMPTZ NOT NULL
-            )
-            """
-        )
-        await conn.execute(
-            """
-            ALTER TABLE market_orders
-            ADD COLUMN IF NOT EXISTS user_id TEXT
-            """
-        )
-        await conn.execute(
-            """
-            UPDATE market_orders
-            SET user_id = 'legacy-user'
-            WHERE user_id IS NULL
-            """
-        )
-        await conn.execute(
-            """
-            ALTER TABLE market_orders
-            ALTER COLUMN user_id SET NOT NULL
-            """
-        )
-        await conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS market_trades (
-                order_id TEXT NOT NULL,
-                counter_order_id TEXT,
-                symbol TEXT NOT NULL,
-                price NUMERIC NOT NULL,
-                quantity INTEGER NOT NULL,
-                executed_at TIMESTAMPTZ NOT NULL,
-                PRIMARY KEY (order_id, executed_at, symbol)
-            )
-            """
-        )
-        await conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS market_portfolios (
-                user_id TEXT PRIMARY KEY,
-                cash NUMERIC NOT NULL,
-                holdings JSONB NOT NULL,
-                last_updated TIMESTAMPTZ NOT NULL
-            )
-            """
-        )
-        await conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS market_ticks (
-                symbol TEXT NOT NULL,
-                price NUMERIC NOT NULL,
-                open_price NUMERIC NOT NULL,
-                high_price NUMERIC NOT NULL,
-                low_price NUMERIC NOT NULL,
-                volume INTEGER NOT NULL,
-                regime TEXT NOT NULL,
-                recorded_at TIMESTAMPTZ NOT NULL
-            )
-            """
-        )
+
+def _columns(width: int, rows: List[Tuple[Any, ...]]) -> List[List[Any]]:
+    """Transpose ``rows`` into one list per column, for ``unnest`` over array parameters."""
+
+    if not rows:
+        return [[] for _ in range(width)]
+    return [list(column) for column in zip(*rows)]
+
+
+def _affected(status: str) -> int:
+    """Row count from a command tag such as ``INSERT 0 12`` or ``DELETE 5000``."""
+
+    return int(status.rsplit(" ", 1)[-1])
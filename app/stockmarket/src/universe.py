@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Mapping
+
+from .pricing import TickerState
+
+# Whitespace and the array punctuation between top-level company objects.
+_SEPARATORS = frozenset(" \t\r\n,[]")
+
+
+def iter_companies(path: Path, *, chunk_size: int = 1 << 16) -> Iterator[Dict[str, Any]]:
+    """Yield the company objects of a dataset file one at a time.
+
+    The file may hold a JSON array of objects or one object per line. It is
+    read in ``chunk_size`` pieces and each object is decoded as soon as it is
+    complete, so memory holds one chunk and one company however large the
+    universe is.
+    """
+
+    decoder = json.JSONDecoder()
+    with path.open("r", encoding="utf-8") as handle:
+        buffer = ""
+        position = 0
+        exhausted = False
+        while True:
+            while position < len(buffer) and buffer[position] in _SEPARATORS:
+                position += 1
+            if position == len(buffer):
+                buffer = handle.read(chunk_size)
+                position = 0
+                if not buffer:
+                    return
+                continue
+            try:
+                company, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Objects always end in a brace, so a cut-off object never decodes early.
+                if exhausted:
+                    raise
+                more = handle.read(chunk_size)
+                exhausted = not more
+                buffer = buffer[position:] + more
+                position = 0
+                continue
+            if not isinstance(company, dict):
+                raise ValueError(f"Dataset entries must be JSON objects, got {type(company).__name__}")
+            yield company
+
+
+def ticker_state(company: Mapping[str, Any], now: datetime) -> TickerState:
+    """Fresh pricing state for one dataset entry, opening at its base price."""
+
+    symbol = company["ticker"].upper()
+    base_price = float(company.get("base_price", 25.0))
+    volatility = float(company.get("volatility", 0.08))
+    return TickerState(
+        symbol=symbol,
+        name=company.get("name") or symbol,
+        sector=company.get("sector", "General"),
+        region=company.get("region", "Global"),
+        market_cap=float(company.get("market_cap_millions", 0.0)),
+        base_price=base_price,
+        volatility=max(0.01, volatility),
+        price=base_price,
+        open_price=base_price,
+        high_price=base_price,
+        low_price=base_price,
+        volume=0,
+        last_update=now,
+    )
+
+
+def load_universe(path: Path, now: datetime) -> Dict[str, TickerState]:
+    """Pricing state for every company in ``path``, keyed by symbol; later entries win."""
+
+    return {state.symbol: state for state in (ticker_state(company, now) for company in iter_companies(path))}
+
+
+__all__ = ["iter_companies", "load_universe", "ticker_state"]